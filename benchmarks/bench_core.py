@@ -0,0 +1,297 @@
+"""
+摸鱼神器核心逻辑的性能基准 (不需要界面，只依赖 fish_core).
+- 用固定随机种子生成 date / interval / weekly / mixed 四种事件组合，规模默认 10、1k、10k、100k。
+- 测量：规则计算 (_calculate_next / get_occurrences)、事件面板刷新 (冷/热缓存)、触发扫描、
+  JSON 与 SQLite 存储的加载/保存延迟、SQLite 的 next_date 索引查询，以及 tracemalloc 统计的数据模型峰值内存。
+- --save 保存结果作为基线，--compare 与基线比较，超出容差的指标会列出并以退出码 1 结束。
+
+用法:
+    python benchmarks/bench_core.py
+    python benchmarks/bench_core.py --sizes 10 1000 --mixes mixed --repeat 5
+    python benchmarks/bench_core.py --save benchmarks/baseline.json
+    python benchmarks/bench_core.py --compare benchmarks/baseline.json --tolerance 0.3
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fish_core import (Event, OCCURRENCE_CACHE, TriggerScheduler, JournaledStore, SQLiteStore, default_app_data,
+                       event_countdown)
+
+SIZES = [10, 1000, 10000, 100000]
+MIXES = ["date", "interval", "weekly", "mixed"]
+PAGE_SIZE = 5  # 与主界面事件标签池大小一致
+# 每项指标的单位，以及比较时忽略的绝对波动 (低于该值的差异视为噪声)
+METRICS = {
+    "calculate_next_us": ("us/事件", 0.2),
+    "get_occurrences_us": ("us/事件", 0.5),
+    "tick_cold_ms": ("ms", 0.05),
+    "tick_warm_ms": ("ms", 0.05),
+    "trigger_rebuild_ms": ("ms", 0.05),
+    "trigger_scan_ms": ("ms", 0.05),
+    "json_save_event_us": ("us/事件", 2.0),
+    "json_snapshot_ms": ("ms", 0.5),
+    "json_load_ms": ("ms", 0.5),
+    "sqlite_load_ms": ("ms", 0.5),
+    "sqlite_page_ms": ("ms", 0.05),
+    "sqlite_today_ms": ("ms", 0.05),
+    "peak_memory_mb": ("MB", 0.1),
+}
+
+
+class FakeWidget:
+    """调度器只需要 after / after_cancel；基准里不真正挂定时器."""
+
+    def after(self, ms, callback, *args):
+        return "timer"
+
+    def after_cancel(self, timer_id):
+        pass
+
+
+def make_event_data(n, mix, seed=0, today=None):
+    """生成 n 个事件字典；mixed 组合按 date/interval/weekly = 2:1:1，并带少量禁用、已结束和今天到期的事件."""
+    rng = random.Random(f"{seed}-{mix}-{n}")
+    today = today or date.today()
+    events = []
+    for i in range(n):
+        kind = mix if mix != "mixed" else rng.choice(["date", "date", "interval", "weekly"])
+        data = {"id": f"bench-{i:06d}", "name": f"事件 {i}", "enabled": rng.random() > 0.05,
+                "start_date": (today - timedelta(days=rng.randint(0, 400))).isoformat(),
+                "last_triggered_date": None, "repeat": {"total": -1, "triggered": 0}}
+        if kind == "date":
+            data["trigger"] = {"type": "date", "value": (today + timedelta(days=rng.randint(-30, 365))).isoformat()}
+            data["repeat"] = {"total": 1, "triggered": 0}
+        elif kind == "interval":
+            data["trigger"] = {"type": "interval", "value": str(rng.choice([1, 2, 3, 7, 14, 30, 90]))}
+            if rng.random() < 0.3: data["repeat"] = {"total": rng.randint(1, 50), "triggered": rng.randint(0, 20)}
+        else:
+            data["trigger"] = {"type": "weekly", "value": sorted(rng.sample(range(7), rng.randint(1, 5)))}
+        events.append(data)
+    return events
+
+
+def best_of(repeat, func, setup=None):
+    """执行 repeat 次取最快一次的耗时 (秒)；setup 的耗时不计入，其返回值作为 func 的参数."""
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg) if setup else func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def events_panel_tick(events, today):
+    """事件面板的一次刷新：取排序结果的第一页并计算每个事件的倒计时 (与 update_event_countdown_text 相同)."""
+    for event in OCCURRENCE_CACHE.upcoming(events, today)[:PAGE_SIZE]:
+        event_countdown(event, today)
+
+
+def bench_rules(events, today, repeat):
+    n = len(events)
+    return {
+        "calculate_next_us": best_of(repeat, lambda: [e._calculate_next(today) for e in events]) / n * 1e6,
+        "get_occurrences_us": best_of(repeat, lambda: [e.get_occurrences(2) for e in events]) / n * 1e6,
+    }
+
+
+def bench_ticks(events, today, repeat):
+    def cold():
+        OCCURRENCE_CACHE.invalidate()  # 编辑事件或跨天之后的第一次刷新
+        events_panel_tick(events, today)
+
+    result = {"tick_cold_ms": best_of(repeat, cold) * 1e3}
+    events_panel_tick(events, today)
+    result["tick_warm_ms"] = best_of(repeat, lambda: events_panel_tick(events, today)) * 1e3
+    OCCURRENCE_CACHE.invalidate()
+    return result
+
+
+def bench_triggers(event_data, today, repeat):
+    scheduler = TriggerScheduler(FakeWidget(), lambda: None)
+
+    def fresh_events():
+        OCCURRENCE_CACHE.invalidate()
+        return [Event(d) for d in event_data]  # 触发会修改事件，每轮使用新的事件对象
+
+    def rebuilt():
+        events = fresh_events()
+        scheduler.rebuild(events)
+        return events
+
+    result = {"trigger_rebuild_ms": best_of(repeat, lambda events: scheduler.rebuild(events), fresh_events) * 1e3,
+              "trigger_scan_ms": best_of(repeat, lambda _: scheduler.trigger_due(today), rebuilt) * 1e3}
+    OCCURRENCE_CACHE.invalidate()
+    return result
+
+
+def bench_json_store(event_data, workdir, repeat):
+    path = os.path.join(workdir, "events.json")
+    default = default_app_data()
+    default["events"] = event_data
+    store = JournaledStore(path)
+    store.load(default)  # 首次加载写出快照
+    store.close(timeout=None)
+    events = [Event(d) for d in event_data[:100]]
+
+    def load():
+        loaded = JournaledStore(path)
+        loaded.load(default)
+        return loaded
+
+    load_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = load()
+        load_times.append(time.perf_counter() - start)
+        loaded.close(timeout=None)
+
+    store = load()
+    save_time = best_of(repeat, lambda: [store.put_event(e) for e in events]) / len(events)
+    store.close(timeout=None)
+    snapshot_time = best_of(repeat, store._write_snapshot)
+    return {"json_load_ms": min(load_times) * 1e3, "json_save_event_us": save_time * 1e6,
+            "json_snapshot_ms": snapshot_time * 1e3}
+
+
+def bench_sqlite_store(event_data, workdir, repeat):
+    path = os.path.join(workdir, "events.db")
+    default = default_app_data()
+    default["events"] = event_data
+    store = SQLiteStore(path)
+    store.load(default)  # 首次加载建表并写入全部事件
+    store.close(timeout=None)
+    load_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        store = SQLiteStore(path)
+        store.load(default)
+        load_times.append(time.perf_counter() - start)
+        store.close(timeout=None)
+    # 事件面板的一页 (总数 + 前 PAGE_SIZE 个) 与当天触发的事件，均走 (enabled, next_date) 索引
+    today = date.today()
+    store = SQLiteStore(path)
+    store.load(default)
+    store.ids_on(today)  # 第一次查询补算迁移时留空的 next_date
+    page_time = best_of(repeat, lambda: (store.count_enabled(today), store.upcoming_ids(today, PAGE_SIZE)))
+    today_time = best_of(repeat, lambda: store.ids_on(today))
+    store.close(timeout=None)
+    return {"sqlite_load_ms": min(load_times) * 1e3, "sqlite_page_ms": page_time * 1e3,
+            "sqlite_today_ms": today_time * 1e3}
+
+
+def bench_memory(event_data, today):
+    """事件对象、发生日期缓存与触发堆的峰值内存."""
+    OCCURRENCE_CACHE.invalidate()
+    tracemalloc.start()
+    events = [Event(d) for d in event_data]
+    events_panel_tick(events, today)
+    TriggerScheduler(FakeWidget(), lambda: None).rebuild(events)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    OCCURRENCE_CACHE.invalidate()
+    return {"peak_memory_mb": peak / 1024 / 1024}
+
+
+def run_case(mix, n, repeat, stores):
+    today = date.today()
+    event_data = make_event_data(n, mix, today=today)
+    events = [Event(d) for d in event_data]
+    # 大规模时减少重复次数，避免整套基准运行过久
+    repeat = repeat if n < 100000 else max(1, repeat // 2)
+    result = {}
+    result.update(bench_rules(events, today, repeat))
+    result.update(bench_ticks(events, today, repeat))
+    result.update(bench_triggers(event_data, today, repeat))
+    workdir = tempfile.mkdtemp(prefix="fish_bench_")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # 存储层每次写快照都会打印一行
+            if "json" in stores: result.update(bench_json_store(event_data, workdir, repeat))
+            if "sqlite" in stores: result.update(bench_sqlite_store(event_data, workdir, repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result.update(bench_memory(event_data, today))
+    return result
+
+
+def print_table(results):
+    """每种事件组合一张表，列为事件规模."""
+    mixes = list(dict.fromkeys(key.split("/")[0] for key in results))
+    for mix in mixes:
+        keys = [key for key in results if key.split("/")[0] == mix]
+        metrics = [m for m in METRICS if any(m in results[k] for k in keys)]
+        print(f"\n[{mix}]")
+        print("指标".ljust(32) + "".join(key.split("/")[1].rjust(12) for key in keys))
+        for metric in metrics:
+            row = f"{metric} ({METRICS[metric][0]})".ljust(32)
+            row += "".join((f"{results[k][metric]:.3f}" if metric in results[k] else "-").rjust(12) for k in keys)
+            print(row)
+
+
+def compare(results, baseline, tolerance):
+    """返回 (用例, 指标, 基线值, 当前值) 形式的退化列表."""
+    regressions = []
+    for key, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(key, {}).get(metric)
+            if old is None: continue
+            noise = METRICS.get(metric, ("", 0))[1]
+            if value > old * (1 + tolerance) and value - old > noise:
+                regressions.append((key, metric, old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="摸鱼神器核心逻辑性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--mixes", nargs="+", choices=MIXES, default=MIXES)
+    parser.add_argument("--stores", nargs="+", choices=["json", "sqlite"], default=["json", "sqlite"])
+    parser.add_argument("--repeat", type=int, default=3, help="每项取最快一次的重复次数")
+    parser.add_argument("--save", metavar="PATH", help="把结果保存为基线 JSON")
+    parser.add_argument("--compare", metavar="PATH", help="与基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对退化比例 (默认 0.25)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for mix in args.mixes:
+        for n in args.sizes:
+            key = f"{mix}/{n}"
+            start = time.perf_counter()
+            results[key] = run_case(mix, n, args.repeat, args.stores)
+            print(f"{key}: 完成 ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+    print_table(results)
+
+    if args.save:
+        meta = {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                "platform": platform.platform(), "repeat": args.repeat}
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"\n基线已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        print(f"\n与基线比较 ({baseline['meta'].get('created')}, {baseline['meta'].get('platform')}):")
+        for key, metric, old, new in regressions:
+            print(f"  退化 {key} {metric}: {old:.3f} -> {new:.3f} ({new / old - 1:+.0%})")
+        if regressions: return 1
+        print("  没有超出容差的退化。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
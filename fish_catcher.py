@@ -1,183 +1,266 @@
+import time
+_STARTUP_T0 = time.perf_counter()  # 【新增】启动计时的起点，见 StartupTrace
+import sys
+
+# 【新增】命令行状态查询 (fish_catcher.py status [--json])：只依赖 fish_core，在导入 tkinter / ttkbootstrap 之前分流
+if __name__ == "__main__" and sys.argv[1:2] == ["status"]:
+    from fish_core import status_main
+    sys.exit(status_main(sys.argv[2:]))
+
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from datetime import datetime, timedelta, date
 import threading
-import time
-import json
 import os
-import sys
+import hashlib
 import calendar
-import random
 import ctypes
+import math
+import queue
+import csv
 
 # --- 引入必要的模块 ---
-try:
-    from PIL import Image, ImageTk
-except ImportError:
-    root = tk.Tk();
-    root.withdraw()
-    messagebox.showerror("依赖缺失", "错误：Pillow 库未安装！\n请在终端运行 'pip install Pillow' 来安装。")
-    exit()
-
+# 【优化】plyer 改为首次发送通知时才导入，背景图片推迟到首帧绘制之后解码 (见 load_background_image)
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from ttkbootstrap.scrolled import ScrolledFrame
 
-try:
-    from plyer import notification
-except ImportError:
-    notification = None
+# 【新增】事件模型、调度、持久化与倒计时计算都在不依赖界面的 fish_core 中
+from fish_core import (resource_path, get_user_data_path, Event, OCCURRENCE_CACHE, OCCURRENCE_INDEX, AppSettings, TriggerScheduler,
+                       RefreshScheduler, next_second, next_midnight, open_event_store, default_app_data,
+                       work_countdown, weekend_countdown, event_countdown,
+                       import_events_from_file, export_events, MottoCorpus, TickStats, LagProbe,
+                       WORKDAY_CALENDAR, default_holidays_path, InstanceGuard, send_to_running_instance, app_status)
 
 
-# --- 关键辅助函数：获取文件路径 ---
-def resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS
-    except AttributeError:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+# --- 使用辅助函数定位文件 ---
+IMAGE_PATH = resource_path("doraemon_bg.jpg")
+ICON_PATH = resource_path("fish_icon.ico")
+MOTTOS_PATH = os.getenv("FISHCATCHER_MOTTOS") or resource_path("mottos.txt")  # 【新增】每日一句语录，可用环境变量换成团队语录包
 
 
-def get_user_data_path(file_name):
+# ===================================================================
+# --- 【新增】启动计时 StartupTrace ---
+# ===================================================================
+class StartupTrace:
     """
-    获取用户数据文件的存储路径 (用于 JSON 配置文件).
-    - 打包后，此路径将指向 C:\\Users\\<用户名>\\AppData\\Roaming\\FishCatcher
-    - 这样做可以使配置文件与程序分离，符合标准软件设计。
+    记录启动各阶段 (导入、样式、控件、首帧绘制、背景图片) 距程序开始导入的耗时.
+    - 设置环境变量 FISHCATCHER_TRACE_STARTUP=1 后输出到控制台，默认不输出。
     """
-    # 获取 AppData/Roaming 目录
-    app_data_path = os.getenv('APPDATA')
 
-    # 如果无法获取 APPDATA 目录 (极少见情况)，则退回到程序所在目录
-    if not app_data_path:
-        if getattr(sys, 'frozen', False):
-            app_data_path = os.path.dirname(sys.executable)
-        else:
-            app_data_path = os.path.dirname(os.path.abspath(__file__))
+    def __init__(self, t0, enabled):
+        self.t0 = self.last = t0
+        self.enabled = enabled
 
-    # 在 AppData/Roaming 下为我们的应用创建一个专属文件夹
-    app_dir = os.path.join(app_data_path, "FishCatcher")
+    def mark(self, stage):
+        if not self.enabled: return
+        now = time.perf_counter()
+        print(f"[startup] {stage:<10} {(now - self.t0) * 1000:8.1f} ms  (+{(now - self.last) * 1000:.1f} ms)")
+        self.last = now
 
-    # 确保这个文件夹存在
-    os.makedirs(app_dir, exist_ok=True)
 
-    # 返回最终的文件路径
-    return os.path.join(app_dir, file_name)
+STARTUP_TRACE = StartupTrace(_STARTUP_T0, os.getenv("FISHCATCHER_TRACE_STARTUP") == "1")
+STARTUP_TRACE.mark("import")
+# 【新增】刷新耗时统计开关：FISHCATCHER_PROFILE=1 启用，FISHCATCHER_PROFILE_DUMP=<文件> 退出时写出统计结果
+PROFILE_ENABLED = os.getenv("FISHCATCHER_PROFILE") == "1" or bool(os.getenv("FISHCATCHER_PROFILE_DUMP"))
+PROFILE_DUMP_PATH = os.getenv("FISHCATCHER_PROFILE_DUMP")
 
 
-# --- 使用辅助函数定位文件 ---
-IMAGE_PATH = resource_path("doraemon_bg.jpg")
-ICON_PATH = resource_path("fish_icon.ico")
-# 注意：这里现在会使用新的 get_user_data_path 函数
-EVENTS_FILE = get_user_data_path("fish_catcher_events.json")
+# ===================================================================
+# --- 【新增】背景图片缩放缓存 ---
+# ===================================================================
+BG_CACHE_PREFIX = "fish_catcher_bg_"
+
+
+def load_background(image_path, width):
+    """
+    返回缩放到 width 宽的背景图片 (PIL Image)，缩放结果缓存在用户数据目录中.
+    - 缓存以 源文件路径、修改时间、文件大小、目标宽度 为键，命中时直接读取缩放好的小图。
+    - 未命中时 JPEG 先用 draft 模式按接近目标的尺寸解码，再用 LANCZOS 缩放；原图用完即关闭释放。
+    """
+    from PIL import Image
+    stat = os.stat(image_path)
+    key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{width}"
+    cache_path = get_user_data_path(f"{BG_CACHE_PREFIX}{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.png")
+    if os.path.exists(cache_path):
+        try:
+            cached = Image.open(cache_path)
+            cached.load()  # 读取后即关闭缓存文件
+            return cached
+        except (IOError, SyntaxError) as e:
+            print(f"警告: 背景缓存已损坏，将重新生成: {e}")
+
+    with Image.open(image_path) as source:
+        new_size = (width, int(width * source.height / source.width))
+        source.draft("RGB", new_size)  # 只对 JPEG 有效：解码时直接按 1/2、1/4、1/8 缩小
+        resized = source.resize(new_size, Image.Resampling.LANCZOS)
+    if resized.mode not in ("RGB", "RGBA", "L"): resized = resized.convert("RGB")
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        for name in os.listdir(cache_dir):  # 换了皮肤或窗口宽度后，旧的缓存不再需要
+            if name.startswith(BG_CACHE_PREFIX): os.remove(os.path.join(cache_dir, name))
+        tmp_path = cache_path + ".tmp"
+        resized.save(tmp_path, "PNG")
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"警告: 写入背景缓存失败: {e}")
+    return resized
+
+
+def _plyer_notification():
+    """首次发送通知时才导入 plyer (在通知线程中完成，不占用启动时间)；未安装时返回 None."""
+    try:
+        from plyer import notification
+    except ImportError:
+        return None
+    return notification
 
 
 # ===================================================================
-# --- 【重大升级 V5.0】事件类 Event ---
+# --- 【新增】标签渲染层 LabelRenderer ---
 # ===================================================================
-class Event:
-    def __init__(self, data):
-        self.name = data.get("name", "未命名事件")
-        self.enabled = data.get("enabled", True)
-        self.trigger_type = data.get("trigger", {}).get("type", "date")
-        self.trigger_value = data.get("trigger", {}).get("value")
-
-        start_date_str = data.get("start_date")
-        if not start_date_str:
-            if self.trigger_type == 'date':
-                start_date_str = self.trigger_value
-            else:
-                start_date_str = date.today().strftime("%Y-%m-%d")
-        self.start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-
-        last_triggered_str = data.get("last_triggered_date")
-        self.last_triggered_date = datetime.strptime(last_triggered_str,
-                                                     "%Y-%m-%d").date() if last_triggered_str else None
-
-        self.repeat_total = int(data.get("repeat", {}).get("total", 1))
-        self.times_triggered = int(data.get("repeat", {}).get("triggered", 0))
-
-    def to_dict(self):
-        return {
-            "name": self.name, "enabled": self.enabled,
-            "trigger": {"type": self.trigger_type, "value": self.trigger_value},
-            "start_date": self.start_date.strftime("%Y-%m-%d"),
-            "last_triggered_date": self.last_triggered_date.strftime("%Y-%m-%d") if self.last_triggered_date else None,
-            "repeat": {"total": self.repeat_total, "triggered": self.times_triggered}
-        }
-
-    def get_occurrences(self, count=2):
-        occurrences = []
-        from_date = date.today()
-
-        # 如果有上次触发日期，且是今天，那么下一次就从明天开始算
-        if self.last_triggered_date and self.last_triggered_date >= from_date:
-            from_date = self.last_triggered_date + timedelta(days=1)
-
-        for _ in range(count):
-            next_date = self._calculate_next(from_date)
-            if next_date:
-                occurrences.append(next_date)
-                from_date = next_date + timedelta(days=1)
-            else:
-                break
-        return occurrences
+class LabelRenderer:
+    """
+    记住每个控件上一次渲染的 (文本, 颜色)，内容没有变化时跳过 .config() 调用.
+    - 每次 .config() 都是一次 Tcl 往返并可能引起重新布局，秒级刷新时大部分都是无效更新。
+    - applied / skipped 计数用于核对实际节省了多少次更新。
+    """
 
-    def _calculate_next(self, from_date):
-        if self.repeat_total != -1 and self.times_triggered >= self.repeat_total: return None
-        if self.trigger_type == "date":
-            try:
-                event_date = datetime.strptime(self.trigger_value, "%Y-%m-%d").date()
-                return event_date if event_date >= from_date and self.times_triggered < self.repeat_total else None
-            except (ValueError, TypeError):
-                return None
-        elif self.trigger_type == "interval":
-            try:
-                interval = int(self.trigger_value)
-                if interval <= 0: return None
-                if self.start_date > from_date: return self.start_date
-                days_since_start = (from_date - self.start_date).days
-                intervals_passed = days_since_start // interval if days_since_start % interval == 0 else (
-                                                                                                                     days_since_start // interval) + 1
-                return self.start_date + timedelta(days=intervals_passed * interval)
-            except (ValueError, TypeError):
-                return None
-        elif self.trigger_type == "weekly":
-            try:
-                target_weekdays = sorted([int(d) for d in self.trigger_value])
-                if not target_weekdays: return None
-                temp_date = from_date
-                for _ in range(8):
-                    if temp_date.weekday() in target_weekdays: return temp_date
-                    temp_date += timedelta(days=1)
-            except (ValueError, TypeError):
-                return None
-        return None
+    def __init__(self):
+        self._last = {}
+        self.applied = 0
+        self.skipped = 0
+
+    def render(self, widget, text, foreground=None):
+        key = str(widget)
+        state = (text, foreground)
+        if self._last.get(key) == state:
+            self.skipped += 1
+            return False
+        options = {"text": text}
+        if foreground is not None: options["foreground"] = foreground
+        widget.config(**options)
+        self._last[key] = state
+        self.applied += 1
+        return True
+
+    def forget(self, widget):
+        """控件被销毁前调用，清除其渲染记录."""
+        self._last.pop(str(widget), None)
+
+    def stats(self):
+        return {"applied": self.applied, "skipped": self.skipped}
 
-    def trigger(self):
-        if self.repeat_total != -1: self.times_triggered += 1
-        self.last_triggered_date = date.today()
 
-    def get_rule_text(self):
-        if self.trigger_type == "date":
-            return f"特定日期: {self.trigger_value}"
-        elif self.trigger_type == "interval":
-            return f"每 {self.trigger_value} 天"
-        elif self.trigger_type == "weekly":
-            days = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-            day_names = [days[int(d)] for d in self.trigger_value]
-            return "每周 " + "、".join(day_names)
-        return "未知规则"
+# ===================================================================
+# --- 【新增】通知发送线程 NotificationDispatcher ---
+# ===================================================================
+class NotificationDispatcher:
+    """
+    由一个常驻后台线程发送所有系统通知，取代每次提醒都新建线程.
+    - 有界队列；同一种提醒 (key) 在队列中只保留一份，重复的请求直接合并。
+    - 连发提醒每条间隔 BURST_INTERVAL 秒，且 BURST_COOLDOWN 秒内只连发一次，期间的连发请求降级为单条通知。
+    - 新的提醒到来或程序退出时立即打断正在进行的连发。
+    - plyer 不可用或发送失败时，通过 widget.after() 回到 Tk 主线程弹出对话框。
+    """
+    BURST_COUNT = 10
+    BURST_INTERVAL = 3
+    BURST_COOLDOWN = 60
+    MAX_PENDING = 8
+
+    def __init__(self, widget, app_name='Doraemon Catcher'):
+        self.widget = widget
+        self.app_name = app_name
+        self._queue = queue.Queue(maxsize=self.MAX_PENDING)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._closed = False
+        self._last_burst_time = None
+        self._thread = threading.Thread(target=self._run, name="NotificationDispatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, title, message, burst=False):
+        """提交一条提醒；已有相同 key 的提醒在排队或队列已满时返回 False."""
+        with self._lock:
+            if self._closed or key in self._pending: return False
+            try:
+                self._queue.put_nowait((key, title, message, burst))
+            except queue.Full:
+                return False
+            self._pending.add(key)
+            # 打断正在进行的连发，让新的提醒尽快发出；必须在锁内设置，
+            # 否则后台线程可能先取出这条提醒并 clear()，随后这里的 set() 会把它自己的连发打断
+            self._cancel.set()
+        return True
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._cancel.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # 线程处理完当前提醒后会检查 _closed 并退出
+
+    def _run(self):
+        while not self._closed:
+            item = self._queue.get()
+            if item is None: break
+            key, title, message, burst = item
+            with self._lock:
+                self._pending.discard(key)
+                self._cancel.clear()
+            if burst and self._last_burst_time is not None and \
+                    time.monotonic() - self._last_burst_time < self.BURST_COOLDOWN:
+                burst = False
+            if not burst:
+                self._notify(title, message)
+                continue
+            self._last_burst_time = time.monotonic()
+            for i in range(self.BURST_COUNT):
+                if not self._notify(f"{title} ({i + 1}/{self.BURST_COUNT})", message, fallback_title=title): break
+                if self._cancel.wait(self.BURST_INTERVAL) or not self._queue.empty(): break
+
+    def _notify(self, title, message, fallback_title=None):
+        """发送一条系统通知；失败时回到主线程弹窗并返回 False."""
+        notification = _plyer_notification()
+        if notification:
+            try:
+                notification.notify(title=title, message=message, app_name=self.app_name, timeout=10)
+                return True
+            except Exception as e:
+                print(f"发送通知失败: {e}")
+        self._show_fallback(fallback_title or title, message)
+        return False
+
+    def _show_fallback(self, title, message):
+        try:
+            self.widget.after(0, lambda: messagebox.showinfo(title, message, parent=self.widget))
+        except (RuntimeError, tk.TclError):
+            pass  # 主窗口已关闭
 
 
 # ===================================================================
 # --- 主程序窗口类 ---
 # ===================================================================
 class FishCatcherApp(tk.Tk):
+    PROFILED_STAGES = ("update_work_countdown", "update_event_countdown_text", "check_position_for_docking",
+                       "check_water_reminder", "check_and_trigger_events")
+
     def __init__(self):
         super().__init__()
+        # 【新增】在各回调被登记之前替换为计时版本 (未启用时 instrument 原样返回，没有开销)
+        self.stats = TickStats(enabled=PROFILE_ENABLED)
+        for name in self.PROFILED_STAGES: setattr(self, name, self.stats.instrument(name, getattr(self, name)))
+        self.lag_probe = LagProbe(self, self.stats)
         # ... (所有属性初始化保持不变) ...
         self.DOCK_SENSITIVITY = 15;
         self.DOCK_SIZE = 60;
+        self.DOCK_SETTLE_MS = 300  # 【新增】窗口停止移动这么久之后才判断是否贴边
+        self._window_geometry = None  # 【新增】最近一次 <Configure> 给出的 (x, 宽度)
+        self._screen_width = None
+        self._dock_check_id = None
         self.is_docked = False;
         self.dock_widget = None;
         self.last_pos = {};
@@ -188,94 +271,7 @@ class FishCatcherApp(tk.Tk):
         self._grace_period_timer_id = None;
         self._save_timer_id = None
         self._save_timer_id = None
-        self.last_daily_check_date = None # 【新增】记录上次每日检查的日期
-        self.random_mottos = [
- 
-
-            # =======================================================
-            # === 摸鱼 & 励志语录 (Originals) ===
-            # =======================================================
-            "加油，摸鱼人！",
-            "摸鱼是为了更好地工作。",
-            "一杯茶，一包烟，一个bug改一天。",
-            "带薪摸鱼，其乐无穷。",
-            "今日事，明日议，后日再说。",
-            "只要思想不滑坡，办法总比困难多。",
-            "种一棵树最好的时间是十年前，其次是现在。",
-            "万物皆有裂痕，那是光照进来的地方。",
-            "Talk is cheap. Show me the code.",
-            "每一个不曾起舞的日子，都是对生命的辜负。",
-            "乾坤未定，你我皆是黑马。",
-            "人生最大的荣耀不在于从不跌倒，而在于每次跌倒后都能爬起来。",
-            "慢慢来，比较快。",
-            "熬过最苦的日子，做最酷的自己。",
-            "你的日积月累，会成为别人的望尘莫及。",
-
-
-            # =======================================================
-            # === 幽默段子 & 职场智慧 (Jokes & Office Wisdom) ===
-            # =======================================================
-            "只要我装得够快，工作就追不上我。",
-            "上班是会呼吸的痛，它活在我身上所有角落。",
-            "我的爱好很广泛：躺着、趴着、侧卧、仰卧。",
-            "问：如何快速入睡？ 答：只要想象明天要上班就行了。",
-            "客户：“你们这个系统能不能加个‘一键解决所有问题’的按钮？” 我：“可以，但是点了之后会直接提交您的辞职信。”",
-            "面试官：“你的期望薪资是多少？” 我：“我的期望是不上班，还给我发钱。”",
-            "别跟我谈理想，我的理想是不上班。",
-            "我的钱包就像个洋葱，每次打开都让我泪流满面。",
-            "我不是懒，我只是对需要耗费体力的事情过敏。",
-            "只要我没道德，道德就绑架不了我。",
-            "工作是老板的，但命是自己的。",
-
-            # =======================================================
-            # === 人生态度 & 躺平哲学 (Life Attitude & Philosophy) ===
-            # =======================================================
-            "人生建议：及时行乐，爱咋咋地。",
-            "允许一切发生，生活才能开始流动。",
-            "你必须内心丰富，才能摆脱那些生活表面的相似。",
-            "关关难过关关过，前路漫漫亦灿灿。",
-            "做个俗人，贪财好色，一身正气。",
-            "间歇性踌躇满志，持续性混吃等死。",
-            "慢慢来，比较快。",
-            "能力以内，尽量周全；能力以外，顺其自然。",
-            "生活就是一边崩溃，一边自愈。",
-            "佛系人生三大原则：都行，可以，没关系。",
-            "工作是老板的，但命是自己的。",
-            "上班为了下班，下班为了不上班。",
-            "只要我没道德，道德就绑架不了我。",
-            "不是工作需要我，而是我需要这份工作。",
-            "间歇性踌躇满志，持续性混吃等死。",
-            "上班如上坟，摸鱼才是真。",
-            "只要我干得够慢，寂寞就追不上我。",
-            "万物皆有裂痕，那是光照进来的地方。",
-            "生活就是一边崩溃，一边自愈。",
-            "闭嘴，是一种修行；沉默，是一种智慧。",
-            "能力以内，尽量周全；能力以外，顺其自然。",
-
-            # =======================================================
-            # === 国内外名人名句 (Famous Quotes) ===
-            # =======================================================
-            "我们都在阴沟里，但仍有人仰望星空。 —— 奥斯卡·王尔德",
-            "世界上只有一种英雄主义，就是认清生活的真相后依然热爱它。 —— 罗曼·罗兰",
-            "Stay hungry, stay foolish. (求知若饥，虚心若愚) —— 史蒂夫·乔布斯",
-            "Talk is cheap. Show me the code. —— Linus Torvalds",
-            "你所浪费的今天，是昨天逝去的人奢望的明天。 —— 哈佛大学校训",
-            "世界上本没有路，走的人多了，也便成了路。 —— 鲁迅",
-            "人有悲欢离合，月有阴晴圆缺，此事古难全。 —— 苏轼",
-            "天才是1%的灵感加上99%的汗水。 —— 托马斯·爱迪生",
-            "The unexamined life is not worth living. (未经审视的人生不值得过) —— 苏格拉底",
-            "万物皆有裂痕，那是光照进来的地方。 —— 莱昂纳德·科恩",
-
-            # =======================================================
-            # === 程序员专属黑话 (Coder's Humor) ===
-            # =======================================================
-            "又不是不能用。",
-            "在我的电脑上是好的啊！",
-            "修复一个bug，产生三个新bug，这是宇宙的守恒定律。",
-            "为什么程序员喜欢用暗色主题？因为光是bug就够亮了。",
-            "不要动我的代码，它有自己的想法。",
-            "面向CV编程，专业代码搬运工。"
-        ]
+        self.mottos = None  # 【优化】语录库 (MottoCorpus)，首次需要时才打开
         self.motto_label = None;
         self.MOTTO_REFRESH_INTERVAL = timedelta(seconds=30);
         self.last_motto_update_time = datetime.min
@@ -289,6 +285,7 @@ class FishCatcherApp(tk.Tk):
         # 获取屏幕的尺寸
         screen_width = self.winfo_screenwidth()
         screen_height = self.winfo_screenheight()
+        self._screen_width = screen_width  # 【新增】缓存屏幕宽度，供贴边检测使用
 
         # 计算窗口居中时的左上角 x, y 坐标
         x = (screen_width // 2) - (app_width // 2)
@@ -299,6 +296,7 @@ class FishCatcherApp(tk.Tk):
         self.geometry(f'{app_width}x{app_height}+{x}+{y}')
         # --- 【修改结束】 ---
         self.style = tb.Style(theme='litera');
+        STARTUP_TRACE.mark("style")
         self.DORA_BLUE = "#00a0e8";
         self.DORA_WHITE = "#ffffff";
         self.DORA_RED = "#e60012";
@@ -312,75 +310,97 @@ class FishCatcherApp(tk.Tk):
             self.iconbitmap(ICON_PATH)
         except tk.TclError:
             print("提示：未找到 fish_icon.ico 图标文件。")
-        self.bg_image_pil = None
-        try:
-            self.bg_image_pil = Image.open(IMAGE_PATH)
-        except Exception as e:
-            print(f"警告: 加载背景图片失败: {e}")
         self.work_end_time_str = tk.StringVar();
         self.water_reminder_interval = tk.IntVar();
         self.last_reminder_time = time.time();
         self.reminder_enabled = tk.BooleanVar();
-        self.payday = tk.IntVar()
+        self.payday_rule = tk.StringVar()
+        self.settings = AppSettings()
+        self.store = open_event_store()
+        self.notifier = NotificationDispatcher(self)
         self.event_objects = []
+        self._event_manager = None
         self.load_data()
         self.event_labels = []
+        self.EVENT_PAGE_SIZE = 5  # 【新增】主界面每页显示的事件数 (标签池大小)
+        self.event_page = 0
+        self.renderer = LabelRenderer()
+        self.stats.add_counters("labels", self.renderer.stats)  # 标签实际更新/跳过的次数显示在性能统计窗口
 
         self.setup_styles()
         self.create_scrollable_area_and_widgets()
+        STARTUP_TRACE.mark("widgets")
+        self.refresh_scheduler = RefreshScheduler(self, self.stats)
+        self.setup_refresh_panels()
 
         self.work_end_time_str.trace_add("write", self.schedule_save);
         self.water_reminder_interval.trace_add("write", self.schedule_save);
         self.reminder_enabled.trace_add("write", self.schedule_save)
+        self.work_end_time_str.trace_add("write", self.on_work_end_time_changed)
+        self.water_reminder_interval.trace_add("write", self.on_reminder_settings_changed)
+        self.reminder_enabled.trace_add("write", self.on_reminder_settings_changed)
         self.bind_all("<MouseWheel>", self._on_mousewheel);
         self.bind_all("<Button-4>", self._on_mousewheel);
         self.bind_all("<Button-5>", self._on_mousewheel)
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self._first_map_id = self.bind("<Map>", self._on_first_map, add="+")
+        self.bind("<Configure>", self.on_window_configure, add="+")  # 【优化】贴边检测由窗口移动/缩放事件驱动
 
+        # 【新增】SQLite 存储用 next_date 索引每天查出当天的事件，JSON 存储把全部事件放进触发堆
+        if self.store.indexed:
+            self.trigger_scheduler = TriggerScheduler(self, self.check_and_trigger_events, self.events_on)
+            self.trigger_scheduler.rebuild()
+        else:
+            self.trigger_scheduler = TriggerScheduler(self, self.check_and_trigger_events)
+            self.trigger_scheduler.rebuild(self.event_objects)
         self.check_and_trigger_events()  # 启动时检查
         self.update_event_display()
-        self.after(10, self.update_ui)
+        self.after(10, self.refresh_scheduler.run)
+        self.lag_probe.start()
 
 
     def on_closing(self):
-        self.save_data(); self.destroy()
+        self.lag_probe.stop()
+        if PROFILE_DUMP_PATH:
+            try:
+                self.stats.dump(PROFILE_DUMP_PATH); print(f"刷新耗时统计已写入 {PROFILE_DUMP_PATH}")
+            except IOError as e:
+                print(f"写入刷新耗时统计失败: {e}")
+        # 退出前把还在防抖等待中的设置修改写进存储，再等后台线程全部落盘
+        if self._save_timer_id: self.after_cancel(self._save_timer_id); self._save_timer_id = None
+        self.save_data(settings=True)
+        if self.mottos is not None: self.mottos.close()  # 语录抽取进度是批量保存的
+        self.notifier.close(); self.store.close(); self.destroy()
 
     def load_data(self):
-        default_settings = {"payday": 10, "work_end_time": "18:00:00", "reminder_interval": 60,
-                            "reminder_enabled": True}
-        default_event_data = {"name": "元旦", "enabled": True, "start_date": f"{datetime.now().year + 1}-01-01",
-                              "last_triggered_date": None,
-                              "trigger": {"type": "date", "value": f"{datetime.now().year + 1}-01-01"},
-                              "repeat": {"total": 1, "triggered": 0}}
-        default_data = {"events": [default_event_data], "settings": default_settings}
-        if not os.path.exists(EVENTS_FILE):
-            self.data = default_data
-        else:
-            try:
-                with open(EVENTS_FILE, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-                if 'settings' not in self.data: self.data['settings'] = default_settings
-            except (json.JSONDecodeError, IOError):
-                self.data = default_data
-        loaded_settings = self.data.get('settings', default_settings)
-        self.payday.set(loaded_settings.get('payday', 10));
+        default_data = default_app_data()
+        # 【优化】由 JournaledStore 读取快照并重放未合并的修改日志
+        self.data = self.store.load(default_data)
+        loaded_settings = self.data.get('settings', default_data['settings'])
+        self.payday_rule.set(loaded_settings.get('payday_rule', loaded_settings.get('payday', 10)));
         self.work_end_time_str.set(loaded_settings.get('work_end_time', "18:00:00"));
         self.water_reminder_interval.set(loaded_settings.get('reminder_interval', 60));
         self.reminder_enabled.set(loaded_settings.get('reminder_enabled', True))
-        events_data_list = self.data.get('events', [default_event_data])
+        WORKDAY_CALENDAR.load(default_holidays_path())  # 【新增】法定节假日与调休 (发薪日规则也依赖它)
+        self.settings.load(loaded_settings)
+        events_data_list = self.data.get('events', default_data['events'])
         self.event_objects = [Event(e) for e in events_data_list]
-
-    def save_data(self):
-        self.data['events'] = [e.to_dict() for e in self.event_objects]
-        self.data['settings'] = {'payday': self.payday.get(), 'work_end_time': self.work_end_time_str.get(),
-                                 'reminder_interval': self.water_reminder_interval.get(),
-                                 'reminder_enabled': self.reminder_enabled.get()}
-        try:
-            with open(EVENTS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=4, ensure_ascii=False)
-            print(f"Settings saved at {datetime.now()}")
-        except IOError as e:
-            print(f"Error saving data: {e}")
+        self.events_by_id = {e.id: e for e in self.event_objects}  # 【新增】按稳定 ID 查找事件
+        OCCURRENCE_CACHE.invalidate()
+
+    def save_data(self, events=(), deleted=(), settings=False):
+        """【优化】只把发生变化的事件/设置追加到持久化日志，写盘由后台线程完成."""
+        for event in events: self.store.put_event(event)
+        for event in deleted: self.store.delete_event(event)
+        if settings:
+            try:
+                reminder_interval = self.water_reminder_interval.get()
+            except (ValueError, tk.TclError):
+                reminder_interval = self.data['settings'].get('reminder_interval', 60)
+            self.data['settings'] = {'payday_rule': self.payday_rule.get(), 'work_end_time': self.work_end_time_str.get(),
+                                     'reminder_interval': reminder_interval,
+                                     'reminder_enabled': self.reminder_enabled.get()}
+            self.store.put_settings(self.data['settings'])
 
     def create_scrollable_area_and_widgets(self):
         self.canvas = tk.Canvas(self, borderwidth=0, highlightthickness=0);
@@ -388,13 +408,8 @@ class FishCatcherApp(tk.Tk):
         self.canvas.pack(side="left", fill="both", expand=True);
         self.scrollbar.pack(side="right", fill="y");
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
-        if self.bg_image_pil:
-            w, h = self.bg_image_pil.size; new_w = 450; new_h = int(
-                new_w * h / w); resized_image = self.bg_image_pil.resize((new_w, new_h),
-                                                                         Image.Resampling.LANCZOS); self.bg_image_tk = ImageTk.PhotoImage(
-                resized_image); self.canvas.create_image(0, 0, image=self.bg_image_tk, anchor="nw")
-        else:
-            self.canvas.configure(bg=self.DORA_WHITE)
+        # 【优化】先以白色背景完成首帧绘制，背景图片由 load_background_image 稍后补上
+        self.canvas.configure(bg=self.DORA_WHITE)
         self.scrollable_frame = tb.Frame(self.canvas);
         self.scrollable_frame.configure(style='TFrame');
         self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw");
@@ -406,6 +421,7 @@ class FishCatcherApp(tk.Tk):
         self.time_label = tb.Label(time_frame, text="", font=self.FONT_LARGE, foreground=self.DORA_BLUE,
                                    style='Card.TLabel');
         self.time_label.pack()
+        tb.Button(time_frame, text="📆 查看月历", command=self.open_calendar, bootstyle="info-link").pack()
         work_frame = tb.LabelFrame(self.scrollable_frame, text="🏃 竹蜻蜓启动倒计时", bootstyle="info");
         work_frame.pack(fill="x", pady=10, padx=10, expand=True, ipady=5);
         work_input_frame = tb.Frame(work_frame, style='Card.TFrame');
@@ -435,6 +451,20 @@ class FishCatcherApp(tk.Tk):
             pady=5);
         self.events_display_frame = tb.Frame(event_frame, style='Card.TFrame');
         self.events_display_frame.pack(pady=5)
+        # 【优化】固定大小的标签池，只显示当前页的事件，控件数量与事件总数无关
+        self.events_empty_label = tb.Label(self.events_display_frame, text="(还没有添加未来事件哦)",
+                                           style='Motivational.TLabel')
+        self.event_labels = [tb.Label(self.events_display_frame, text="...", font=self.FONT_NORMAL,
+                                      foreground=self.DORA_BLUE, style='Card.TLabel')
+                             for _ in range(self.EVENT_PAGE_SIZE)]
+        self._visible_event_labels = 0
+        self.events_pager_frame = tb.Frame(event_frame, style='Card.TFrame');
+        tb.Button(self.events_pager_frame, text="◀ 上一页", command=lambda: self.change_event_page(-1),
+                  bootstyle="info-link").pack(side="left");
+        self.events_page_label = tb.Label(self.events_pager_frame, text="", style='Card.TLabel');
+        self.events_page_label.pack(side="left", padx=5);
+        tb.Button(self.events_pager_frame, text="更多... ▶", command=lambda: self.change_event_page(1),
+                  bootstyle="info-link").pack(side="left")
         water_frame = tb.LabelFrame(self.scrollable_frame, text="💧 铜锣烧补给站", bootstyle="info");
         water_frame.pack(fill="x", pady=10, padx=10, expand=True, ipady=5);
         water_control_frame = tb.Frame(water_frame, style='Card.TFrame');
@@ -446,115 +476,225 @@ class FishCatcherApp(tk.Tk):
                    bootstyle="info").pack(side="left");
         tb.Button(water_control_frame, text="来一个!", command=lambda: self.send_notification(force=True),
                   bootstyle="warning-outline").pack(side="right")
+        # 【新增】提醒间隔无效时在这里提示 (编辑时更新一次)，提醒暂停直到改正
+        self.water_error_label = tb.Label(water_frame, text=self.settings.reminder_interval_error or "",
+                                          foreground=self.DORA_RED, style='Card.TLabel')
+        self.water_error_label.pack(anchor="w", padx=10)
         about_frame = tb.Frame(self.scrollable_frame);
         about_frame.pack(fill="x", pady=(10, 5), padx=10)
         tb.Button(about_frame, text="关于", command=self.show_about_window, bootstyle="link").pack(side="right")
+        if self.stats.enabled:
+            tb.Button(about_frame, text="性能统计", command=lambda: ProfilerWindow(self),
+                      bootstyle="link").pack(side="right")
+
+    def _on_first_map(self, event):
+        """【新增】主窗口首次显示：先完成首帧绘制，再在空闲时解码背景图片."""
+        if event.widget is not self: return  # 子控件的 <Map> 也会传到主窗口的绑定上
+        self.unbind("<Map>", self._first_map_id)
+        self.update_idletasks()
+        STARTUP_TRACE.mark("first paint")
+        self.after(1, self.load_background_image)
+
+    def load_background_image(self):
+        """【优化】首帧之后再加载背景图片 (优先读取缩放缓存)，放在所有控件下方."""
+        try:
+            from PIL import ImageTk
+        except ImportError:
+            print("提示：未安装 Pillow (pip install Pillow)，不显示背景图片。"); return
+        try:
+            resized_image = load_background(IMAGE_PATH, 450)
+        except Exception as e:
+            print(f"警告: 加载背景图片失败: {e}"); return
+        # PhotoImage 会把像素复制给 Tk，之后不再保留任何 PIL 图像
+        self.bg_image_tk = ImageTk.PhotoImage(resized_image); resized_image.close()
+        self.canvas.tag_lower(self.canvas.create_image(0, 0, image=self.bg_image_tk, anchor="nw"))
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        STARTUP_TRACE.mark("background")
 
     def show_about_window(self):
         AboutWindow(self)
 
-    def update_ui(self):
-        if not self.is_docked:
-            now = datetime.now()
-            today = now.date()
-
-            # 【核心修改】每日九点检查逻辑
-            # 如果时间是9点以后，并且“今天”还没有执行过每日检查
-            if now.hour >= 9 and self.last_daily_check_date != today:
-                self.check_and_trigger_events()
-
-            self.date_label.config(text=now.strftime("%Y年%m月%d日 %A"))
-            self.time_label.config(text=now.strftime("%H:%M:%S"))
-            self.update_work_countdown(now)
-            self.update_event_countdown_text(now)
-            self.check_position_for_docking()
-            self.update_weekend_countdown(now)
-            self.update_payday_countdown(now)
+    def open_calendar(self):
+        CalendarWindow(self)
+
+    def setup_refresh_panels(self):
+        """【新增】登记各面板的刷新节奏：时钟与下班倒计时按秒，日期/周末/发薪/事件在零点刷新."""
+        scheduler = self.refresh_scheduler
+        scheduler.add_panel("clock", self.update_clock, next_second)
+        scheduler.add_panel("date", self.update_date_label, next_midnight)
+        scheduler.add_panel("weekend", self.update_weekend_countdown, next_midnight)
+        scheduler.add_panel("payday", self.update_payday_countdown, next_midnight)
+        scheduler.add_panel("events", self.update_event_countdown_text, next_midnight)
+        scheduler.add_panel("water", lambda now: self.check_water_reminder(), self.next_water_reminder_time, ui=False)
+
+    def update_clock(self, now):
+        self.renderer.render(self.time_label, now.strftime("%H:%M:%S"))
+        self.update_work_countdown(now)
+
+    def on_work_end_time_changed(self, *args):
+        """【新增】下班时间被编辑时解析一次；格式错误由时钟面板显示在倒计时标签上."""
+        self.settings.set_work_end_time(self.work_end_time_str.get())
+        self.refresh_scheduler.invalidate("clock")
+
+    def on_reminder_settings_changed(self, *args):
+        """【新增】喝水提醒设置被编辑时解析一次；间隔无效时立即在输入框下方提示."""
+        try:
+            minutes = self.water_reminder_interval.get()
+        except (ValueError, tk.TclError):
+            minutes = None
+        self.settings.set_reminder_interval(minutes)
+        self.renderer.render(self.water_error_label, self.settings.reminder_interval_error or "")
+        try:
+            self.settings.reminder_enabled = self.reminder_enabled.get()
+        except tk.TclError:
+            self.settings.reminder_enabled = False
+        self.refresh_scheduler.invalidate("water")
 
-        self.check_water_reminder()
-        self.after(200, self.update_ui)
+    def update_date_label(self, now):
+        self.renderer.render(self.date_label, now.strftime("%Y年%m月%d日 %A"))
 
     def check_and_trigger_events(self):
-        today = date.today()
-        triggered_events = []
-        for event in self.event_objects:
-            if not event.enabled: continue
-            next_occurrence = event.get_occurrences(1)
-            if next_occurrence and next_occurrence[0] == today:
-                if event.last_triggered_date != today:  # 确保今天没有被触发过
-                    event.trigger()
-                    triggered_events.append(event.name)
-
+        # 【优化】只处理调度器弹出的当日到期事件，不再逐个扫描 event_objects
+        triggered_events = self.trigger_scheduler.trigger_due(date.today())
         if triggered_events:
-            self.save_data()
-            messagebox.showinfo("今日事件提醒", f"今天有新事件发生啦！\n\n- " + "\n- ".join(triggered_events),
+            self.save_data(events=triggered_events)
+            messagebox.showinfo("今日事件提醒", f"今天有新事件发生啦！\n\n- " + "\n- ".join(e.name for e in triggered_events),
                                 parent=self)
             self.update_event_display()
 
-        # 【核心修改】无论是否触发事件，都标记今天已执行过检查
-        self.last_daily_check_date = today
+    def find_event(self, event_id):
+        return self.events_by_id.get(event_id)
+
+    def events_on(self, day):
+        """【新增】SQLite 存储：按 (enabled, next_date) 索引查出 day 当天发生的事件."""
+        return [self.events_by_id[i] for i in self.store.ids_on(day) if i in self.events_by_id]
+
+    def put_events(self, events):
+        """【新增】添加或更新事件 (编辑、启用/禁用、导入)；ID 相同的已有事件会被覆盖."""
+        # 同一批里 ID 重复时只保留最后一个，否则被替换掉的对象仍会进入触发堆并在触发时覆盖存储中的数据
+        events = list({event.id: event for event in events}.values())
+        for event in events:
+            existing = self.events_by_id.get(event.id)
+            if existing is None:
+                self.event_objects.append(event)
+            elif existing is not event:
+                self.trigger_scheduler.remove(existing)
+                self.event_objects[self.event_objects.index(existing)] = event
+            self.events_by_id[event.id] = event
+        OCCURRENCE_CACHE.invalidate(*events)
+        self.trigger_scheduler.reschedule(*events)
+        self.save_data(events=events)
+        self.update_event_display()  # 事件面板只在跨天时自动刷新，事件变化后要立即重绘
+
+    def remove_event(self, event):
+        """【新增】删除事件."""
+        self.event_objects.remove(event)
+        self.events_by_id.pop(event.id, None)
+        OCCURRENCE_CACHE.invalidate(event)
+        self.trigger_scheduler.remove(event)
+        self.save_data(deleted=[event])
+        self.update_event_display()
 
     def open_event_manager(self):
-        manager = EventManagerWindow(self); manager.grab_set()
+        # 已经打开时只把它提到最前，避免同时出现两个管理窗口
+        if self._event_manager is not None and self._event_manager.winfo_exists():
+            self._event_manager.lift(); self._event_manager.focus_force(); return
+        self._event_manager = EventManagerWindow(self); self._event_manager.grab_set()
+
+    # --- 【新增】单实例：处理再次启动时转发过来的命令 ---
+    INSTANCE_COMMANDS = ("show", "undock", "manager")
+
+    def handle_instance_command(self, command, request):
+        """在 InstanceGuard 的监听线程中调用：只做校验，具体操作通过 after() 交给 Tk 主线程."""
+        if command == "status": return self.instance_status(request)
+        if command not in self.INSTANCE_COMMANDS: return {"ok": False, "error": f"未知命令: {command}"}
+        self.after(0, self.run_instance_command, command)
+        return {"ok": True}
+
+    def instance_status(self, request):
+        """【新增】命令行 status 查询：在 Tk 主线程上用内存中的最新数据计算，监听线程最多等待 2 秒."""
+        try:
+            limit = max(0, int(request.get("limit", 3)))
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "limit 必须是整数"}
+        result, done = {}, threading.Event()
+
+        def compute():
+            result["status"] = app_status(self.settings, self.event_objects, limit=limit); done.set()
+
+        self.after(0, compute)
+        if not done.wait(2): return {"ok": False, "error": "主界面没有响应"}
+        return {"ok": True, "status": result["status"]}
+
+    def run_instance_command(self, command):
+        if command == "undock":
+            self.undock_app(); return
+        self.show_window()
+        if command == "manager": self.open_event_manager()
+
+    def show_window(self):
+        """把主窗口带到最前：贴边隐藏时先恢复，最小化时还原."""
+        if self.is_docked: self.undock_app(); return
+        self.deiconify(); self.lift(); self.focus_force()
 
     def update_event_display(self):
-        for widget in self.events_display_frame.winfo_children(): widget.destroy()
-        self.event_labels.clear()
+        """事件列表变化后调用：不再重建控件，只让事件面板在下一轮用标签池重新渲染."""
+        self.refresh_scheduler.invalidate("events")
 
-        # 【修复1】获取当前日期
-        today = date.today()
-        # 【修复2】将 today 传递给 _calculate_next
-        enabled_events = sorted([e for e in self.event_objects if e.enabled],
-                                key=lambda x: (x._calculate_next(today) or date.max))
+    def change_event_page(self, step):
+        """【新增】主界面事件翻页."""
+        self.event_page += step
+        self.refresh_scheduler.invalidate("events")
 
-        if not enabled_events:
-            tb.Label(self.events_display_frame, text="(还没有添加未来事件哦)", style='Motivational.TLabel').pack()
-        else:
-            for event in enabled_events:
-                label = tb.Label(self.events_display_frame, text="...", font=self.FONT_NORMAL,
-                                 foreground=self.DORA_BLUE, style='Card.TLabel')
-                label.pack()
-                self.event_labels.append(label)
+    def _show_event_labels(self, count):
+        """让标签池中的前 count 个标签可见 (可见的标签总是前缀，按顺序 pack 即可保持次序)."""
+        if count == self._visible_event_labels: return
+        for label in self.event_labels[count:self._visible_event_labels]: label.pack_forget()
+        for label in self.event_labels[self._visible_event_labels:count]: label.pack()
+        self._visible_event_labels = count
 
     def update_event_countdown_text(self, now):
         today = now.date()
-        # 【核心修改】排序逻辑与 update_event_display 保持一致
-        enabled_events = sorted([e for e in self.event_objects if e.enabled],
-                                key=lambda x: (x._calculate_next(today) or date.max))
+        size = self.EVENT_PAGE_SIZE
+        if self.store.indexed:
+            # 【新增】SQLite 存储：总数与当前页都走 (enabled, next_date) 索引查询，不对全部事件排序
+            total = self.store.count_enabled(today)
+        else:
+            # 【核心修改】排序结果由 OCCURRENCE_CACHE 按天缓存，翻页只是切片
+            enabled_events = OCCURRENCE_CACHE.upcoming(self.event_objects, today)
+            total = len(enabled_events)
+        page_count = max(1, math.ceil(total / size))
+        self.event_page = min(max(self.event_page, 0), page_count - 1)
+        start = self.event_page * size
+        if self.store.indexed:
+            page_events = [self.events_by_id[i] for i in self.store.upcoming_ids(today, size, start)
+                           if i in self.events_by_id]
+        else:
+            page_events = enabled_events[start:start + size]
 
-        if len(self.event_labels) != len(enabled_events):
-            self.update_event_display()
-            # 在某些情况下（如事件被禁用后），需要重新获取排序后的列表
-            enabled_events = sorted([e for e in self.event_objects if e.enabled],
-                                    key=lambda x: (x._calculate_next(today) or date.max))
-
-        for i, event in enumerate(enabled_events):
-            if i >= len(self.event_labels): continue
-
-            # 【核心修改】直接使用 _calculate_next 获取当前或未来的下一次发生日期，用于显示
-            # 这会忽略事件今天是否已被触发，确保今日事件全天显示
-            next_occurrence = event._calculate_next(today)
-
-            if not next_occurrence:
-                # 检查事件是否是因为今天刚刚发生才“结束”的
-                if event.last_triggered_date == today:
-                    # 如果是，那么全天都应该显示为“今天”
-                    text = f"🎉 今天就是 {event.name}！"
-                    self.event_labels[i].config(text=text, foreground=self.DORA_RED)
-                else:
-                    # 否则，事件是真的已经结束了（比如过期的单次事件）
-                    text = f"{event.name} (已结束)"
-                    self.event_labels[i].config(text=text, foreground="gray")
-                continue # 处理完后，跳到下一个事件
-
-            days = (next_occurrence - today).days
-            if days == 0:
-                text = f"🎉 今天就是 {event.name}！"
+        if total:
+            self.events_empty_label.pack_forget()
+        else:
+            self.events_empty_label.pack()
+        self._show_event_labels(len(page_events))
+        if page_count > 1:
+            self.renderer.render(self.events_page_label, f"{self.event_page + 1}/{page_count}")
+            self.events_pager_frame.pack(pady=(0, 5))
+        else:
+            self.events_pager_frame.pack_forget()
+
+        for i, event in enumerate(page_events):
+            # 【核心修改】倒计时由 fish_core.event_countdown 计算，今日事件全天显示
+            state, days = event_countdown(event, today)
+            if state == "today":
+                self.renderer.render(self.event_labels[i], f"🎉 今天就是 {event.name}！", self.DORA_RED)
+            elif state == "ended":
+                # 事件是真的已经结束了（比如过期的单次事件）
+                self.renderer.render(self.event_labels[i], f"{event.name} (已结束)", "gray")
             else:
-                text = f"距离 {event.name} 还有 {days} 天"
-
-            # 3天内发生的事件用红色突出显示
-            self.event_labels[i].config(text=text, foreground=self.DORA_RED if days <= 3 else self.DORA_BLUE)
+                # 3天内发生的事件用红色突出显示
+                self.renderer.render(self.event_labels[i], f"距离 {event.name} 还有 {days} 天",
+                                     self.DORA_RED if days <= 3 else self.DORA_BLUE)
 
     # --- (其他所有旧方法保持不变) ---
     def setup_styles(self):
@@ -571,45 +711,62 @@ class FishCatcherApp(tk.Tk):
 
     def schedule_save(self, *args):
         if self._save_timer_id: self.after_cancel(self._save_timer_id)
-        self._save_timer_id = self.after(500, self.save_data)
+        self._save_timer_id = self.after(500, lambda: self.save_data(settings=True))
 
     def set_payday(self):
-        new_day = simpledialog.askinteger("设置发薪日", "请输入您的发薪日是每月的几号 (1-31):", parent=self, minvalue=1,
-                                          maxvalue=31, initialvalue=self.payday.get())
-        if new_day is not None: self.payday.set(new_day); self.save_data(); messagebox.showinfo("成功",
-                                                                                                f"发薪日已设置为每月 {new_day} 号！"); self.update_payday_countdown(
-            datetime.now())
+        # 【核心修改】支持多个发薪日、月末/月末工作日以及遇休息日提前/顺延
+        new_rule = simpledialog.askstring("设置发薪日", "请输入发薪日规则，多个发薪日用逗号分隔:\n"
+                                                    "  10 = 每月10号 (小月取月末)    末 = 每月最后一天\n"
+                                                    "  末工作日 = 每月最后一个工作日\n"
+                                                    "  加 前/后 = 遇休息日提前/顺延，如 10前, 25前",
+                                          parent=self, initialvalue=self.payday_rule.get())
+        if new_rule is None: return
+        if not self.settings.set_payday(new_rule): messagebox.showerror("错误", self.settings.payday_error,
+                                                                        parent=self); return
+        self.payday_rule.set(self.settings.payday.rule_text); self.save_data(settings=True)
+        next_payout = self.settings.payday.next_payout(date.today())
+        messagebox.showinfo("成功", f"发薪日已设置为 {self.settings.payday.rule_text}，下次发薪: {next_payout}")
+        self.refresh_scheduler.invalidate("payday")
 
     def update_weekend_countdown(self, now):
-        weekday = now.weekday()
-        if weekday < 5:
-            self.weekend_countdown_label.config(text=f"距离周末还有 {5 - weekday} 天", foreground=self.DORA_BLUE)
-        elif weekday == 5:
-            self.weekend_countdown_label.config(text="🎉 周末来啦！好好放松！", foreground=self.DORA_RED)
+        # 【核心修改】按工作日历计算：调休的周末算上班日，法定节假日算休息日
+        state, days_left = weekend_countdown(now.date())
+        if state == "workday":
+            self.renderer.render(self.weekend_countdown_label, f"距离周末还有 {days_left} 天", self.DORA_BLUE)
+        elif state == "rest":
+            text = "🎉 周末来啦！好好放松！" if now.weekday() >= 5 else "🎉 放假啦！好好放松！"
+            self.renderer.render(self.weekend_countdown_label, text, self.DORA_RED)
         else:
-            self.weekend_countdown_label.config(text="🎉 明天又是新的一周啦！", foreground=self.DORA_RED)
+            self.renderer.render(self.weekend_countdown_label, "🎉 明天又是新的一周啦！", self.DORA_RED)
 
     def update_payday_countdown(self, now):
-        payday_num = self.payday.get();
-        today_num = now.day
-        if today_num == payday_num: self.payday_countdown_label.config(text="🎉 今天发粮！财富到账！",
-                                                                       foreground=self.DORA_RED); return
-        if today_num < payday_num:
-            days_left = payday_num - today_num
-        else:
-            days_in_month = calendar.monthrange(now.year, now.month)[1]; days_left = (
-                                                                                                 days_in_month - today_num) + payday_num
-        self.payday_countdown_label.config(text=f"距离发粮还有 {days_left} 天", foreground=self.DORA_BLUE)
+        days_left = self.settings.payday.days_until(now.date())  # 【优化】每天预算好的发薪日期表中直接查找
+        if days_left == 0: self.renderer.render(self.payday_countdown_label, "🎉 今天发粮！财富到账！",
+                                                self.DORA_RED); return
+        self.renderer.render(self.payday_countdown_label, f"距离发粮还有 {days_left} 天", self.DORA_BLUE)
+
+    def screen_width(self, refresh=False):
+        """【新增】缓存的屏幕宽度；只在停靠、取消停靠等少数时刻重新查询."""
+        if refresh or self._screen_width is None: self._screen_width = self.winfo_screenwidth()
+        return self._screen_width
+
+    def on_window_configure(self, event):
+        """【新增】主窗口移动或缩放时记录位置 (来自事件本身，无需 winfo 查询)，停稳后再做贴边检测."""
+        if event.widget is not self or self.is_docked: return  # 子控件的 <Configure> 也会传到这里
+        self._window_geometry = (event.x, event.width)
+        if self._dock_check_id: self.after_cancel(self._dock_check_id)
+        self._dock_check_id = self.after(self.DOCK_SETTLE_MS, self.check_position_for_docking)
 
     def check_position_for_docking(self):
-        if self.in_grace_period or self.state() == 'iconic': return
-        screen_w = self.winfo_screenwidth();
-        win_x = self.winfo_x();
-        win_w = self.winfo_width()
+        self._dock_check_id = None
+        if self.in_grace_period or self.is_docked or self._window_geometry is None: return
+        win_x, win_w = self._window_geometry
         if win_x < self.DOCK_SENSITIVITY:
-            self.dock_app("left")
-        elif win_x + win_w > screen_w - self.DOCK_SENSITIVITY:
-            self.dock_app("right")
+            if self.state() != 'iconic': self.dock_app("left")
+        elif win_x + win_w > self.screen_width() - self.DOCK_SENSITIVITY:
+            # 可能换了分辨率：确认一次最新的屏幕宽度
+            if win_x + win_w > self.screen_width(refresh=True) - self.DOCK_SENSITIVITY and self.state() != 'iconic':
+                self.dock_app("right")
 
     def dock_app(self, edge):
         if self.is_docked: return
@@ -618,6 +775,7 @@ class FishCatcherApp(tk.Tk):
         self.is_docked = True;
         self.last_pos = {'x': self.winfo_x(), 'y': self.winfo_y()};
         self.withdraw();
+        self.refresh_scheduler.pause_ui();
         self.create_dock_widget(edge)
 
     def create_dock_widget(self, edge):
@@ -634,7 +792,7 @@ class FishCatcherApp(tk.Tk):
                            outline=self.DORA_WHITE, width=2);
         canvas.create_text(self.DOCK_SIZE / 2, self.DOCK_SIZE / 2, text="🐟", font=("Segoe UI Emoji", 20),
                            fill=self.DORA_WHITE)
-        screen_w = self.winfo_screenwidth();
+        screen_w = self.screen_width(refresh=True);
         y_pos = max(0, self.last_pos['y']);
         x_pos = 0 if edge == "left" else screen_w - self.DOCK_SIZE;
         self.dock_widget.geometry(f'{self.DOCK_SIZE}x{self.DOCK_SIZE}+{x_pos}+{y_pos}')
@@ -646,6 +804,7 @@ class FishCatcherApp(tk.Tk):
         if not self.is_docked: return
         if self.dock_widget: self.dock_widget.destroy(); self.dock_widget = None
         self.is_docked = False;
+        self.refresh_scheduler.resume_ui();
         self.deiconify();
         self.lift();
         self.focus_force();
@@ -662,7 +821,7 @@ class FishCatcherApp(tk.Tk):
         y = self.dock_widget.winfo_y() - self._drag_start_y + event.y;
         self.dock_widget.geometry(f"+{x}+{y}");
         self.last_pos = {'x': x, 'y': y}
-        screen_w = self.winfo_screenwidth()
+        screen_w = self.screen_width()
         if x > self.DOCK_SENSITIVITY and x < screen_w - self.DOCK_SIZE - self.DOCK_SENSITIVITY: self.undock_app()
 
     def undock_app_on_release(self, event):
@@ -670,73 +829,56 @@ class FishCatcherApp(tk.Tk):
             10000, self.end_grace_period)
 
     def end_grace_period(self):
+        # 宽限期内窗口没动过也要检查一次：此时用的是 <Configure> 记下的最后位置
         self.in_grace_period = False; self._grace_period_timer_id = None; self.check_position_for_docking()
 
     def update_work_countdown(self, now):
         motivational_messages = {9: "装上竹蜻蜓，出发！ (ง •̀_•́)ง", 14: "记忆面包有点吃撑了...想睡觉...",
                                  16: "坚持住，任意门就在眼前啦！", 17: "太棒了！下班去吃铜锣烧！ ✨"}
-        try:
-            end_time_str = self.work_end_time_str.get();
-            today_end_time = datetime.strptime(f"{now.strftime('%Y-%m-%d')} {end_time_str}", "%Y-%m-%d %H:%M:%S")
-            if now > today_end_time: self.work_countdown_label.config(
-                text="🎉 任意门已开启！ 🎉"); self.motto_label.config(text="下班啦！好好休息！"); return
-            delta = today_end_time - now;
-            h, rem = divmod(delta.seconds, 3600);
-            m, s = divmod(rem, 60);
-            self.work_countdown_label.config(text=f"{h:02d}:{m:02d}:{s:02d}")
-            special_message_found = False
-            for trigger_hour, message in motivational_messages.items():
-                if now.hour == trigger_hour and 0 <= now.minute < 10: self.motto_label.config(
-                    text=message); special_message_found = True; break
-            if not special_message_found:
-                if (now - self.last_motto_update_time) > self.MOTTO_REFRESH_INTERVAL: self.motto_label.config(
-                    text=random.choice(self.random_mottos)); self.last_motto_update_time = now
-        except (ValueError, tk.TclError):
-            self.work_countdown_label.config(text="时间格式不对哦~"); self.motto_label.config(
-                text="请检查下班时间格式 (HH:MM:SS)")
+        if not WORKDAY_CALENDAR.is_workday(now.date()):  # 【新增】休息日 (含法定节假日) 不倒计时
+            self.renderer.render(self.work_countdown_label, "🎉 今天休息！ 🎉"); self.renderer.render(
+                self.motto_label, "今天不用上班，好好休息！"); return
+        # 【优化】下班时间已在编辑时解析好，这里只取当天的截止时间
+        today_end_time = self.settings.work_end_deadline(now.date())
+        if today_end_time is None:
+            self.renderer.render(self.work_countdown_label, "时间格式不对哦~"); self.renderer.render(
+                self.motto_label, self.settings.work_end_time_error); return
+        remaining = work_countdown(now, today_end_time)
+        if remaining is None: self.renderer.render(self.work_countdown_label,
+                                                   "🎉 任意门已开启！ 🎉"); self.renderer.render(
+            self.motto_label, "下班啦！好好休息！"); return
+        h, m, s = remaining
+        self.renderer.render(self.work_countdown_label, f"{h:02d}:{m:02d}:{s:02d}")
+        special_message_found = False
+        for trigger_hour, message in motivational_messages.items():
+            if now.hour == trigger_hour and 0 <= now.minute < 10: self.renderer.render(
+                self.motto_label, message); special_message_found = True; break
+        if not special_message_found:
+            if (now - self.last_motto_update_time) > self.MOTTO_REFRESH_INTERVAL: self.renderer.render(
+                self.motto_label, self.next_motto()); self.last_motto_update_time = now
+
+    def next_motto(self):
+        """【新增】从语录库按洗牌袋顺序取下一条 (一轮之内不重复)."""
+        if self.mottos is None: self.mottos = MottoCorpus(MOTTOS_PATH)
+        return self.mottos.next()
+
+    def next_water_reminder_time(self, now):
+        """【新增】下一次喝水提醒的时间；未开启或间隔无效时返回 None (不需要唤醒)."""
+        next_time = self.settings.next_reminder_time(self.last_reminder_time)
+        return datetime.fromtimestamp(next_time) if next_time is not None else None
 
     def check_water_reminder(self):
-        if not self.reminder_enabled.get(): return
-        try:
-            interval_minutes = self.water_reminder_interval.get()
-            if interval_minutes <= 0: return
-            interval_seconds = interval_minutes * 60
-        except (ValueError, tk.TclError):
-            return
-        if (
-                time.time() - self.last_reminder_time) > interval_seconds: self.last_reminder_time = time.time(); self.send_notification(
-            is_burst=True)
+        next_time = self.settings.next_reminder_time(self.last_reminder_time)
+        if next_time is not None and time.time() >= next_time:
+            self.last_reminder_time = time.time(); self.send_notification(is_burst=True)
 
     def send_notification(self, force=False, is_burst=False):
         if force:
-            try:
-                if self.water_reminder_interval.get() <= 0: messagebox.showwarning("输入无效", "提醒间隔必须大于0分钟！",
-                                                                                   parent=self); return
-            except (ValueError, tk.TclError):
-                messagebox.showwarning("输入无效", "提醒间隔必须是有效的数字！", parent=self); return
             self.last_reminder_time = time.time()
+            self.refresh_scheduler.invalidate("water")
 
-        def _send():
-            title = '百宝袋提醒您';
-            message = '是时候补充一个铜锣烧啦！(起来喝水~)'
-            if is_burst and notification:
-                for i in range(10):
-                    try:
-                        notification.notify(title=f"{title} ({i + 1}/10)", message=message, app_name='Doraemon Catcher',
-                                            timeout=10)
-                    except Exception as e:
-                        print(f"发送通知失败: {e}"); messagebox.showinfo(title, message); break
-                    time.sleep(3)
-            else:
-                try:
-                    if notification:
-                        notification.notify(title=title, message=message, app_name='Doraemon Catcher', timeout=10)
-                    else:
-                        messagebox.showinfo(title, message)
-                except Exception as e:
-                    print(f"发送通知失败: {e}"); messagebox.showinfo(title, message)
-
-        threading.Thread(target=_send, daemon=True).start()
+        # 【优化】交给常驻的通知线程：重复提醒会被合并，新的提醒会打断正在进行的连发
+        self.notifier.submit("water", '百宝袋提醒您', '是时候补充一个铜锣烧啦！(起来喝水~)', burst=is_burst)
 
     def _on_mousewheel(self, event):
         if self.is_docked: return
@@ -758,6 +900,7 @@ class EventManagerWindow(tk.Toplevel):
         self.title("事件管理");
         self.geometry("650x450");
         self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)  # 点窗口的 X 关闭时同样刷新主界面
 
         frame = tb.Frame(self, padding="10");
         frame.pack(expand=True, fill="both")
@@ -783,97 +926,143 @@ class EventManagerWindow(tk.Toplevel):
 
         bottom_frame = tb.Frame(frame, padding=(0, 10, 0, 0));
         bottom_frame.pack(side="bottom", fill="x")
+        tb.Button(bottom_frame, text="导入...", command=self.import_events, bootstyle="info-outline").pack(side="left",
+                                                                                                        padx=5)
+        tb.Button(bottom_frame, text="导出...", command=self.export_events, bootstyle="info-outline").pack(side="left",
+                                                                                                        padx=5)
+        self.progress_label = tb.Label(bottom_frame, text="", bootstyle="secondary")
+        self.progress_label.pack(side="left", padx=5)
         tb.Button(bottom_frame, text="关闭", command=self.on_close, bootstyle="primary").pack(side="right")
 
         # 【核心修改】绑定选择事件，以实时更新按钮状态
         self.tree.bind("<<TreeviewSelect>>", self.update_toggle_button_state)
 
-        self.populate_tree()
-
-    def populate_tree(self):
-        # 保存当前选中的项
-        selected_iid = self.tree.focus()
-
-        for i in self.tree.get_children(): self.tree.delete(i)
-        for idx, event in enumerate(self.parent.event_objects):
-            occurrences = event.get_occurrences(2)
-            next_dates_str = "、".join([d.strftime("%y-%m-%d") for d in occurrences]) if occurrences else "N/A"
-            remaining = "∞" if event.repeat_total == -1 else max(0, event.repeat_total - event.times_triggered)
-
-            tag = "enabled" if event.enabled else "disabled"
-            self.tree.insert("", "end", iid=idx, values=(
-                "✔" if event.enabled else "✘", event.name, event.get_rule_text(), next_dates_str, remaining
-            ), tags=(tag,))
-
         self.tree.tag_configure("enabled", foreground="black")
         self.tree.tag_configure("disabled", foreground="gray")
+        self._rendered_rows = {}  # 【新增】事件 ID -> 上次写入表格的 (values, tag)
+        self.populate_tree()
 
-        # 恢复选中状态
-        if selected_iid and self.tree.exists(selected_iid):
-            self.tree.selection_set(selected_iid)
-            self.tree.focus(selected_iid)
+    @staticmethod
+    def _row_for(event):
+        occurrences = event.get_occurrences(2)
+        next_dates_str = "、".join([d.strftime("%y-%m-%d") for d in occurrences]) if occurrences else "N/A"
+        remaining = "∞" if event.repeat_total == -1 else max(0, event.repeat_total - event.times_triggered)
+        values = ("✔" if event.enabled else "✘", event.name, event.get_rule_text(), next_dates_str, remaining)
+        return values, "enabled" if event.enabled else "disabled"
 
+    def populate_tree(self):
+        """打开窗口时填充全部行；之后的增删改都通过 refresh_rows / remove_row 做行级更新."""
+        self.refresh_rows(self.parent.event_objects)
+
+    def refresh_rows(self, events):
+        """【优化】以事件 ID 作为 iid，只为传入的 (发生变化的) 事件计算显示内容并插入或更新对应行."""
+        for event in events:
+            row = self._row_for(event)
+            if event.id not in self._rendered_rows:
+                self.tree.insert("", "end", iid=event.id, values=row[0], tags=(row[1],))
+            elif self._rendered_rows[event.id] != row:
+                self.tree.item(event.id, values=row[0], tags=(row[1],))
+            self._rendered_rows[event.id] = row
         self.update_toggle_button_state()  # 刷新后也更新一次按钮状态
 
+    def remove_row(self, event):
+        if self._rendered_rows.pop(event.id, None) is not None: self.tree.delete(event.id)
+        self.update_toggle_button_state()
+
+    def selected_event(self):
+        selected_iid = self.tree.focus()
+        return self.parent.find_event(selected_iid) if selected_iid else None
+
     def update_toggle_button_state(self, event=None):
         """【新增】根据当前选择项更新按钮颜色"""
-        selected_iid = self.tree.focus()
-        if not selected_iid:
+        event_obj = self.selected_event()
+        if not event_obj:
             self.toggle_button.config(bootstyle="secondary")  # 未选中时为灰色
             return
 
-        idx = int(selected_iid)
-        if idx < len(self.parent.event_objects):
-            event_obj = self.parent.event_objects[idx]
-            if event_obj.enabled:
-                self.toggle_button.config(bootstyle="success")  # 启用时为绿色
-            else:
-                self.toggle_button.config(bootstyle="secondary")  # 禁用时为灰色
+        if event_obj.enabled:
+            self.toggle_button.config(bootstyle="success")  # 启用时为绿色
+        else:
+            self.toggle_button.config(bootstyle="secondary")  # 禁用时为灰色
 
     def add_event(self):
         EventEditorWindow(self, callback=self.on_event_saved)
 
     def edit_event(self, event_info=None):
-        selected_iid = self.tree.focus()
-        if not selected_iid: messagebox.showwarning("提示", "请先选择一个事件进行编辑。", parent=self); return
-        idx = int(selected_iid);
-        event_obj = self.parent.event_objects[idx]
-        EventEditorWindow(self, event_to_edit=event_obj, index=idx, callback=self.on_event_saved)
-
-    def on_event_saved(self, event_obj, index):
-        if index is None:
-            self.parent.event_objects.append(event_obj)
-        else:
-            self.parent.event_objects[index] = event_obj
-        self.populate_tree()
+        event_obj = self.selected_event()
+        if not event_obj: messagebox.showwarning("提示", "请先选择一个事件进行编辑。", parent=self); return
+        EventEditorWindow(self, event_to_edit=event_obj, callback=self.on_event_saved)
+
+    def on_event_saved(self, event_obj):
+        self.parent.put_events([event_obj])
+        self.refresh_rows([event_obj])
 
     def delete_event(self):
-        selected_iid = self.tree.focus()
-        if not selected_iid: messagebox.showwarning("提示", "请先选择一个要删除的事件。", parent=self); return
+        event_obj = self.selected_event()
+        if not event_obj: messagebox.showwarning("提示", "请先选择一个要删除的事件。", parent=self); return
         if messagebox.askyesno("确认删除", "确定要删除选中的事件吗？此操作无法撤销。", parent=self):
-            del self.parent.event_objects[int(selected_iid)];
-            self.populate_tree()
+            self.parent.remove_event(event_obj)
+            self.remove_row(event_obj)
 
     def toggle_event_enabled(self):
-        selected_iid = self.tree.focus()
-        if not selected_iid: messagebox.showwarning("提示", "请先选择一个要切换状态的事件。", parent=self); return
-        idx = int(selected_iid)
-        self.parent.event_objects[idx].enabled = not self.parent.event_objects[idx].enabled
-        self.populate_tree()
+        event_obj = self.selected_event()
+        if not event_obj: messagebox.showwarning("提示", "请先选择一个要切换状态的事件。", parent=self); return
+        event_obj.enabled = not event_obj.enabled
+        self.parent.put_events([event_obj])
+        self.refresh_rows([event_obj])
+
+    def import_events(self):
+        """【新增】从 .ics / CSV 文件批量导入事件，每次 after() 只提交一批，导入期间窗口保持响应."""
+        path = filedialog.askopenfilename(parent=self, title="导入事件", filetypes=[
+            ("日历/表格文件", "*.ics *.csv"), ("iCalendar 日历", "*.ics"), ("CSV 表格", "*.csv")])
+        if not path: return
+        stats = {}
+        steps = import_events_from_file(path, self._commit_import_batch, stats=stats,
+                                        progress=lambda n: self.progress_label.config(text=f"已导入 {n} 个事件..."))
+        self._import_step(steps, stats)
+
+    def _commit_import_batch(self, events):
+        self.parent.put_events(events)
+        self.refresh_rows(events)
+
+    def _import_step(self, steps, stats):
+        try:
+            if next(steps, None) is not None:
+                self.after(1, self._import_step, steps, stats)
+                return
+        except (IOError, UnicodeDecodeError, csv.Error) as e:
+            messagebox.showerror("导入失败", f"读取文件出错: {e}", parent=self)
+        self.progress_label.config(text="")
+        message = f"成功导入 {stats.get('imported', 0)} 个事件。"
+        if stats.get("skipped"): message += f"\n跳过 {stats['skipped']} 条无法识别的记录。"
+        messagebox.showinfo("导入完成", message, parent=self)
+
+    def export_events(self):
+        """【新增】把全部事件导出为 .ics 或 CSV 文件."""
+        path = filedialog.asksaveasfilename(parent=self, title="导出事件", defaultextension=".ics", filetypes=[
+            ("iCalendar 日历", "*.ics"), ("CSV 表格", "*.csv")])
+        if not path: return
+        stats = {}
+        try:
+            export_events(self.parent.event_objects, path, stats=stats)
+        except IOError as e:
+            messagebox.showerror("导出失败", f"写入文件出错: {e}", parent=self); return
+        message = f"已导出 {stats['exported']} 个事件。"
+        if stats["skipped"]: message += f"\n跳过 {stats['skipped']} 个规则无法识别的事件。"
+        messagebox.showinfo("导出完成", message, parent=self)
 
     def on_close(self):
-        self.parent.save_data(); self.parent.update_event_display(); self.destroy()
+        self.parent.update_event_display(); self.destroy()
 
 
 # ===================================================================
 # --- 【重大升级 V5.0】事件编辑器窗口 EventEditorWindow ---
 # ===================================================================
 class EventEditorWindow(tk.Toplevel):
-    def __init__(self, parent, event_to_edit=None, index=None, callback=None):
+    def __init__(self, parent, event_to_edit=None, callback=None):
         super().__init__(parent)
         self.parent = parent;
         self.event_to_edit = event_to_edit;
-        self.index = index;
         self.callback = callback
         self.title("添加/编辑事件");
         self.geometry("450x500");
@@ -937,8 +1126,13 @@ class EventEditorWindow(tk.Toplevel):
         self.weekly_frame = tb.Frame(self.options_frame);
         self.weekday_vars = [tk.BooleanVar() for _ in range(7)];
         days = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"];
-        for i, day in enumerate(days): tb.Checkbutton(self.weekly_frame, text=day, variable=self.weekday_vars[i],
+        weekday_row = tb.Frame(self.weekly_frame);
+        weekday_row.pack(fill="x")
+        for i, day in enumerate(days): tb.Checkbutton(weekday_row, text=day, variable=self.weekday_vars[i],
                                                       bootstyle="info").pack(side="left", padx=2, expand=True)
+        self.workdays_only_var = tk.BooleanVar();  # 【新增】跳过法定节假日
+        tb.Checkbutton(self.weekly_frame, text="仅工作日 (跳过法定节假日)", variable=self.workdays_only_var,
+                       bootstyle="info").pack(anchor="w", pady=(5, 0))
 
     def _on_type_change(self, event=None):
         self.date_frame.pack_forget();
@@ -978,6 +1172,7 @@ class EventEditorWindow(tk.Toplevel):
         elif e.trigger_type == "weekly":
             for i, var in enumerate(self.weekday_vars):
                 if str(i) in e.trigger_value: var.set(True)
+            self.workdays_only_var.set(e.workdays_only)
         self._on_type_change()
 
     def save_event(self):
@@ -1002,6 +1197,7 @@ class EventEditorWindow(tk.Toplevel):
 
         repeat_total = -1 if self.infinite_var.get() else self.repeat_var.get()
         start_date = self.start_date_var.get()
+        workdays_only = trigger_type == "weekly" and self.workdays_only_var.get()
 
         if self.event_to_edit:
             self.event_to_edit.name = name;
@@ -1009,13 +1205,153 @@ class EventEditorWindow(tk.Toplevel):
             self.event_to_edit.start_date = datetime.strptime(start_date, "%Y-%m-%d").date();
             self.event_to_edit.trigger_type = trigger_type;
             self.event_to_edit.trigger_value = trigger_value;
+            self.event_to_edit.workdays_only = workdays_only;
             self.event_to_edit.repeat_total = repeat_total
-            if self.callback: self.callback(self.event_to_edit, self.index)
+            OCCURRENCE_CACHE.invalidate(self.event_to_edit)
+            if self.callback: self.callback(self.event_to_edit)
         else:
             event_data = {"name": name, "enabled": self.enabled_var.get(), "start_date": start_date,
-                          "trigger": {"type": trigger_type, "value": trigger_value},
+                          "trigger": {"type": trigger_type, "value": trigger_value, "workdays_only": workdays_only},
                           "repeat": {"total": repeat_total, "triggered": 0}, "last_triggered_date": None}
-            if self.callback: self.callback(Event(event_data), None)
+            if self.callback: self.callback(Event(event_data))
+        self.destroy()
+
+
+# ===================================================================
+# --- 【新增】月历窗口 CalendarWindow ---
+# ===================================================================
+class CalendarWindow(tk.Toplevel):
+    """按月显示每天的事件；数据来自 OCCURRENCE_INDEX，翻页只是索引查找，网格标签只创建一次."""
+    MAX_NAMES_PER_CELL = 2
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.title("事件月历");
+        self.geometry("600x500");
+        self.resizable(False, False);
+        self.transient(parent)
+        today = date.today()
+        self.year, self.month = today.year, today.month
+
+        frame = tb.Frame(self, padding=10);
+        frame.pack(fill="both", expand=True)
+        header = tb.Frame(frame);
+        header.pack(fill="x")
+        tb.Button(header, text="◀", command=lambda: self.change_month(-1), bootstyle="info-outline", width=3).pack(
+            side="left")
+        tb.Button(header, text="今天", command=self.go_today, bootstyle="info-link").pack(side="left", padx=5)
+        tb.Button(header, text="▶", command=lambda: self.change_month(1), bootstyle="info-outline", width=3).pack(
+            side="right")
+        self.month_label = tb.Label(header, text="", font=("Microsoft YaHei UI", 14, "bold"), bootstyle="info")
+        self.month_label.pack()
+
+        grid = tb.Frame(frame);
+        grid.pack(fill="both", expand=True, pady=10)
+        for col, name in enumerate(["周一", "周二", "周三", "周四", "周五", "周六", "周日"]):
+            tb.Label(grid, text=name, anchor="center", bootstyle="secondary").grid(row=0, column=col, sticky="ew")
+            grid.columnconfigure(col, weight=1, uniform="day")
+        self.cells = []
+        self.cell_dates = [None] * 42
+        for i in range(42):
+            cell = tb.Label(grid, text="", anchor="nw", justify="left", wraplength=75, padding=3, relief="solid",
+                            borderwidth=1)
+            cell.grid(row=i // 7 + 1, column=i % 7, sticky="nsew", padx=1, pady=1)
+            cell.bind("<Button-1>", lambda e, index=i: self.show_day(index))
+            self.cells.append(cell)
+        for row in range(1, 7): grid.rowconfigure(row, weight=1, uniform="week")
+
+        self.detail_label = tb.Label(frame, text="点击日期查看当天的全部事件", wraplength=560, justify="left",
+                                     bootstyle="secondary")
+        self.detail_label.pack(fill="x")
+        self.render_month()
+
+    def _month_index(self):
+        return OCCURRENCE_INDEX.month(self.parent.event_objects, self.year, self.month)
+
+    def render_month(self):
+        self.month_label.config(text=f"{self.year}年{self.month}月")
+        weeks = calendar.monthcalendar(self.year, self.month)
+        by_day = self._month_index()
+        today = date.today()
+        for i, cell in enumerate(self.cells):
+            week, col = divmod(i, 7)
+            day_num = weeks[week][col] if week < len(weeks) else 0
+            if not day_num:
+                self.cell_dates[i] = None
+                cell.config(text="")
+                continue
+            day = date(self.year, self.month, day_num)
+            self.cell_dates[i] = day
+            events = by_day.get(day, [])
+            lines = [str(day_num)] + [e.name[:6] for e in events[:self.MAX_NAMES_PER_CELL]]
+            if len(events) > self.MAX_NAMES_PER_CELL: lines.append(f"+{len(events) - self.MAX_NAMES_PER_CELL} 个")
+            color = self.parent.DORA_RED if day == today else (self.parent.DORA_BLUE if events else "gray")
+            cell.config(text="\n".join(lines), foreground=color)
+
+    def change_month(self, step):
+        month_number = self.year * 12 + (self.month - 1) + step
+        self.year, self.month = divmod(month_number, 12)
+        self.month += 1
+        self.render_month()
+
+    def go_today(self):
+        today = date.today()
+        self.year, self.month = today.year, today.month
+        self.render_month()
+
+    def show_day(self, index):
+        day = self.cell_dates[index]
+        if not day: return
+        events = self._month_index().get(day, [])
+        names = "、".join(e.name for e in events) if events else "没有事件"
+        self.detail_label.config(text=f"{day.month}月{day.day}日：{names}")
+
+
+# ===================================================================
+# --- 【新增】性能统计窗口 ProfilerWindow ---
+# ===================================================================
+class ProfilerWindow(tk.Toplevel):
+    """每秒刷新一次各刷新阶段与事件循环延迟的 p50 / p99 / 最大值和耗时分布 (FISHCATCHER_PROFILE=1 时可用)."""
+    REFRESH_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.stats = parent.stats
+        self.title("性能统计");
+        self.geometry("720x320");
+        self.transient(parent)
+        frame = tb.Frame(self, padding=10);
+        frame.pack(fill="both", expand=True)
+        bounds = TickStats.BUCKETS_MS
+        self.bucket_names = [f"≤{b}ms" for b in bounds] + [f">{bounds[-1]}ms"]
+        columns = ("count", "p50", "p99", "max") + tuple(self.bucket_names)
+        self.tree = tb.Treeview(frame, columns=columns, show="tree headings", bootstyle="info")
+        self.tree.heading("#0", text="阶段"); self.tree.column("#0", width=200)
+        for col, text in zip(columns, ("次数", "p50 (ms)", "p99 (ms)", "最大 (ms)") + tuple(self.bucket_names)):
+            self.tree.heading(col, text=text); self.tree.column(col, width=60, anchor="e")
+        self.tree.pack(fill="both", expand=True)
+        tb.Label(frame, text=f"统计最近 {TickStats.WINDOW} 次；loop_lag 为 after() 定时器实际触发的延迟。",
+                 bootstyle="secondary").pack(anchor="w", pady=(5, 0))
+        self.counters_label = tb.Label(frame, bootstyle="secondary")
+        self.counters_label.pack(anchor="w")
+        self._timer_id = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh()
+
+    def refresh(self):
+        for name, s in sorted(self.stats.summary().items()):
+            values = (s["count"], f"{s['p50_ms']:.2f}", f"{s['p99_ms']:.2f}", f"{s['max_ms']:.2f}") + tuple(s["histogram"])
+            if self.tree.exists(name):
+                self.tree.item(name, values=values)
+            else:
+                self.tree.insert("", "end", iid=name, text=name, values=values)
+        self.counters_label.config(text="  ".join(f"{name}: " + ", ".join(f"{k}={v}" for k, v in counts.items())
+                                                  for name, counts in self.stats.counters().items()))
+        self._timer_id = self.after(self.REFRESH_MS, self.refresh)
+
+    def on_close(self):
+        if self._timer_id: self.after_cancel(self._timer_id)
         self.destroy()
 
 
@@ -1051,6 +1387,21 @@ if __name__ == "__main__":
         print("非Windows平台，或设置AppID失败，将跳过此步骤。")
     # --- 【修改结束】 ---
 
+    # 【新增】单实例：已有实例在运行时，把命令 (show / undock / manager) 转发给它后退出
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    if command not in FishCatcherApp.INSTANCE_COMMANDS:
+        print(f"用法: fish_catcher.py [{' | '.join(FishCatcherApp.INSTANCE_COMMANDS)}] 或 fish_catcher.py status [--json]")
+        sys.exit(2)
+    instance_guard = InstanceGuard()
+    if not instance_guard.acquire():
+        reply = send_to_running_instance(command)
+        if reply is None: print("摸鱼神器已经在运行，但没有响应，请稍后再试。")
+        elif not reply.get("ok"): print(f"摸鱼神器拒绝了命令 {command}: {reply.get('error')}")
+        sys.exit(0 if reply and reply.get("ok") else 1)
+
     app = FishCatcherApp()
+    instance_guard.serve(app.handle_instance_command)
+    if command == "manager": app.after(0, app.open_event_manager)
 
     app.mainloop()
+    instance_guard.close()
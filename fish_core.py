@@ -0,0 +1,1999 @@
+"""
+摸鱼神器的核心逻辑 (不依赖 tkinter / Pillow / ttkbootstrap).
+- 事件模型与发生日期计算、触发与刷新调度、设置模型、持久化存储、批量导入/导出。
+- 倒计时计算 (下班、周末、发薪日、事件) 为纯函数，界面与命令行共用。
+- 调度器只需要一个提供 after / after_cancel 的对象，无需显示器即可测试。
+"""
+from datetime import datetime, timedelta, date, time as dt_time
+import time
+import json
+import os
+import re
+import sys
+import heapq
+import itertools
+import math
+import copy
+import struct
+import bisect
+import collections
+import functools
+from array import array
+
+# 【优化】threading / queue / sqlite3 / socket / csv / uuid 等只在存储、导入导出、单实例和语录相关的代码里
+# 按需导入，命令行 status 等只读路径不必为它们付出导入时间
+
+
+def _new_id():
+    import uuid
+    return uuid.uuid4().hex
+
+
+def _parse_date(text):
+    """解析 YYYY-MM-DD；标准格式走 date.fromisoformat，首次调用 strptime 要额外导入 _strptime (约 10 ms)."""
+    if isinstance(text, str) and len(text) == 10:
+        try:
+            return date.fromisoformat(text)
+        except ValueError:
+            pass
+    return datetime.strptime(text, "%Y-%m-%d").date()  # 兼容 2026-1-5 这类未补零的写法，也负责报错
+
+
+def _numpy():
+    """按需导入可选依赖 NumPy (用于长时间范围的批量日期展开)，未安装时返回 None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# --- 关键辅助函数：获取文件路径 ---
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def get_user_data_path(file_name):
+    """
+    获取用户数据文件的存储路径 (用于 JSON 配置文件).
+    - 打包后，此路径将指向 C:\\Users\\<用户名>\\AppData\\Roaming\\FishCatcher
+    - 这样做可以使配置文件与程序分离，符合标准软件设计。
+    """
+    # 获取 AppData/Roaming 目录
+    app_data_path = os.getenv('APPDATA')
+
+    # 如果无法获取 APPDATA 目录 (极少见情况)，则退回到程序所在目录
+    if not app_data_path:
+        if getattr(sys, 'frozen', False):
+            app_data_path = os.path.dirname(sys.executable)
+        else:
+            app_data_path = os.path.dirname(os.path.abspath(__file__))
+
+    # 在 AppData/Roaming 下为我们的应用创建一个专属文件夹
+    app_dir = os.path.join(app_data_path, "FishCatcher")
+
+    # 确保这个文件夹存在
+    os.makedirs(app_dir, exist_ok=True)
+
+    # 返回最终的文件路径
+    return os.path.join(app_dir, file_name)
+
+EVENTS_FILE = get_user_data_path("fish_catcher_events.json")
+EVENTS_DB_FILE = get_user_data_path("fish_catcher_events.db")  # 【新增】可选的 SQLite 存储
+
+
+# ===================================================================
+# --- 【重大升级 V5.0】事件类 Event ---
+# ===================================================================
+class Event:
+    # 【优化】固定属性布局 (无 __dict__)；触发规则在构造或修改时编译一次，见 _compile
+    __slots__ = ("id", "name", "enabled", "_trigger_type", "_trigger_value", "_rule", "workdays_only", "start_date",
+                 "last_triggered_date", "repeat_total", "times_triggered")
+    WEEKDAY_NAMES = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+
+    def __init__(self, data):
+        self.id = data.get("id") or _new_id()  # 【新增】稳定的事件 ID，用于持久化日志
+        self.name = data.get("name", "未命名事件")
+        self.enabled = data.get("enabled", True)
+        self._trigger_type = data.get("trigger", {}).get("type", "date")
+        self._trigger_value = data.get("trigger", {}).get("value")
+        self._compile()
+        # 【新增】按周循环的事件可以只在工作日发生 (跳过法定节假日，见 WORKDAY_CALENDAR)
+        self.workdays_only = bool(data.get("trigger", {}).get("workdays_only", False))
+
+        start_date_str = data.get("start_date")
+        if not start_date_str:
+            if self.trigger_type == 'date':
+                start_date_str = self.trigger_value
+            else:
+                start_date_str = date.today().strftime("%Y-%m-%d")
+        self.start_date = _parse_date(start_date_str)
+
+        last_triggered_str = data.get("last_triggered_date")
+        self.last_triggered_date = _parse_date(last_triggered_str) if last_triggered_str else None
+
+        self.repeat_total = int(data.get("repeat", {}).get("total", 1))
+        self.times_triggered = int(data.get("repeat", {}).get("triggered", 0))
+
+    @property
+    def trigger_type(self):
+        return self._trigger_type
+
+    @trigger_type.setter
+    def trigger_type(self, value):
+        self._trigger_type = value
+        self._compile()
+
+    @property
+    def trigger_value(self):
+        """原始规则值 (保存与导出时原样写出)；修改后自动重新编译."""
+        return self._trigger_value
+
+    @trigger_value.setter
+    def trigger_value(self, value):
+        self._trigger_value = value
+        self._compile()
+
+    def _compile(self):
+        """
+        把触发规则解析一次：date → date 对象，interval → 正整数天数，weekly → 7 位星期掩码 (第 d 位表示星期 d).
+        - 无法解析的规则编译为 None，与原先每次解析失败时返回 None 的行为一致。
+        """
+        rule = None
+        try:
+            if self._trigger_type == "date":
+                rule = _parse_date(self._trigger_value)
+            elif self._trigger_type == "interval":
+                rule = int(self._trigger_value)
+                if rule <= 0: rule = None
+            elif self._trigger_type == "weekly":
+                mask = 0
+                for d in self._trigger_value:
+                    d = int(d)
+                    if 0 <= d < 7: mask |= 1 << d
+                rule = mask or None
+        except (ValueError, TypeError):
+            rule = None
+        self._rule = rule
+
+    def to_dict(self):
+        trigger = {"type": self.trigger_type, "value": self.trigger_value}
+        if self.workdays_only: trigger["workdays_only"] = True  # 只在开启时写出，旧数据保存后保持原样
+        return {
+            "id": self.id, "name": self.name, "enabled": self.enabled,
+            "trigger": trigger,
+            "start_date": self.start_date.strftime("%Y-%m-%d"),
+            "last_triggered_date": self.last_triggered_date.strftime("%Y-%m-%d") if self.last_triggered_date else None,
+            "repeat": {"total": self.repeat_total, "triggered": self.times_triggered}
+        }
+
+    def get_occurrences(self, count=2):
+        occurrences = []
+        from_date = date.today()
+
+        # 如果有上次触发日期，且是今天，那么下一次就从明天开始算
+        if self.last_triggered_date and self.last_triggered_date >= from_date:
+            from_date = self.last_triggered_date + timedelta(days=1)
+
+        for _ in range(count):
+            next_date = self._calculate_next(from_date)
+            if next_date:
+                occurrences.append(next_date)
+                from_date = next_date + timedelta(days=1)
+            else:
+                break
+        return occurrences
+
+    def _calculate_next(self, from_date):
+        if self.repeat_total != -1 and self.times_triggered >= self.repeat_total: return None
+        rule = self._rule
+        if rule is None: return None
+        if self._trigger_type == "date":
+            return rule if rule >= from_date and self.times_triggered < self.repeat_total else None
+        elif self._trigger_type == "interval":
+            if self.start_date > from_date: return self.start_date
+            intervals_passed = -(-(from_date - self.start_date).days // rule)  # 向上取整
+            return self.start_date + timedelta(days=intervals_passed * rule)
+        elif self._trigger_type == "weekly":
+            next_date = _next_weekday_in_mask(rule, max(from_date, self.start_date))  # 开始日期之前不发生
+            if not self.workdays_only: return next_date
+            for _ in range(366):  # 跳过落在节假日上的日期
+                if WORKDAY_CALENDAR.is_workday(next_date): return next_date
+                next_date = _next_weekday_in_mask(rule, next_date + timedelta(days=1))
+        return None
+
+    def trigger(self):
+        if self.repeat_total != -1: self.times_triggered += 1
+        self.last_triggered_date = date.today()
+        OCCURRENCE_CACHE.invalidate(self)
+
+    def get_rule_text(self):
+        if self._trigger_type == "date":
+            return f"特定日期: {self._trigger_value}"
+        elif self._trigger_type == "interval":
+            return f"每 {self._rule if self._rule is not None else self._trigger_value} 天"
+        elif self._trigger_type == "weekly":
+            day_names = [name for d, name in enumerate(self.WEEKDAY_NAMES) if (self._rule or 0) >> d & 1]
+            return "每周 " + "、".join(day_names) + (" (仅工作日)" if self.workdays_only else "")
+        return "未知规则"
+
+
+def _next_weekday_in_mask(mask, from_date):
+    """from_date 当天或之后第一个星期在 mask 中的日期：把掩码循环右移 from_date 的星期数，最低置位即为相隔天数."""
+    w = from_date.weekday()
+    rotated = ((mask >> w) | (mask << (7 - w))) & 0x7F
+    return from_date + timedelta(days=(rotated & -rotated).bit_length() - 1)
+
+
+# ===================================================================
+# --- 【新增】工作日历 WorkdayCalendar (法定节假日与调休) ---
+# ===================================================================
+class WorkdayCalendar:
+    """
+    工作日历：默认周一至周五上班，再叠加数据文件中的法定节假日 (休) 和调休上班日 (班).
+    - 每年编译成一个整数位图 (第 n 位表示该年第 n+1 天是否上班)，"是否上班"、"下一个休息日" 都是位运算。
+    - 数据文件每行 "日期[~结束日期] 休|班 [备注]"，# 开头的行为注释；未列出的日期按周一至周五处理。
+    """
+
+    def __init__(self):
+        self.path = None
+        self._overrides = {}  # {年份: {日期: 是否上班}}
+        self._years = {}  # {年份: (位图, 该年天数, 1月1日的序数)}
+
+    def load(self, path):
+        """读取节假日数据文件；文件不存在时保持默认的周一至周五，格式错误的行会被跳过并提示."""
+        overrides = {}
+        try:
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                for line_no, line in enumerate(f, 1):
+                    parts = line.split("#", 1)[0].split()
+                    if not parts: continue
+                    try:
+                        if len(parts) < 2 or parts[1] not in ("休", "班"): raise ValueError("类型应为 休 或 班")
+                        first, _, last = parts[0].partition("~")
+                        day = _parse_date(first)
+                        last = _parse_date(last) if last else day
+                        while day <= last:
+                            overrides.setdefault(day.year, {})[day] = parts[1] == "班"
+                            day += timedelta(days=1)
+                    except ValueError as e:
+                        print(f"警告: 节假日数据第 {line_no} 行无法识别 ({e}): {line.strip()}")
+        except FileNotFoundError:
+            pass
+        except (IOError, UnicodeDecodeError) as e:
+            print(f"警告: 读取节假日数据失败: {e}")
+        self.path, self._overrides, self._years = path, overrides, {}
+        return self
+
+    def _year(self, year):
+        if year not in self._years:
+            start = date(year, 1, 1)
+            days = (date(year + 1, 1, 1) - start).days
+            bits = 0
+            for i in range(days):
+                if (start.weekday() + i) % 7 < 5: bits |= 1 << i
+            for day, is_work in self._overrides.get(year, {}).items():
+                offset = (day - start).days
+                bits = bits | (1 << offset) if is_work else bits & ~(1 << offset)
+            self._years[year] = (bits, days, start.toordinal())
+        return self._years[year]
+
+    def is_workday(self, day):
+        bits, _, start = self._year(day.year)
+        return bool(bits >> (day.toordinal() - start) & 1)
+
+    def next_day(self, day, workday):
+        """day 当天或之后第一个 (workday=True 时) 工作日 / (workday=False 时) 休息日."""
+        for year in range(day.year, day.year + 3):
+            bits, days, start = self._year(year)
+            offset = day.toordinal() - start if year == day.year else 0
+            candidates = (bits if workday else ~bits & ((1 << days) - 1)) >> offset
+            if candidates: return date.fromordinal(start + offset + (candidates & -candidates).bit_length() - 1)
+        return None
+
+
+def default_holidays_path():
+    """节假日数据文件：环境变量 FISHCATCHER_HOLIDAYS > 用户数据目录中的 holidays.txt > 程序自带的 holidays.txt."""
+    user_path = get_user_data_path("holidays.txt")
+    return os.getenv("FISHCATCHER_HOLIDAYS") or (user_path if os.path.exists(user_path) else resource_path("holidays.txt"))
+
+
+WORKDAY_CALENDAR = WorkdayCalendar()
+
+
+# ===================================================================
+# --- 【新增】发薪日规则 PaydaySchedule ---
+# ===================================================================
+class PaydaySchedule:
+    """
+    发薪日规则与预先算好的发薪日期表.
+    - 规则文本用逗号分隔多个发薪日，每项为 "N" (每月 N 号，小月取月末)、"末" (月末) 或 "末工作日"；
+      可加后缀 "前" / "后"：当天不上班时提前到上一个 / 顺延到下一个工作日，如 "10前, 25前"。
+    - 每天只展开一次未来 PAYOUTS 个发薪日期，刷新时 days_until 只是一次列表查找。
+    """
+    PAYOUTS = 12
+    RULE_ERROR = '发薪日格式不对哦~ 例如 "10"、"15, 末"、"末工作日"、"10前" (遇休息日提前)'
+    _TOKEN = re.compile(r"^(\d{1,2}|末|末工作日)([前后]?)$")
+
+    def __init__(self, rule_text="10", workdays=None):
+        self.workdays = workdays or WORKDAY_CALENDAR
+        self.rules = [(10, "")]
+        self.rule_text = "10"
+        self._built_for = None  # 规则无效时 set_rule 不会设置它，保留默认规则继续可用
+        self._payouts = []
+        self.set_rule(rule_text)
+
+    @classmethod
+    def parse(cls, rule_text):
+        """把规则文本解析为 [(日期/'末'/'末工作日', 调整方向), ...]；无效时抛出 ValueError."""
+        rules = []
+        for token in re.split(r"[,，;；\s]+", str(rule_text).strip()):
+            if not token: continue
+            match = cls._TOKEN.match(token)
+            if not match: raise ValueError(token)
+            day, shift = match.groups()
+            if day.isdigit():
+                day = int(day)
+                if not 1 <= day <= 31: raise ValueError(token)
+            rules.append((day, shift))
+        if not rules: raise ValueError(rule_text)
+        return rules
+
+    def set_rule(self, rule_text):
+        """设置新规则，返回是否有效；无效时保留原规则."""
+        try:
+            self.rules = self.parse(rule_text)
+        except ValueError:
+            return False
+        self.rule_text = str(rule_text).strip()
+        self._built_for = None
+        return True
+
+    def _payout(self, year, month, rule):
+        day, shift = rule
+        last = (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)).day
+        if day == "末工作日":
+            payout = date(year, month, last)
+            while not self.workdays.is_workday(payout) and payout.day > 1: payout -= timedelta(days=1)
+        else:
+            payout = date(year, month, last if day == "末" else min(day, last))
+        if shift and not self.workdays.is_workday(payout):
+            step = timedelta(days=-1 if shift == "前" else 1)
+            for _ in range(31):
+                payout += step
+                if self.workdays.is_workday(payout): break
+        return payout
+
+    def upcoming(self, today):
+        """今天及以后的 PAYOUTS 个发薪日期 (升序)，每天只计算一次."""
+        if self._built_for != today:
+            payouts = set()
+            # 从上个月开始展开：下个月月初的发薪日可能提前到本月
+            year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+            while len(payouts) < self.PAYOUTS + len(self.rules) * 2:
+                payouts.update(p for p in (self._payout(year, month, r) for r in self.rules) if p >= today)
+                year, month = (year, month + 1) if month < 12 else (year + 1, 1)
+            self._payouts = sorted(payouts)[:self.PAYOUTS]
+            self._built_for = today
+        return self._payouts
+
+    def next_payout(self, today):
+        return self.upcoming(today)[0]
+
+    def days_until(self, today):
+        """距离下一个发薪日的天数，当天发薪返回 0."""
+        return (self.next_payout(today) - today).days
+
+
+# ===================================================================
+# --- 【新增】事件发生日期缓存 OccurrenceCache ---
+# ===================================================================
+class OccurrenceCache:
+    """
+    缓存事件的下一次发生日期以及已启用事件的排序结果.
+    - 以事件 ID 为键记忆当天 _calculate_next 的结果，跨天或事件对象被替换后自动重新计算。
+    - 排序结果每天或每次编辑后才重建一次，界面刷新时直接复用。
+    """
+
+    def __init__(self):
+        self._next_dates = {}  # 事件 ID -> (事件对象, 日期, 下一次发生日期)
+        self._upcoming = None
+        self._upcoming_date = None
+        self.version = 0  # 每次失效加一，供其他派生索引 (如 OccurrenceIndex) 判断是否需要重建
+
+    def next_occurrence(self, event, day):
+        entry = self._next_dates.get(event.id)
+        if entry is None or entry[0] is not event or entry[1] != day:
+            entry = self._next_dates[event.id] = (event, day, event._calculate_next(day))
+        return entry[2]
+
+    def upcoming(self, events, day):
+        """返回按下一次发生日期排序的已启用事件列表 (已结束的事件排在最后)."""
+        if self._upcoming is None or self._upcoming_date != day:
+            self._upcoming = sorted([e for e in events if e.enabled],
+                                    key=lambda e: self.next_occurrence(e, day) or date.max)
+            self._upcoming_date = day
+        return self._upcoming
+
+    def invalidate(self, *events):
+        """事件被编辑、启用/禁用、删除或触发后传入这些事件，只丢弃它们的缓存项；不传参数则清空全部缓存."""
+        if not events: self._next_dates.clear()
+        for event in events: self._next_dates.pop(event.id, None)
+        self._upcoming = None
+        self.version += 1
+
+
+OCCURRENCE_CACHE = OccurrenceCache()
+
+
+# ===================================================================
+# --- 【新增】长时间范围的批量发生日期展开 ---
+# ===================================================================
+def _expansion_params(event, start):
+    """
+    计算事件在 start (视为"今天") 之后的展开起点，与 get_occurrences 的规则保持一致.
+    返回 (from_date, kind, rule)：kind 为 'date' / 'interval' / 'weekly'，无法再发生时返回 None。
+    """
+    if event.repeat_total != -1 and event.times_triggered >= event.repeat_total: return None
+    from_date = start
+    if event.last_triggered_date and event.last_triggered_date >= from_date:
+        from_date = event.last_triggered_date + timedelta(days=1)
+    rule = event._rule  # 构造时已编译好的规则，无效规则为 None
+    if rule is None: return None
+    if event.trigger_type == "date":
+        ok = rule >= from_date and event.times_triggered < event.repeat_total
+        return (from_date, "date", rule) if ok else None
+    elif event.trigger_type == "interval":
+        if event.start_date > from_date: return from_date, "interval", (event.start_date, rule)
+        intervals_passed = -(-(from_date - event.start_date).days // rule)
+        return from_date, "interval", (event.start_date + timedelta(days=intervals_passed * rule), rule)
+    elif event.trigger_type == "weekly":
+        from_date = max(from_date, event.start_date)
+        return from_date, "weekly", (frozenset(d for d in range(7) if rule >> d & 1), event.workdays_only)
+    return None
+
+
+def iter_occurrences_between(event, start, end):
+    """
+    纯 Python 版本：逐个产出事件在 [start, end) 内的发生日期 (与 get_occurrences 结果一致).
+    - start 视为"今天"：有次数限制的事件最多产出剩余的 repeat_total - times_triggered 次。
+    """
+    params = _expansion_params(event, start)
+    if not params: return
+    occurrences = _iter_expansion(params, end)
+    if event.repeat_total != -1: occurrences = itertools.islice(occurrences, event.repeat_total - event.times_triggered)
+    yield from occurrences
+
+
+def _iter_expansion(params, end):
+    from_date, kind, rule = params
+    if kind == "date":
+        if rule < end: yield rule
+    elif kind == "interval":
+        day, interval = rule
+        while day < end:
+            yield day
+            day += timedelta(days=interval)
+    else:
+        weekdays, workdays_only = rule
+        day = from_date
+        while day < end:
+            if day.weekday() in weekdays and (not workdays_only or WORKDAY_CALENDAR.is_workday(day)): yield day
+            day += timedelta(days=1)
+
+
+def expand_occurrences(events, start=None, days=365):
+    """
+    批量展开已启用事件在 [start, start + days) 内的全部发生日期，结果与逐次调用 get_occurrences 完全一致.
+    - 返回 {事件: numpy datetime64[D] 数组}；interval 规则用等差 arange，weekly 规则用星期掩码，
+      星期组合相同的事件共用一次掩码计算；仅工作日的规则再与工作日历的逐日标记相与。
+    - 与 iter_occurrences_between 相同，有次数限制的事件只保留从 start 起剩余的次数。
+    - 需要 NumPy (pip install numpy)。
+    """
+    np = _numpy()
+    if np is None: raise ImportError("expand_occurrences 需要 NumPy，请运行 'pip install numpy' 安装。")
+    start = start or date.today()
+    end = start + timedelta(days=days)
+    start64, end64 = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    all_days = np.arange(start64, end64, dtype='datetime64[D]')
+    all_weekdays = (all_days.astype('int64') + 3) % 7  # 1970-01-01 是星期四 (weekday 3)
+    empty = np.array([], dtype='datetime64[D]')
+    weekly_cache = {}
+    workday_flags = None
+    result = {}
+    for event in events:
+        if not event.enabled: continue
+        params = _expansion_params(event, start)
+        if not params:
+            result[event] = empty
+            continue
+        from_date, kind, rule = params
+        if kind == "date":
+            result[event] = np.array([rule], dtype='datetime64[D]') if rule < end else empty
+        elif kind == "interval":
+            result[event] = np.arange(np.datetime64(rule[0], 'D'), end64, rule[1], dtype='datetime64[D]')
+        else:
+            offset = max((from_date - start).days, 0)
+            key = (rule, offset)
+            if key not in weekly_cache:
+                weekdays, workdays_only = rule
+                mask_table = np.zeros(7, dtype=bool)
+                mask_table[list(weekdays)] = True
+                selected = mask_table[all_weekdays[offset:]]
+                if workdays_only:
+                    if workday_flags is None:
+                        workday_flags = np.array([WORKDAY_CALENDAR.is_workday(start + timedelta(days=i))
+                                                  for i in range(days)], dtype=bool)
+                    selected &= workday_flags[offset:]
+                weekly_cache[key] = all_days[offset:][selected]
+            result[event] = weekly_cache[key]
+        if event.repeat_total != -1: result[event] = result[event][:event.repeat_total - event.times_triggered]
+    return result
+
+
+def _occurrences_by_event(events, start, end):
+    """[start, end) 内每个已启用事件的发生日期列表；有 NumPy 时走向量化展开."""
+    if _numpy() is not None:
+        return [(event, arr.tolist()) for event, arr in expand_occurrences(events, start, (end - start).days).items()]
+    return [(event, list(iter_occurrences_between(event, start, end))) for event in events if event.enabled]
+
+
+def occurrence_counts_per_day(events, start=None, days=365):
+    """每天发生的事件数 (长度为 days 的整数数组)，可直接用于年度热力图."""
+    np = _numpy()
+    start = start or date.today()
+    expanded = [a for a in expand_occurrences(events, start, days).values() if len(a)]
+    if not expanded: return np.zeros(days, dtype=np.int64)
+    offsets = (np.concatenate(expanded) - np.datetime64(start, 'D')).astype(np.int64)
+    return np.bincount(offsets, minlength=days)
+
+
+# ===================================================================
+# --- 【新增】按日期索引的事件日历 OccurrenceIndex ---
+# ===================================================================
+class OccurrenceIndex:
+    """
+    日期 -> [事件] 索引，供月历视图使用.
+    - 每个月份只在第一次查看时展开一次规则，之后翻页都是字典查找。
+    - 跨天或 OCCURRENCE_CACHE 失效 (事件被编辑、启用/禁用、删除、触发) 后整体清空重建。
+    - 与 get_occurrences 一致只包含今天及以后的发生日期；今天已触发的事件仍显示在今天。
+    - 有次数限制的事件只显示剩余的 repeat_total - times_triggered 次。
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._months = {}
+        self._built_for = None
+
+    def _check_fresh(self):
+        stamp = (date.today(), self.cache.version)
+        if self._built_for != stamp:
+            self._months.clear()
+            self._built_for = stamp
+
+    def month(self, events, year, month):
+        """返回 {日期: [事件, ...]}，只包含该月有事件的日期."""
+        self._check_fresh()
+        key = (year, month)
+        if key not in self._months:
+            self._months[key] = self._build_month(events, year, month)
+        return self._months[key]
+
+    def events_on(self, events, day):
+        return self.month(events, day.year, day.month).get(day, [])
+
+    @staticmethod
+    def _build_month(events, year, month):
+        today = date.today()
+        first = date(year, month, 1)
+        import calendar
+        end = first + timedelta(days=calendar.monthrange(year, month)[1])
+        by_day = {}
+        if end <= today: return by_day
+        limited = [e for e in events if e.repeat_total != -1]
+        occurrences = _occurrences_by_event([e for e in events if e.repeat_total == -1], max(first, today), end)
+        if limited:  # 有次数限制的事件要从今天起数剩余次数，再取落在本月的部分
+            occurrences += [(event, [day for day in days if day >= first])
+                            for event, days in _occurrences_by_event(limited, today, end)]
+        for event, days in occurrences:
+            for day in days: by_day.setdefault(day, []).append(event)
+        if first <= today < end:
+            triggered_today = [e for e in events if e.enabled and e.last_triggered_date == today
+                               and e not in by_day.get(today, [])]
+            if triggered_today: by_day[today] = triggered_today + by_day.get(today, [])
+        return by_day
+
+
+OCCURRENCE_INDEX = OccurrenceIndex(OCCURRENCE_CACHE)
+
+
+# ===================================================================
+# --- 【新增】日志式持久化 JournaledStore ---
+# ===================================================================
+def apply_journal_record(data, record):
+    """把一条日志记录合并到数据中；data['events'] 为以事件 ID 为键的有序字典."""
+    op = record.get("op")
+    if op == "put":
+        data["events"][record["event"]["id"]] = record["event"]
+    elif op == "delete":
+        data["events"].pop(record["id"], None)
+    elif op == "settings":
+        data["settings"] = record["settings"]
+
+
+class BackgroundStore:
+    """持久化层基类：界面线程只把修改记录放进队列，由后台线程 (_writer_loop) 落盘."""
+    indexed = False  # 是否支持按下一次发生日期的索引查询 (见 SQLiteStore)
+
+    def __init__(self):
+        import queue
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def append(self, record):
+        self._queue.put(("record", record))
+
+    def put_event(self, event):
+        self.append({"op": "put", "event": event.to_dict()})
+
+    def delete_event(self, event):
+        self.append({"op": "delete", "id": event.id})
+
+    def put_settings(self, settings):
+        self.append({"op": "settings", "settings": settings})
+
+    def close(self, timeout=None):
+        """退出前调用：等待后台线程写完队列中剩余的全部修改 (默认不设超时，避免大批导入在退出时丢失)."""
+        if not self._thread: return
+        self._queue.put(("close", None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _start(self):
+        if self._thread: return
+        import threading
+        self._thread = threading.Thread(target=self._writer_loop, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def _writer_loop(self):
+        raise NotImplementedError
+
+
+class JournaledStore(BackgroundStore):
+    """
+    追加式日志 + 快照的持久化层.
+    - 每次修改只向 <数据文件>.journal 追加一行小记录 (事件增改/删除、设置修改)，由后台线程写盘，界面不等待磁盘。
+    - 日志累计 COMPACT_THRESHOLD 条后，后台线程把合并后的完整数据写成新快照：
+      先写临时文件再 os.replace 原子替换，崩溃时不会留下写了一半的数据文件。
+    - 快照记录已合并的最大日志序号 journal_seq，启动时只重放序号更大的记录。
+    """
+    COMPACT_THRESHOLD = 200
+
+    def __init__(self, snapshot_path):
+        super().__init__()
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self._state = None
+        self._seq = 0
+        self._journal_count = 0
+
+    def load(self, default_data):
+        """读取快照并重放日志，返回 {'events': [...], 'settings': {...}}；没有 ID 的旧事件会补上 ID."""
+        data, has_snapshot, ids_assigned, replayed = self._read(default_data)
+        self._state, self._seq, self._journal_count = data, data['journal_seq'], replayed
+        self._start()
+        # 新补的 ID 必须先落盘，之后的日志记录才能对应到同一个事件
+        if not has_snapshot or ids_assigned or replayed: self._queue.put(("compact", None))
+        return {'events': copy.deepcopy(list(data['events'].values())), 'settings': copy.deepcopy(data['settings'])}
+
+    def peek(self, default_data):
+        """【新增】只读地读取当前数据 (不写盘、不启动后台线程)，返回结构与 load 相同."""
+        data = self._read(default_data)[0]
+        return {'events': list(data['events'].values()), 'settings': data['settings']}
+
+    def _read(self, default_data):
+        """合并快照与日志，返回 (数据, 是否有快照, 是否补过 ID, 重放的日志条数)."""
+        has_snapshot = os.path.exists(self.snapshot_path)
+        data = None
+        if has_snapshot:
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                data = None
+        if not isinstance(data, dict): data = copy.deepcopy(default_data)
+        data.setdefault('settings', copy.deepcopy(default_data['settings']))
+        events = {}
+        ids_assigned = False
+        for event_data in data.get('events', default_data['events']):
+            event_data = dict(event_data)
+            if not event_data.get('id'):
+                event_data['id'] = _new_id()
+                ids_assigned = True
+            events[event_data['id']] = event_data
+        data['events'] = events
+
+        seq = data.get('journal_seq', 0)
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # 崩溃时写了一半的最后一行
+                    if record.get('seq', 0) <= seq: continue
+                    apply_journal_record(data, record)
+                    seq = record['seq']
+                    replayed += 1
+        data['journal_seq'] = seq
+        return data, has_snapshot, ids_assigned, replayed
+
+    def append(self, record):
+        """在界面线程调用：分配序号后交给后台线程写入日志，立即返回."""
+        self._seq += 1
+        record = dict(record, seq=self._seq)
+        super().append(record)
+
+    def _writer_loop(self):
+        journal = None
+        while True:
+            kind, record = self._queue.get()
+            try:
+                if kind == "record":
+                    if journal is None: journal = open(self.journal_path, 'a', encoding='utf-8')
+                    journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    journal.flush()
+                    apply_journal_record(self._state, record)
+                    self._state['journal_seq'] = record['seq']
+                    self._journal_count += 1
+                    if self._journal_count < self.COMPACT_THRESHOLD or not self._queue.empty(): continue
+                if journal is not None: journal.close(); journal = None
+                self._write_snapshot()
+            except (IOError, OSError) as e:
+                print(f"Error saving data: {e}")
+            if kind == "close": return
+
+    def _write_snapshot(self):
+        snapshot = dict(self._state, events=list(self._state['events'].values()))
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # 快照已包含全部日志内容，截断日志 (若在此之前崩溃，重放时会按 journal_seq 跳过)
+        open(self.journal_path, 'w', encoding='utf-8').close()
+        self._journal_count = 0
+        print(f"Settings saved at {datetime.now()}")
+
+
+class SQLiteStore(BackgroundStore):
+    """
+    【新增】可选的 SQLite 存储后端，适合成千上万条事件的共享日历.
+    - 每个事件一行，以稳定的事件 ID 为主键，单个事件的增改删只写这一行，不必重写整个数据文件。
+    - 写入同样由后台线程批量提交；新事件的位置序号由写线程在内存中递增，不必每次查询 MAX(position)。
+    - next_date 列是事件的下一次发生日期 (不再发生时为 9999-12-31)，写入时计算；
+      (enabled, next_date, position) 索引让"最近 N 个事件"与"当天发生的事件"成为索引查询，见 upcoming_ids / ids_on。
+    - 查询在界面线程进行：先等写线程提交已排队的修改，跨天后再让它重算已过期 (早于当天) 的 next_date。
+    - 首次启用时自动从 JSON 数据文件迁移。
+    """
+    indexed = True
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            enabled INTEGER NOT NULL,
+            next_date TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_upcoming ON events (enabled, next_date, position);
+        CREATE INDEX IF NOT EXISTS events_next_date ON events (next_date);
+        CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, db_path, migrate_from=None):
+        super().__init__()
+        self.db_path = db_path
+        self.migrate_from = migrate_from
+        self._conn = None
+        self._reader = None
+        self._fresh_day = None
+
+    def _connect(self):
+        import sqlite3
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _next_date(event_data, day):
+        """event_data 在 day 当天看来的下一次发生日期 (与 OccurrenceCache 的排序键一致)."""
+        return (Event(event_data)._calculate_next(day) or date.max).isoformat()
+
+    @staticmethod
+    def _row(event_data, position, next_date=None):
+        return (event_data["id"], position, 1 if event_data.get("enabled", True) else 0, next_date,
+                json.dumps(event_data, ensure_ascii=False))
+
+    def load(self, default_data):
+        """读取全部事件与设置，返回与 JournaledStore.load 相同结构的数据；数据库为空时先从 JSON 迁移."""
+        self._conn = self._connect()
+        self._conn.executescript(self.SCHEMA)
+        if self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone() is None:
+            self._migrate(default_data)
+        events = [json.loads(data) for (data,) in self._conn.execute("SELECT data FROM events ORDER BY position")]
+        settings = {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM settings")}
+        self._conn.close(); self._conn = None
+        self._start()
+        return {'events': events, 'settings': settings or copy.deepcopy(default_data['settings'])}
+
+    def peek(self, default_data):
+        """【新增】以只读方式读取全部事件与设置；数据库还不存在 (尚未迁移) 时读取原 JSON 数据."""
+        import sqlite3
+        from pathlib import Path
+        try:
+            conn = sqlite3.connect(Path(self.db_path).resolve().as_uri() + "?mode=ro", uri=True, timeout=5)
+            try:
+                events = [json.loads(data) for (data,) in conn.execute("SELECT data FROM events ORDER BY position")]
+                settings = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")}
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            if self.migrate_from: return JournaledStore(self.migrate_from).peek(default_data)
+            return copy.deepcopy(default_data)
+        return {'events': events, 'settings': settings or copy.deepcopy(default_data['settings'])}
+
+    def _migrate(self, default_data):
+        if self.migrate_from and os.path.exists(self.migrate_from):
+            json_store = JournaledStore(self.migrate_from)
+            data = json_store.load(default_data)
+            json_store.close()
+        else:
+            data = copy.deepcopy(default_data)
+            for event_data in data['events']: event_data.setdefault('id', _new_id())
+        with self._conn:
+            # next_date 留空，等节假日数据加载后由第一次查询补算 (见 _refresh_next_dates)
+            self._conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)",
+                                   [self._row(e, i) for i, e in enumerate(data['events'])])
+            self._conn.executemany("INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                                   [(k, json.dumps(v, ensure_ascii=False)) for k, v in data['settings'].items()])
+            self._conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                   [("schema_version", "1")])
+        print(f"已将 {len(data['events'])} 个事件迁移到 SQLite 存储: {self.db_path}")
+
+    def close(self, timeout=None):
+        super().close(timeout)
+        if self._conn: self._conn.close(); self._conn = None
+        if self._reader: self._reader.close(); self._reader = None
+
+    # --- 索引查询 (界面线程) ---
+    def _query(self, day, sql, params=()):
+        if self._thread:
+            import threading
+            if self._fresh_day != day:
+                self._queue.put(("refresh", day))
+                self._fresh_day = day
+            done = threading.Event()
+            self._queue.put(("flush", done))
+            done.wait(5)  # 等写线程提交之前排队的修改，查询结果与内存中的事件一致
+        if self._reader is None: self._reader = self._connect()
+        return self._reader.execute(sql, params).fetchall()
+
+    def count_enabled(self, day):
+        return self._query(day, "SELECT COUNT(*) FROM events WHERE enabled = 1")[0][0]
+
+    def upcoming_ids(self, day, limit=-1, offset=0):
+        """按下一次发生日期排序的已启用事件 ID (不再发生的排在最后，同一天按添加顺序)."""
+        rows = self._query(day, "SELECT id FROM events WHERE enabled = 1 ORDER BY next_date, position LIMIT ? OFFSET ?",
+                           (limit, offset))
+        return [event_id for (event_id,) in rows]
+
+    def ids_on(self, day):
+        """day 当天发生的已启用事件 ID."""
+        rows = self._query(day, "SELECT id FROM events WHERE enabled = 1 AND next_date = ? ORDER BY position",
+                           (day.isoformat(),))
+        return [event_id for (event_id,) in rows]
+
+    def _writer_loop(self):
+        import queue
+        import sqlite3
+        conn = self._connect()
+        self._next_position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM events").fetchone()[0]
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            while True:  # 把已排队的修改合并到同一个事务里提交
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for kind, record in batch:
+                        if kind == "close": closing = True
+                        elif kind == "record": self._apply(conn, record)
+                        elif kind == "refresh": self._refresh_next_dates(conn, record)
+            except sqlite3.Error as e:
+                print(f"Error saving data: {e}")
+            for kind, done in batch:
+                if kind == "flush": done.set()
+        conn.close()
+
+    def _refresh_next_dates(self, conn, day):
+        """跨天后只重算 next_date 早于 day (已经过去) 或尚未计算的行，走 next_date 索引."""
+        rows = conn.execute("SELECT id, data FROM events WHERE next_date IS NULL OR next_date < ?",
+                            (day.isoformat(),)).fetchall()
+        conn.executemany("UPDATE events SET next_date = ? WHERE id = ?",
+                         [(self._next_date(json.loads(data), day), event_id) for event_id, data in rows])
+
+    def _apply(self, conn, record):
+        op = record.get("op")
+        if op == "put":
+            event_data = record["event"]
+            row = conn.execute("SELECT position FROM events WHERE id = ?", (event_data["id"],)).fetchone()
+            if row is None:
+                position = self._next_position
+                self._next_position += 1
+            else:
+                position = row[0]
+            conn.execute("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)",
+                         self._row(event_data, position, self._next_date(event_data, date.today())))
+        elif op == "delete":
+            conn.execute("DELETE FROM events WHERE id = ?", (record["id"],))
+        elif op == "settings":
+            conn.executemany("INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                             [(k, json.dumps(v, ensure_ascii=False)) for k, v in record["settings"].items()])
+
+
+def open_event_store():
+    """
+    【新增】选择存储后端：设置环境变量 FISHCATCHER_STORAGE=sqlite 或已存在 SQLite 数据库时使用 SQLiteStore，
+    否则使用默认的 JSON 日志存储。两者的 load / put_* / close 接口一致。
+    """
+    if os.getenv("FISHCATCHER_STORAGE", "").lower() == "sqlite" or os.path.exists(EVENTS_DB_FILE):
+        return SQLiteStore(EVENTS_DB_FILE, migrate_from=EVENTS_FILE)
+    return JournaledStore(EVENTS_FILE)
+
+
+# ===================================================================
+# --- 【新增】设置模型 AppSettings ---
+# ===================================================================
+class AppSettings:
+    """
+    校验并缓存用户设置，只在设置被修改时 (trace_add 回调) 解析一次.
+    - 下班时间解析为 time，并按天缓存当天的下班截止时间，刷新时无需再 strptime。
+    - 发薪日规则交给 PaydaySchedule，每天预先算好未来的发薪日期。
+    - 喝水提醒间隔换算为秒；无效输入记录在 *_error 中，由界面在编辑时提示。
+    """
+    WORK_END_TIME_ERROR = "请检查下班时间格式 (HH:MM:SS)"
+    INTERVAL_NOT_NUMBER_ERROR = "提醒间隔必须是有效的数字！"
+    INTERVAL_NOT_POSITIVE_ERROR = "提醒间隔必须大于0分钟！"
+
+    def __init__(self):
+        self.payday = PaydaySchedule()
+        self.payday_error = None
+        self.work_end_time = dt_time(18)
+        self.work_end_time_error = None
+        self.reminder_enabled = True
+        self.reminder_interval_seconds = 60 * 60
+        self.reminder_interval_error = None
+        self._work_end_deadline = (None, None)
+
+    def load(self, settings):
+        self.set_payday(settings.get('payday_rule', settings.get('payday', 10)))  # 旧版本只保存了 payday 号数
+        self.set_work_end_time(settings.get('work_end_time', "18:00:00"))
+        self.set_reminder_interval(settings.get('reminder_interval', 60))
+        self.reminder_enabled = bool(settings.get('reminder_enabled', True))
+
+    def set_payday(self, rule_text):
+        """设置发薪日规则 (见 PaydaySchedule)，返回是否有效；无效时保留原规则."""
+        ok = self.payday.set_rule(rule_text)
+        self.payday_error = None if ok else PaydaySchedule.RULE_ERROR
+        return ok
+
+    def set_work_end_time(self, text):
+        """解析 HH:MM:SS 格式的下班时间，返回是否有效."""
+        try:
+            text = str(text).strip()
+            if len(text) == 8 and text[2] == text[5] == ":":
+                self.work_end_time = dt_time(int(text[:2]), int(text[3:5]), int(text[6:]))
+            else:
+                self.work_end_time = datetime.strptime(text, "%H:%M:%S").time()
+            self.work_end_time_error = None
+        except ValueError:
+            self.work_end_time_error = self.WORK_END_TIME_ERROR
+        self._work_end_deadline = (None, None)
+        return self.work_end_time_error is None
+
+    def set_reminder_interval(self, minutes):
+        """minutes 为 None 表示输入不是数字；间隔不大于 0 时视为关闭提醒."""
+        try:
+            minutes = int(minutes)
+        except (ValueError, TypeError):
+            self.reminder_interval_seconds = None
+            self.reminder_interval_error = self.INTERVAL_NOT_NUMBER_ERROR
+            return False
+        if minutes <= 0:
+            self.reminder_interval_seconds = None
+            self.reminder_interval_error = self.INTERVAL_NOT_POSITIVE_ERROR
+            return False
+        self.reminder_interval_seconds = minutes * 60
+        self.reminder_interval_error = None
+        return True
+
+    def work_end_deadline(self, day):
+        """当天的下班时间 (datetime)；下班时间格式无效时返回 None."""
+        if self.work_end_time_error: return None
+        if self._work_end_deadline[0] != day:
+            self._work_end_deadline = (day, datetime.combine(day, self.work_end_time))
+        return self._work_end_deadline[1]
+
+    def next_reminder_time(self, last_reminder_time):
+        """根据上次提醒的时间戳计算下一次喝水提醒的时间戳；未开启时返回 None."""
+        if not self.reminder_enabled or self.reminder_interval_seconds is None: return None
+        return last_reminder_time + self.reminder_interval_seconds
+
+
+# ===================================================================
+# --- 【新增】事件触发调度器 TriggerScheduler ---
+# ===================================================================
+class TriggerScheduler:
+    """
+    用小顶堆按下一次触发日期管理已启用事件，只为最早的截止时间挂一个 after() 定时器.
+    - 每天只需弹出当天真正要触发的 k 个事件，代价 O(k log n)，无需逐个评估规则。
+    - 事件被编辑、启用/禁用、删除后调用 reschedule / remove 重新排队，旧的堆项惰性作废。
+    - widget 只需提供 after / after_cancel (Tk 控件或无界面的替身均可)。
+    - 【新增】传入 source(day) (如 SQLite 存储按 next_date 索引查出当天发生的事件) 时，堆里只放当天的事件，
+      每天零点重新查询一次，不必为全部事件计算下一次发生日期。
+    """
+    TRIGGER_HOUR = 9  # 每天九点触发当日事件
+    MAX_TIMER_MS = 60 * 60 * 1000  # 定时器最长一小时，避免休眠或修改系统时间后错过触发
+
+    def __init__(self, widget, on_due, source=None):
+        self.widget = widget
+        self.on_due = on_due
+        self.source = source
+        self._day = None
+        self._heap = []
+        self._tokens = {}
+        self._counter = itertools.count()
+        self._timer_id = None
+
+    def _make_entry(self, event):
+        token = next(self._counter)
+        self._tokens[event] = token
+        if not event.enabled: return None
+        next_occurrence = event.get_occurrences(1)
+        return (next_occurrence[0], token, event) if next_occurrence else None
+
+    def _is_valid(self, entry):
+        return self._tokens.get(entry[2]) == entry[1]
+
+    def _wanted(self, entry):
+        # 按天查询时只保留当天的堆项，之后的日期由零点的重新查询负责
+        return entry is not None and (self.source is None or entry[0] <= self._day)
+
+    def rebuild(self, events=None):
+        """重建触发堆；有 source 时 events 省略，改为查询当天发生的事件."""
+        self._day = date.today()
+        if events is None: events = self.source(self._day)
+        self._tokens.clear()
+        self._heap = [entry for entry in map(self._make_entry, events) if self._wanted(entry)]
+        heapq.heapify(self._heap)
+        self._arm()
+
+    def reschedule(self, *events):
+        for event in events:
+            entry = self._make_entry(event)
+            if self._wanted(entry): heapq.heappush(self._heap, entry)
+        self._arm()
+
+    def remove(self, event):
+        self._tokens.pop(event, None)
+        self._arm()
+
+    def pop_due(self, day):
+        """弹出所有在 day 当天到期的事件；过期 (错过) 的堆项按新的下一次日期重新入堆."""
+        due = []
+        while self._heap and self._heap[0][0] <= day:
+            entry = heapq.heappop(self._heap)
+            if not self._is_valid(entry): continue
+            if entry[0] < day:
+                fresh = self._make_entry(entry[2])
+                if self._wanted(fresh): heapq.heappush(self._heap, fresh)
+            else:
+                due.append(entry[2])
+        return due
+
+    def trigger_due(self, day):
+        """触发 day 当天到期且当天尚未触发过的事件，返回被触发的事件 (保存与提示由调用方负责)."""
+        due_events = self.pop_due(day)
+        triggered_events = [event for event in due_events if event.last_triggered_date != day]
+        for event in triggered_events: event.trigger()
+        self.reschedule(*due_events)
+        return triggered_events
+
+    def _arm(self):
+        if self._timer_id:
+            self.widget.after_cancel(self._timer_id)
+            self._timer_id = None
+        # 作废的堆项过多时整体重建，防止频繁编辑后堆无限增长
+        if len(self._heap) > 2 * len(self._tokens) + 16:
+            self._heap = [entry for entry in self._heap if self._is_valid(entry)]
+            heapq.heapify(self._heap)
+        while self._heap and not self._is_valid(self._heap[0]):
+            heapq.heappop(self._heap)
+        wake_at = self._next_deadline() if self._heap else None
+        if self.source is not None:  # 按天查询时零点也要醒来，换成新一天的事件
+            wake_at = min(wake_at or datetime.max, datetime.combine(self._day + timedelta(days=1), dt_time()))
+        if wake_at is None: return
+        delay_ms = int((wake_at - datetime.now()).total_seconds() * 1000)
+        self._timer_id = self.widget.after(min(max(delay_ms, 0), self.MAX_TIMER_MS), self._on_timer)
+
+    def _next_deadline(self):
+        return datetime.combine(self._heap[0][0], dt_time(self.TRIGGER_HOUR))
+
+    def _on_timer(self):
+        self._timer_id = None
+        if self.source is not None and date.today() != self._day:
+            self.rebuild()  # 跨天：重新查询当天的事件 (rebuild 会重新挂定时器，并由下一次定时器触发)
+            return
+        if self._heap and datetime.now() >= self._next_deadline():
+            self.on_due()
+        self._arm()
+
+
+# ===================================================================
+# --- 【新增】刷新耗时统计 TickStats / 事件循环延迟探针 LagProbe ---
+# ===================================================================
+class TickStats:
+    """
+    按名称记录最近 WINDOW 次调用的耗时，按需计算 p50 / p99 和分桶直方图.
+    - 关闭时 instrument() 原样返回函数，被统计的代码没有任何额外开销。
+    - 只在界面线程使用，不加锁。
+    - add_counters() 登记的计数 (如标签更新次数) 随统计窗口与 dump() 一起输出。
+    """
+    WINDOW = 1000
+    BUCKETS_MS = (1, 5, 16, 50, 100)  # 直方图各桶的上界 (毫秒)，16ms 约为一帧
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._samples = {}
+        self._counters = {}
+
+    def _series(self, name):
+        return self._samples.setdefault(name, collections.deque(maxlen=self.WINDOW))
+
+    def instrument(self, name, func):
+        """返回记录耗时的包装函数；未启用时直接返回 func."""
+        if not self.enabled: return func
+        samples, perf_counter = self._series(name), time.perf_counter
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                samples.append(perf_counter() - start)
+        return timed
+
+    def record(self, name, seconds):
+        if self.enabled: self._series(name).append(seconds)
+
+    def add_counters(self, name, source):
+        """登记返回 {计数名: 数值} 的函数；只在查看或写出统计时调用."""
+        self._counters[name] = source
+
+    def counters(self):
+        return {name: source() for name, source in self._counters.items()}
+
+    def summary(self):
+        """{名称: {count, p50_ms, p99_ms, max_ms, histogram}}，histogram 与 BUCKETS_MS 对应，最后一桶为超出上界的部分."""
+        result = {}
+        for name, samples in self._samples.items():
+            if not samples: continue
+            ordered = [s * 1000 for s in sorted(samples)]
+            n = len(ordered)
+            histogram = [0] * (len(self.BUCKETS_MS) + 1)
+            for ms in ordered: histogram[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+            result[name] = {"count": n, "p50_ms": ordered[min(n - 1, n // 2)],
+                            "p99_ms": ordered[min(n - 1, int(n * 0.99))], "max_ms": ordered[-1],
+                            "histogram": histogram}
+        return result
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "window": self.WINDOW,
+                       "buckets_ms": list(self.BUCKETS_MS), "stats": self.summary(), "counters": self.counters()},
+                      f, indent=2, ensure_ascii=False)
+
+
+class LagProbe:
+    """
+    事件循环延迟探针：每隔 INTERVAL_MS 挂一个 after() 定时器，记录实际触发比预定时间晚了多少.
+    - 界面线程被长时间占用 (卡顿) 时延迟会明显变大；结果记入 TickStats 的 "loop_lag"。
+    """
+    INTERVAL_MS = 250
+
+    def __init__(self, widget, stats, name="loop_lag"):
+        self.widget = widget
+        self.stats = stats
+        self.name = name
+        self._timer_id = None
+        self._expected = None
+
+    def start(self):
+        if self._timer_id or not self.stats.enabled: return
+        self._expected = time.perf_counter() + self.INTERVAL_MS / 1000
+        self._timer_id = self.widget.after(self.INTERVAL_MS, self._fire)
+
+    def stop(self):
+        if self._timer_id: self.widget.after_cancel(self._timer_id)
+        self._timer_id = None
+
+    def _fire(self):
+        self._timer_id = None
+        self.stats.record(self.name, max(time.perf_counter() - self._expected, 0))
+        self.start()
+
+
+# ===================================================================
+# --- 【新增】界面刷新调度器 RefreshScheduler ---
+# ===================================================================
+def next_second(now):
+    """下一个整秒边界."""
+    return now.replace(microsecond=0) + timedelta(seconds=1)
+
+
+def next_midnight(now):
+    """下一个零点."""
+    return datetime.combine(now.date() + timedelta(days=1), dt_time())
+
+
+class RefreshScheduler:
+    """
+    按各面板自己的下一次变化时间刷新界面，取代固定 200ms 轮询.
+    - 每个面板登记刷新回调和 next_deadline(now) 函数 (返回 None 表示暂不需要刷新)。
+    - 循环只在最近的截止时间醒来，并稍晚于整秒边界，保证秒数显示准确跳变。
+    - invalidate() 让指定面板 (默认全部) 立即刷新，用于数据或设置变更之后。
+    - 窗口停靠为小图标时暂停界面面板 (ui=True)，只保留喝水提醒等后台面板。
+    - 传入启用的 TickStats 时记录每轮 ("tick") 与每个面板 ("panel.<名称>") 的耗时。
+    """
+    WAKEUP_SLACK_MS = 5
+    MAX_SLEEP_MS = 60 * 1000  # 最长睡眠一分钟，防止休眠或修改系统时间后长时间不刷新
+
+    def __init__(self, widget, stats=None):
+        self.widget = widget
+        self.stats = stats or TickStats()
+        self._panels = {}
+        self._timer_id = None
+        self.ui_paused = False
+        self.run = self.stats.instrument("tick", self.run)
+
+    def add_panel(self, name, callback, next_deadline, ui=True):
+        callback = self.stats.instrument(f"panel.{name}", callback)
+        self._panels[name] = {"callback": callback, "next_deadline": next_deadline, "ui": ui, "due": datetime.min}
+
+    def _active_panels(self):
+        return [p for p in self._panels.values() if not (p["ui"] and self.ui_paused)]
+
+    def invalidate(self, *names):
+        for name in names or self._panels:
+            self._panels[name]["due"] = datetime.min
+        self._arm()
+
+    def pause_ui(self):
+        self.ui_paused = True
+        self._arm()
+
+    def resume_ui(self):
+        self.ui_paused = False
+        self.invalidate(*[name for name, p in self._panels.items() if p["ui"]])
+
+    def run(self):
+        self._timer_id = None
+        now = datetime.now()
+        for panel in self._active_panels():
+            if panel["due"] is not None and panel["due"] <= now:
+                panel["callback"](now)
+                panel["due"] = panel["next_deadline"](now)
+        self._arm()
+
+    def _arm(self):
+        if self._timer_id:
+            self.widget.after_cancel(self._timer_id)
+            self._timer_id = None
+        deadlines = [p["due"] for p in self._active_panels() if p["due"] is not None]
+        if not deadlines: return
+        delay_ms = math.ceil((min(deadlines) - datetime.now()).total_seconds() * 1000)
+        delay_ms = min(delay_ms + self.WAKEUP_SLACK_MS, self.MAX_SLEEP_MS) if delay_ms > 0 else 0
+        self._timer_id = self.widget.after(delay_ms, self.run)
+
+
+# ===================================================================
+# --- 【新增】事件批量导入/导出 (iCalendar / CSV) ---
+# ===================================================================
+ICS_WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+CSV_FIELDS = ["id", "name", "enabled", "type", "value", "start_date", "repeat_total", "times_triggered",
+              "last_triggered_date"]
+
+
+def _iter_ics_lines(f):
+    """按 RFC 5545 展开折行 (以空格或制表符开头的行是上一行的续行)，逐行产出."""
+    pending = None
+    for raw in f:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None: yield pending
+        pending = line
+    if pending is not None: yield pending
+
+
+def _unescape_ics(text):
+    return (text.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",")
+            .replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def _escape_ics(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def ics_vevent_to_event_data(props, today=None):
+    """
+    把一个 VEVENT 的属性字典映射为 Event 数据；不支持的重复规则 (如按月/按年) 返回 None.
+    - 带 RECURRENCE-ID 的 VEVENT 是系列中单次改期的实例，与系列共用 UID，导入会覆盖整个系列，因此跳过。
+    - COUNT / UNTIL 从 DTSTART 起计算，换算为今天 (或更晚的 DTSTART) 起的剩余次数；已经结束的系列返回 None。
+    - 带 BYDAY 的 FREQ=DAILY (如只在工作日) 等价于每周这几天。
+    """
+    if "RECURRENCE-ID" in props: return None
+    dtstart = props.get("DTSTART", "")[:8]
+    try:
+        start = datetime.strptime(dtstart, "%Y%m%d").date()
+    except ValueError:
+        return None
+    data = {"name": _unescape_ics(props.get("SUMMARY", "")).strip() or "未命名事件",
+            "enabled": props.get("STATUS", "").upper() != "CANCELLED",
+            "start_date": start.strftime("%Y-%m-%d"), "last_triggered_date": None}
+    uid = props.get("UID", "").strip()
+    if uid: data["id"] = uid
+    rrule = dict(part.split("=", 1) for part in props.get("RRULE", "").split(";") if "=" in part)
+    if not rrule:
+        data["trigger"] = {"type": "date", "value": start.strftime("%Y-%m-%d")}
+        data["repeat"] = {"total": 1, "triggered": 0}
+        return data
+    interval = int(rrule.get("INTERVAL", "1") or 1)
+    weekdays = sorted({str(ICS_WEEKDAYS.index(d[-2:])) for d in rrule.get("BYDAY", "").split(",")
+                       if d[-2:] in ICS_WEEKDAYS})
+    if rrule.get("FREQ") == "DAILY" and not weekdays:
+        data["trigger"] = {"type": "interval", "value": str(interval)}
+    elif rrule.get("FREQ") == "DAILY" and interval == 1:
+        data["trigger"] = {"type": "weekly", "value": weekdays}
+    elif rrule.get("FREQ") == "WEEKLY" and interval == 1:
+        data["trigger"] = {"type": "weekly", "value": weekdays or [str(start.weekday())]}
+    elif rrule.get("FREQ") == "WEEKLY" and len(weekdays) <= 1:
+        # 隔 n 周的同一天，等价于每 7n 天一次；起点对齐到 DTSTART 当天或之后第一个 BYDAY 指定的星期
+        if weekdays: start += timedelta(days=(int(weekdays[0]) - start.weekday()) % 7)
+        data["start_date"] = start.strftime("%Y-%m-%d")
+        data["trigger"] = {"type": "interval", "value": str(7 * interval)}
+    else:
+        return None
+    data["repeat"] = {"total": -1, "triggered": 0}
+    if "COUNT" not in rrule and not rrule.get("UNTIL"): return data
+    today = today or date.today()
+    series = Event(data)
+    remaining = []
+    if "COUNT" in rrule:  # 减去 DTSTART 到昨天已经发生过的次数
+        count = int(rrule["COUNT"])
+        remaining.append(count - sum(1 for _ in itertools.islice(iter_occurrences_between(series, start, today), count)))
+    if rrule.get("UNTIL"):
+        until = datetime.strptime(rrule["UNTIL"][:8], "%Y%m%d").date()
+        remaining.append(sum(1 for _ in iter_occurrences_between(series, today, until + timedelta(days=1))))
+    if min(remaining) <= 0: return None
+    data["repeat"]["total"] = min(remaining)
+    return data
+
+
+def iter_ics_events(path, stats=None):
+    """流式读取 .ics 文件，逐个产出 Event 数据字典；stats (字典) 用于统计跳过的条目."""
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        props = None
+        for line in _iter_ics_lines(f):
+            if line == "BEGIN:VEVENT":
+                props = {}
+            elif line == "END:VEVENT" and props is not None:
+                try:
+                    data = ics_vevent_to_event_data(props)
+                except ValueError:  # INTERVAL / COUNT / UNTIL 格式不对
+                    data = None
+                if data is not None:
+                    yield data
+                elif stats is not None:
+                    stats["skipped"] = stats.get("skipped", 0) + 1
+                props = None
+            elif props is not None and ":" in line:
+                key, value = line.split(":", 1)
+                props.setdefault(key.split(";", 1)[0].upper(), value)
+
+
+def iter_csv_events(path, stats=None):
+    """流式读取 CSV 文件 (表头见 CSV_FIELDS，按周循环的取值用 | 分隔)，逐个产出 Event 数据字典."""
+    import csv
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            trigger_type = (row.get("type") or "date").strip()
+            value = (row.get("value") or "").strip()
+            data = {"name": (row.get("name") or "").strip() or "未命名事件",
+                    "enabled": (row.get("enabled") or "true").strip().lower() not in ("0", "false", "no", "否"),
+                    "trigger": {"type": trigger_type, "value": value.split("|") if trigger_type == "weekly" else value},
+                    "start_date": (row.get("start_date") or "").strip() or None,
+                    "last_triggered_date": (row.get("last_triggered_date") or "").strip() or None,
+                    "repeat": {"total": (row.get("repeat_total") or "1").strip(),
+                               "triggered": (row.get("times_triggered") or "0").strip()}}
+            if (row.get("id") or "").strip(): data["id"] = row["id"].strip()
+            yield data
+
+
+def iter_valid_events(records, stats=None):
+    """把数据字典转换为 Event，丢弃无法解析的记录 (包括规则编译为 None 的事件，如间隔为 0 或日期不存在)."""
+    for data in records:
+        try:
+            event = Event(data)
+        except (ValueError, TypeError, AttributeError):
+            event = None
+        if event is not None and event._rule is not None:
+            yield event
+        elif stats is not None:
+            stats["skipped"] = stats.get("skipped", 0) + 1
+
+
+def iter_batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+
+def import_events_from_file(path, commit_batch, batch_size=500, progress=None, stats=None):
+    """
+    按扩展名选择解析器，把事件分批交给 commit_batch 提交.
+    - 本身是生成器：每提交一批产出一次已导入数量，调用方可以逐步驱动 (如每次 after() 只推进一批)，
+      读取、解析、提交都是流式的，内存中只保留一个批次。
+    - progress(已导入数量) 在每批提交后调用；stats 中的 imported / skipped 记录导入结果。
+    """
+    stats = {} if stats is None else stats
+    stats.setdefault("imported", 0)
+    records = iter_ics_events(path, stats) if path.lower().endswith(".ics") else iter_csv_events(path, stats)
+    for batch in iter_batches(iter_valid_events(records, stats), batch_size):
+        commit_batch(batch)
+        stats["imported"] += len(batch)
+        if progress: progress(stats["imported"])
+        yield stats["imported"]
+
+
+def export_events(events, path, stats=None):
+    """
+    按扩展名导出为 .ics 或 CSV，逐条写出.
+    - 规则无法解析的事件 (如手工改坏的数据文件) 跳过不写，stats 中的 exported / skipped 记录导出结果。
+    """
+    stats = {} if stats is None else stats
+    stats.update(exported=0, skipped=0)
+
+    def valid_events():
+        for event in events:
+            if event._rule is None:
+                stats["skipped"] += 1
+                continue
+            stats["exported"] += 1
+            yield event
+
+    if path.lower().endswith(".ics"):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//FishCatcher//CN\r\n")
+            for event in valid_events():
+                f.writelines(line + "\r\n" for line in event_to_ics_lines(event))
+            f.write("END:VCALENDAR\r\n")
+    else:
+        import csv
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            for event in valid_events():
+                value = "|".join(event.trigger_value) if event.trigger_type == "weekly" else event.trigger_value
+                writer.writerow([event.id, event.name, event.enabled, event.trigger_type, value,
+                                 event.start_date.strftime("%Y-%m-%d"), event.repeat_total, event.times_triggered,
+                                 event.last_triggered_date.strftime("%Y-%m-%d") if event.last_triggered_date else ""])
+
+
+def event_to_ics_lines(event):
+    """
+    按已编译的规则 (event._rule) 生成 VEVENT，调用方需先排除规则无效 (_rule 为 None) 的事件.
+    - 有次数限制的重复事件导出剩余次数，DTSTART 取下一次发生日期，再次导入时不会重置进度。
+    """
+    start = event.start_date
+    rrule = None
+    if event.trigger_type == "date":
+        start = event._rule
+    elif event.trigger_type == "interval":
+        rrule = f"FREQ=DAILY;INTERVAL={event._rule}"
+    elif event.trigger_type == "weekly":
+        rrule = "FREQ=WEEKLY;BYDAY=" + ",".join(ICS_WEEKDAYS[d] for d in range(7) if event._rule >> d & 1)
+    if rrule and event.repeat_total != -1:
+        next_occurrence = event.get_occurrences(1)
+        if next_occurrence:
+            start = next_occurrence[0]
+            rrule += f";COUNT={event.repeat_total - event.times_triggered}"
+        else:  # 已经结束：按原始次数导出，导入时会算出没有剩余而跳过
+            rrule += f";COUNT={event.repeat_total}"
+    lines = ["BEGIN:VEVENT", f"UID:{event.id}", f"DTSTAMP:{datetime.now().strftime('%Y%m%dT%H%M%S')}",
+             f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}", f"SUMMARY:{_escape_ics(event.name)}"]
+    if rrule: lines.append(f"RRULE:{rrule}")
+    if not event.enabled: lines.append("STATUS:CANCELLED")
+    lines.append("END:VEVENT")
+    return lines
+
+
+
+# ===================================================================
+# --- 【新增】语录库 MottoCorpus ---
+# ===================================================================
+def shuffled_index(position, count, key):
+    """
+    以 key 为种子的 [0, count) 伪随机排列中第 position 个元素 (四轮 Feistel 网络 + 循环行走).
+    - 同一个 key 下 position 取 0..count-1 时结果互不重复，洗牌状态只需保存 (key, position)。
+    """
+    half = max(1, ((count - 1).bit_length() + 1) // 2)
+    mask = (1 << half) - 1
+    x = position
+    while True:
+        left, right = x >> half, x & mask
+        for round_no in range(4):
+            f = (right * 0x9E3779B1 + key + round_no * 0x85EBCA6B) & 0xFFFFFFFF
+            f = ((f ^ (f >> 15)) * 0x2C1B3C6D) & 0xFFFFFFFF
+            left, right = right, left ^ ((f ^ (f >> 12)) & mask)
+        x = (left << half) | right
+        if x < count: return x  # 落在 [count, 2^(2*half)) 时继续迭代，最终必回到范围内
+
+
+class MottoCorpus:
+    """
+    外部语录文件 (UTF-8 文本，每行一条，忽略空行和 # 开头的注释行) 的随机读取与不重复抽取.
+    - 偏移索引 (每条语录的起始字节位置) 保存在用户数据目录，索引头记录语录文件的大小、修改时间和 SHA-1。
+    - 大小和修改时间与索引头一致时直接使用索引，不读语录文件；不一致时才计算 SHA-1 判断是否需要重建。
+    - 抽取时用 mmap 只读取并解码选中的一行；文件不常驻打开，运行中也可以直接替换语录文件。
+    - 洗牌袋：一轮内每条语录只出现一次，(key, position) 每抽取 STATE_SAVE_EVERY 次及 close() 时写入状态文件，
+      重启后继续同一轮。
+    - 每次抽取前检查语录文件的修改时间和大小，变化后自动重新索引。
+    """
+    INDEX_MAGIC = b"FCMI"
+    INDEX_HEADER = struct.Struct("<4sIQq20sQ")  # 魔数、版本、语录文件大小、修改时间 (ns)、SHA-1、语录条数
+    INDEX_VERSION = 2
+    STATE_SAVE_EVERY = 10
+
+    def __init__(self, corpus_path, index_path=None, state_path=None):
+        self.corpus_path = corpus_path
+        self.index_path = index_path or get_user_data_path("fish_catcher_mottos.idx")
+        self.state_path = state_path or get_user_data_path("fish_catcher_mottos_state.json")
+        self.count = 0
+        self._stat = None
+        self._digest = None
+        self._key = 0
+        self._position = 0
+        self._unsaved = 0  # 距上次写状态文件后抽取的次数
+
+    def __len__(self):
+        self._refresh()
+        return self.count
+
+    def next(self):
+        """按洗牌袋顺序取下一条语录；语录文件不可用时返回默认语录."""
+        self._refresh()
+        if not self.count: return DEFAULT_MOTTO
+        if self._position >= self.count: self._new_bag()
+        i = shuffled_index(self._position, self.count, self._key)
+        self._position += 1
+        self._unsaved += 1
+        if self._unsaved >= self.STATE_SAVE_EVERY: self.flush()
+        try:
+            return self.get(i) or DEFAULT_MOTTO
+        except (OSError, ValueError, struct.error) as e:
+            print(f"警告: 读取语录失败: {e}")
+            return DEFAULT_MOTTO
+
+    def flush(self):
+        """把未保存的抽取进度写入状态文件."""
+        if self._unsaved and self._digest is not None: self._save_state()
+        self._unsaved = 0
+
+    def close(self):
+        self.flush()
+
+    def get(self, i):
+        """第 i 条语录：先从索引取起始偏移，再从语录文件中读出这一行."""
+        import mmap
+        with open(self.index_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            (start,) = struct.unpack_from("<Q", index, self.INDEX_HEADER.size + 8 * i)
+        with open(self.corpus_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as corpus:
+            end = corpus.find(b"\n", start)
+            return corpus[start:end if end != -1 else len(corpus)].decode('utf-8', errors='replace').strip()
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.corpus_path)
+        except OSError:
+            self.count, self._stat = 0, None
+            return
+        stat = (st.st_size, st.st_mtime_ns)
+        if stat == self._stat: return
+        self._stat = stat
+        header = self._read_index_header()
+        if header and header[:2] == stat:
+            digest, count = header[2:]  # 索引与语录文件一致，不需要读语录文件
+        else:
+            digest = self._file_digest()
+            if header and header[2] == digest:  # 只是修改时间变了 (如被重新解压)，内容相同
+                count = header[3]
+                self._write_index_header(stat, digest, count)
+            else:
+                count = self._build_index(stat, digest)
+        if digest == self._digest: return
+        self.flush()
+        self._digest, self.count = digest, count
+        self._load_state()
+
+    def _file_digest(self):
+        import hashlib
+        sha1 = hashlib.sha1()
+        with open(self.corpus_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""): sha1.update(block)
+        return sha1.digest()
+
+    def _read_index_header(self):
+        """索引有效时返回 (大小, 修改时间, SHA-1, 语录条数)，否则返回 None."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, version, *header = self.INDEX_HEADER.unpack(f.read(self.INDEX_HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if (magic, version) != (self.INDEX_MAGIC, self.INDEX_VERSION): return None
+        return tuple(header)
+
+    def _write_index_header(self, stat, digest, count):
+        try:
+            with open(self.index_path, 'r+b') as f:
+                f.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, self.INDEX_VERSION, *stat, digest, count))
+        except OSError as e:
+            print(f"警告: 更新语录索引失败: {e}")
+
+    def _build_index(self, stat, digest):
+        offsets = array('Q')
+        with open(self.corpus_path, 'rb') as f:
+            position = 0
+            for line in f:
+                start = position
+                position += len(line)
+                if start == 0 and line.startswith(b"\xef\xbb\xbf"):  # UTF-8 BOM
+                    start, line = 3, line[3:]
+                text = line.strip()
+                if text and not text.startswith(b"#"): offsets.append(start)
+        if sys.byteorder == "big": offsets.byteswap()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, self.INDEX_VERSION, *stat, digest, len(offsets)))
+            f.write(offsets.tobytes())
+        os.replace(tmp_path, self.index_path)
+        return len(offsets)
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            state = {}
+        if state.get("digest") == self._digest.hex() and state.get("count") == self.count:
+            self._key, self._position = int(state.get("key", 0)), int(state.get("position", 0))
+        else:
+            self._new_bag()  # 语录文件换了：重新开始一轮
+        self._unsaved = 0
+
+    def _new_bag(self):
+        import random
+        self._key, self._position = random.getrandbits(32), 0
+
+    def _save_state(self):
+        state = {"digest": self._digest.hex(), "count": self.count, "key": self._key, "position": self._position}
+        try:
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"警告: 保存语录抽取进度失败: {e}")
+
+
+# ===================================================================
+# --- 【新增】单实例保护与本地命令转发 InstanceGuard ---
+# ===================================================================
+INSTANCE_LOCK_FILE = get_user_data_path("fish_catcher.lock")
+INSTANCE_INFO_FILE = get_user_data_path("fish_catcher_instance.json")
+
+
+def _try_lock(f):
+    """对已打开的文件加非阻塞的排他锁；已被其他进程锁住时抛出 OSError."""
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _recv_line(conn, limit=65536):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(4096)
+        if not chunk: break
+        data += chunk
+        if len(data) > limit: raise ValueError("请求过长")
+    return data.decode("utf-8")
+
+
+class InstanceGuard:
+    """
+    单实例保护：用户数据目录中的锁文件决定谁是主实例，主实例在 127.0.0.1 上监听本地命令.
+    - 锁由操作系统持有，进程退出 (包括崩溃) 后自动释放，不会留下失效的锁。
+    - 监听端口和随机口令写在 INSTANCE_INFO_FILE 中，请求必须带上口令。
+    - 每个连接收发一行 JSON：{"token", "command"} -> {"ok", ...}；handler 在监听线程中调用，
+      需要操作界面时由 handler 自己通过 widget.after() 回到 Tk 主线程。
+    """
+
+    def __init__(self, lock_path=INSTANCE_LOCK_FILE, info_path=INSTANCE_INFO_FILE):
+        self.lock_path = lock_path
+        self.info_path = info_path
+        self.token = None
+        self._lock_file = None
+        self._server = None
+        self._handler = None
+
+    def acquire(self):
+        """尝试成为主实例；已有实例在运行时返回 False."""
+        f = open(self.lock_path, "a+")
+        try:
+            _try_lock(f)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def serve(self, handler):
+        """acquire 成功后开始监听，handler(command, request) 返回要回复的字典."""
+        import secrets
+        import socket
+        import threading
+        self._handler = handler
+        self.token = secrets.token_hex(16)
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(4)
+        info = {"pid": os.getpid(), "port": self._server.getsockname()[1], "token": self.token}
+        tmp_path = self.info_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        os.replace(tmp_path, self.info_path)
+        threading.Thread(target=self._run, name="InstanceGuard", daemon=True).start()
+
+    def _run(self):
+        import hmac
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return  # close() 关闭了监听
+            with conn:
+                conn.settimeout(2)
+                try:
+                    request = json.loads(_recv_line(conn))
+                    if not hmac.compare_digest(str(request.get("token", "")), self.token):
+                        reply = {"ok": False, "error": "口令不正确"}
+                    else:
+                        reply = self._handler(request.get("command"), request)
+                except Exception as e:  # 单个连接出错 (包括 handler 的异常) 不能让监听线程退出，否则锁还在却没人应答
+                    print(f"警告: 处理本地命令失败: {e!r}")
+                    reply = {"ok": False, "error": str(e)}
+                try:
+                    conn.sendall((json.dumps(reply, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                except OSError:
+                    pass
+
+    def close(self):
+        if self._server:
+            self._server.close()
+            self._server = None
+            try:
+                os.remove(self.info_path)
+            except OSError:
+                pass
+        if self._lock_file:
+            self._lock_file.close()  # 关闭文件即释放锁
+            self._lock_file = None
+
+
+def send_to_running_instance(command, wait=5.0, info_path=INSTANCE_INFO_FILE, **fields):
+    """
+    把命令转发给正在运行的主实例，返回其回复；没有可连接的实例时返回 None.
+    - 主实例可能刚启动、还没开始监听，wait 秒内会重试连接；连上之后命令只发送一次。
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            with open(info_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            import socket  # 放在读到实例信息之后：没有运行中的实例时不必导入
+            conn = socket.create_connection(("127.0.0.1", info["port"]), timeout=2)
+            break
+        except (OSError, ValueError, KeyError, TypeError):
+            if time.monotonic() >= deadline: return None
+            time.sleep(0.1)
+    with conn:
+        try:
+            request = dict(fields, token=info["token"], command=command)
+            conn.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+            return json.loads(_recv_line(conn))
+        except (OSError, ValueError):
+            return None
+
+
+# ===================================================================
+# --- 【新增】默认数据与倒计时计算 (纯函数) ---
+# ===================================================================
+DEFAULT_SETTINGS = {"payday_rule": "10", "work_end_time": "18:00:00", "reminder_interval": 60, "reminder_enabled": True}
+DEFAULT_MOTTO = "加油，摸鱼人！"
+
+
+def default_app_data(today=None):
+    """首次运行时的默认数据：默认设置和一个明年元旦事件."""
+    new_year = f"{(today or date.today()).year + 1}-01-01"
+    default_event_data = {"name": "元旦", "enabled": True, "start_date": new_year, "last_triggered_date": None,
+                          "trigger": {"type": "date", "value": new_year}, "repeat": {"total": 1, "triggered": 0}}
+    return {"events": [default_event_data], "settings": dict(DEFAULT_SETTINGS)}
+
+
+def work_countdown(now, deadline):
+    """距离下班的 (时, 分, 秒)；已经下班返回 None."""
+    if now > deadline: return None
+    h, rem = divmod((deadline - now).seconds, 3600)
+    m, s = divmod(rem, 60)
+    return h, m, s
+
+
+def weekend_countdown(day, workdays=None):
+    """
+    按工作日历 (默认 WORKDAY_CALENDAR) 返回 (状态, 天数).
+    - 上班日为 ('workday', 距离下一个休息日的天数)；休息日为 ('rest', 0)，休息日且明天上班为 ('last_rest', 0)。
+    """
+    workdays = workdays or WORKDAY_CALENDAR
+    if workdays.is_workday(day):
+        rest_day = workdays.next_day(day, workday=False)
+        return "workday", (rest_day - day).days if rest_day else 0
+    return ("last_rest" if workdays.is_workday(day + timedelta(days=1)) else "rest"), 0
+
+
+def event_countdown(event, today):
+    """
+    事件的倒计时状态，返回 (状态, 天数)：'today' / 'upcoming' / 'ended'.
+    - 使用 _calculate_next 得到当前或未来的下一次发生日期，今天已触发的事件全天显示为 'today'。
+    """
+    next_occurrence = OCCURRENCE_CACHE.next_occurrence(event, today)
+    if not next_occurrence:
+        return ("today", 0) if event.last_triggered_date == today else ("ended", None)
+    days = (next_occurrence - today).days
+    return ("today" if days == 0 else "upcoming"), days
+
+
+# ===================================================================
+# --- 【新增】状态摘要与命令行 status ---
+# ===================================================================
+def app_status(settings, events, now=None, limit=3, workdays=None):
+    """
+    下班倒计时、周末与发薪天数、最近 limit 个事件的摘要 (可直接序列化为 JSON).
+    - work.state：'working' (带剩余秒数) / 'off' 已下班 / 'rest' 休息日 / 'invalid' 下班时间格式错误。
+    """
+    now = now or datetime.now()
+    workdays = workdays or WORKDAY_CALENDAR
+    today = now.date()
+    deadline = settings.work_end_deadline(today)
+    remaining = work_countdown(now, deadline) if deadline else None
+    if not workdays.is_workday(today): work = {"state": "rest"}
+    elif deadline is None: work = {"state": "invalid"}
+    elif remaining is None: work = {"state": "off"}
+    else:
+        h, m, s = remaining
+        work = {"state": "working", "seconds": h * 3600 + m * 60 + s, "text": f"{h:02d}:{m:02d}:{s:02d}"}
+    weekend_state, weekend_days = weekend_countdown(today, workdays)
+    upcoming = []
+    for event in events:
+        if not event.enabled: continue
+        state, days = event_countdown(event, today)
+        if state != "ended": upcoming.append((days, event))
+    return {"time": now.isoformat(timespec="seconds"), "work": work,
+            "weekend": {"state": weekend_state, "days": weekend_days},
+            "payday": {"days": settings.payday.days_until(today), "next": settings.payday.next_payout(today).isoformat()},
+            "events": [{"id": e.id, "name": e.name, "days": days, "date": (today + timedelta(days=days)).isoformat(),
+                        "rule": e.get_rule_text()}
+                       for days, e in heapq.nsmallest(limit, upcoming, key=lambda item: item[0])]}
+
+
+def format_status(status):
+    """把 app_status 的结果格式化为一行文字，适合放在终端提示符或状态栏中."""
+    work = status["work"]
+    parts = [{"working": f"下班 {work.get('text')}", "off": "已下班", "rest": "休息日",
+              "invalid": "下班时间格式不对"}[work["state"]]]
+    weekend = status["weekend"]
+    parts.append(f"周末 {weekend['days']} 天" if weekend["state"] == "workday" else "休息中")
+    parts.append("今天发薪" if status["payday"]["days"] == 0 else f"发薪 {status['payday']['days']} 天")
+    for event in status["events"]:
+        parts.append(f"{event['name']} 今天" if event["days"] == 0 else f"{event['name']} {event['days']} 天")
+    return " | ".join(parts)
+
+
+def read_event_store(default_data):
+    """按 open_event_store 的规则选择数据文件，只读地读取事件与设置."""
+    return open_event_store().peek(default_data)
+
+
+STATUS_USAGE = """用法: fish_catcher.py status [--json] [-n N] [--local]
+  --json      以 JSON 格式输出
+  -n N        显示最近的 N 个事件 (默认 3)
+  --local     不查询运行中的实例，直接读取数据文件"""
+
+
+def status_main(argv=None):
+    """
+    命令行 fish_catcher.py status [--json] [-n N] [--local].
+    - 优先向运行中的实例查询 (数据最新)；没有实例时直接只读地读取数据文件计算，全程不导入界面相关的库。
+    """
+    # 只有三个选项，手工解析：导入 argparse 本身就要十几毫秒
+    argv = list(sys.argv[2:] if argv is None else argv)
+    if "-h" in argv or "--help" in argv:
+        print(STATUS_USAGE)
+        return 0
+    as_json, local, limit = "--json" in argv, "--local" in argv, 3
+    unknown = [a for a in argv if a not in ("--json", "--local")]
+    if unknown[:1] in (["-n"], ["--events"]) and len(unknown) >= 2 and unknown[1].isdigit():
+        limit, unknown = int(unknown[1]), unknown[2:]
+    if unknown:
+        print(STATUS_USAGE, file=sys.stderr)
+        return 2
+
+    status = None
+    if not local:
+        reply = send_to_running_instance("status", wait=0, limit=limit)
+        if reply and reply.get("ok"): status = dict(reply["status"], source="instance")
+    if status is None:
+        WORKDAY_CALENDAR.load(default_holidays_path())
+        data = read_event_store(default_app_data())
+        settings = AppSettings()
+        settings.load(data.get("settings", DEFAULT_SETTINGS))
+        status = dict(app_status(settings, [Event(d) for d in data.get("events", [])], limit=limit),
+                      source="file")
+    print(json.dumps(status, ensure_ascii=False) if as_json else format_status(status))
+    return 0
+
+
+if __name__ == "__main__":
+    # python -m fish_core status：与 fish_catcher.py status 相同，但不用每次编译界面脚本，适合放进终端提示符
+    if sys.argv[1:2] != ["status"]: sys.exit(STATUS_USAGE)
+    sys.exit(status_main(sys.argv[2:]))
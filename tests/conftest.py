@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# fish_core 导入时就会确定用户数据目录，测试期间指向临时目录，避免写进真实的 AppData
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="fish_tests_")
+
+import fish_core  # noqa: E402
+
+HOLIDAYS_PATH = os.path.join(ROOT, "holidays.txt")
+
+
+@pytest.fixture
+def holidays():
+    """加载仓库自带的节假日数据，测试结束后恢复为默认的周一至周五."""
+    fish_core.WORKDAY_CALENDAR.load(HOLIDAYS_PATH)
+    fish_core.OCCURRENCE_CACHE.invalidate()
+    yield fish_core.WORKDAY_CALENDAR
+    fish_core.WORKDAY_CALENDAR.load(os.path.join(ROOT, "no_such_holidays.txt"))
+    fish_core.OCCURRENCE_CACHE.invalidate()
+
+
+class FakeWidget:
+    """调度器只需要 after / after_cancel."""
+
+    def after(self, ms, callback, *args):
+        return "timer"
+
+    def after_cancel(self, timer_id):
+        pass
+
+
+class FakeLabel:
+    """只记录 config() 调用；str() 与 Tk 控件一样返回唯一的路径名."""
+
+    def __init__(self, name):
+        self.name = name
+        self.configs = []
+
+    def __str__(self):
+        return self.name
+
+    def config(self, **options):
+        self.configs.append(options)
+
+
+def make_event(trigger_type, value, start="2026-01-01", **extra):
+    data = {"name": extra.pop("name", "事件"), "enabled": True, "start_date": start, "last_triggered_date": None,
+            "trigger": {"type": trigger_type, "value": value}, "repeat": {"total": -1, "triggered": 0}}
+    data.update(extra)
+    return fish_core.Event(data)
@@ -0,0 +1,47 @@
+"""FishCatcherApp 中不需要显示器的事件增删逻辑：用替身对象调用未绑定的方法."""
+import types
+
+import pytest
+
+pytest.importorskip("ttkbootstrap")
+
+import fish_catcher  # noqa: E402
+import fish_core  # noqa: E402
+from conftest import FakeWidget, make_event  # noqa: E402
+
+
+def make_app(events):
+    saved = []
+    app = types.SimpleNamespace(event_objects=list(events), events_by_id={e.id: e for e in events},
+                                trigger_scheduler=fish_core.TriggerScheduler(FakeWidget(), lambda: None),
+                                save_data=lambda events=(), deleted=(), settings=False: saved.append(list(events)),
+                                refreshes=[])
+    app.update_event_display = lambda: app.refreshes.append("events")
+    app.trigger_scheduler.rebuild(app.event_objects)
+    return app, saved
+
+
+def test_put_events_refreshes_panel():
+    event = make_event("interval", "1")
+    app, saved = make_app([])
+    fish_catcher.FishCatcherApp.put_events(app, [event])
+    assert app.event_objects == [event] and saved == [[event]]
+    assert app.refreshes == ["events"]
+
+
+def test_remove_event_refreshes_panel():
+    event = make_event("interval", "1")
+    app, _ = make_app([event])
+    fish_catcher.FishCatcherApp.remove_event(app, event)
+    assert app.event_objects == [] and app.refreshes == ["events"]
+
+
+def test_put_events_keeps_last_object_for_duplicate_ids():
+    original = make_event("interval", "1", id="dup")
+    app, saved = make_app([original])
+    first, last = make_event("interval", "2", id="dup"), make_event("interval", "3", id="dup")
+    fish_catcher.FishCatcherApp.put_events(app, [first, last])
+    assert app.event_objects == [last]
+    assert app.events_by_id == {"dup": last}
+    assert saved == [[last]]
+    assert set(app.trigger_scheduler._tokens) == {last}  # 被替换的对象不会再进入触发堆
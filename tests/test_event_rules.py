@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+from conftest import make_event
+
+
+def test_interval_rule_is_anchored_on_start_date():
+    event = make_event("interval", "3", start="2026-01-01")
+    assert event._calculate_next(date(2026, 1, 2)) == date(2026, 1, 4)
+    assert event._calculate_next(date(2026, 1, 4)) == date(2026, 1, 4)
+    assert event._calculate_next(date(2025, 12, 1)) == date(2026, 1, 1)
+
+
+def test_weekly_rule_picks_next_selected_weekday():
+    event = make_event("weekly", ["0", "4"])  # 周一、周五
+    assert event._calculate_next(date(2026, 10, 17)) == date(2026, 10, 19)
+    assert event._calculate_next(date(2026, 10, 20)) == date(2026, 10, 23)
+
+
+def test_weekly_rule_does_not_fire_before_start_date():
+    event = make_event("weekly", ["0"], start="2026-11-04")  # 周三开始
+    assert event._calculate_next(date(2026, 10, 19)) == date(2026, 11, 9)
+
+
+def test_invalid_rules_compile_to_none():
+    assert make_event("interval", "abc")._rule is None
+    assert make_event("interval", "0")._rule is None
+    assert make_event("date", "2026-02-30")._rule is None
+    assert make_event("weekly", [])._rule is None
+    assert make_event("weekly", ["9"])._calculate_next(date(2026, 1, 1)) is None
+
+
+def test_changing_the_rule_recompiles_it():
+    event = make_event("interval", "3")
+    event.trigger_value = "5"
+    assert event._rule == 5
+    event.trigger_type, event.trigger_value = "weekly", ["1", "6"]
+    assert event._rule == 0b1000010
+    assert event.to_dict()["trigger"] == {"type": "weekly", "value": ["1", "6"]}  # 原始值原样保存
+
+
+def test_rule_text():
+    assert make_event("date", "2026-12-01").get_rule_text() == "特定日期: 2026-12-01"
+    assert make_event("interval", "3").get_rule_text() == "每 3 天"
+    event = make_event("weekly", ["4", "0"])
+    assert event.get_rule_text() == "每周 周一、周五"
+    event.workdays_only = True
+    assert event.get_rule_text() == "每周 周一、周五 (仅工作日)"
+
+
+def test_events_have_no_instance_dict():
+    event = make_event("interval", "1")
+    with pytest.raises(AttributeError):
+        event.unknown = 1
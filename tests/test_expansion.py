@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+import pytest
+
+import fish_core
+from conftest import make_event
+
+START = date(2026, 9, 1)
+
+
+def sample_events():
+    events = [make_event("interval", "5"), make_event("weekly", ["1", "3"]), make_event("date", "2026-12-01"),
+              make_event("weekly", ["2"], start="2026-11-01"), make_event("interval", "1", enabled=False),
+              make_event("interval", "2", repeat={"total": 3, "triggered": 3})]
+    workday_event = make_event("weekly", ["0", "1", "2", "3", "4"])
+    workday_event.workdays_only = True
+    events.append(workday_event)
+    return events
+
+
+def test_python_expansion_matches_get_occurrences():
+    event = make_event("weekly", ["0", "4"])
+    days = list(fish_core.iter_occurrences_between(event, date.today(), date.today() + timedelta(days=30)))
+    assert days[:2] == event.get_occurrences(2)
+
+
+def test_numpy_expansion_matches_python_expansion(holidays):
+    pytest.importorskip("numpy")
+    events = sample_events()
+    expanded = fish_core.expand_occurrences(events, START, 120)
+    assert all(event.enabled for event in expanded)
+    for event in expanded:
+        expected = list(fish_core.iter_occurrences_between(event, START, START + timedelta(days=120)))
+        assert expanded[event].tolist() == expected
+
+
+def test_counts_per_day_add_up(holidays):
+    pytest.importorskip("numpy")
+    events = sample_events()
+    counts = fish_core.occurrence_counts_per_day(events, START, 60)
+    assert len(counts) == 60
+    assert counts.sum() == sum(len(list(fish_core.iter_occurrences_between(e, START, START + timedelta(days=60))))
+                               for e in events if e.enabled)
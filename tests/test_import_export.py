@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import fish_core
+from conftest import make_event
+
+TODAY = date(2026, 10, 18)
+SERIES = {"UID": "series-1", "DTSTART": "20261006", "SUMMARY": "周二例会", "RRULE": "FREQ=WEEKLY;BYDAY=TU"}
+
+
+def import_file(path):
+    events, stats = [], {}
+    for _ in fish_core.import_events_from_file(str(path), events.extend, stats=stats): pass
+    return events, stats
+
+
+def test_recurrence_id_override_does_not_replace_series(tmp_path):
+    path = tmp_path / "cal.ics"
+    path.write_text("BEGIN:VCALENDAR\r\n"
+                    "BEGIN:VEVENT\r\nUID:series-1\r\nDTSTART;VALUE=DATE:20261006\r\nSUMMARY:周二例会\r\n"
+                    "RRULE:FREQ=WEEKLY;BYDAY=TU\r\nEND:VEVENT\r\n"
+                    "BEGIN:VEVENT\r\nUID:series-1\r\nRECURRENCE-ID;VALUE=DATE:20261013\r\n"
+                    "DTSTART;VALUE=DATE:20261014\r\nSUMMARY:周二例会 (改期)\r\nEND:VEVENT\r\n"
+                    "END:VCALENDAR\r\n", encoding="utf-8")
+    events, stats = import_file(path)
+    assert [(e.id, e.trigger_type) for e in events] == [("series-1", "weekly")]
+    assert stats["skipped"] == 1
+
+
+def test_until_becomes_remaining_repeat_count():
+    data = fish_core.ics_vevent_to_event_data(dict(SERIES, RRULE="FREQ=WEEKLY;BYDAY=TU;UNTIL=20261110T000000Z"),
+                                              today=TODAY)
+    assert data["repeat"]["total"] == 4  # 10-20、10-27、11-3、11-10
+    ended = dict(SERIES, RRULE="FREQ=WEEKLY;BYDAY=TU;UNTIL=20261001")
+    assert fish_core.ics_vevent_to_event_data(ended, today=TODAY) is None
+
+
+def test_biweekly_byday_is_anchored_on_that_weekday():
+    data = fish_core.ics_vevent_to_event_data(dict(SERIES, RRULE="FREQ=WEEKLY;INTERVAL=2;BYDAY=FR"), today=TODAY)
+    assert data["start_date"] == "2026-10-09"
+    event = fish_core.Event(data)
+    assert all(d.weekday() == 4 for d in fish_core.iter_occurrences_between(event, TODAY, TODAY + timedelta(days=60)))
+
+
+def test_count_subtracts_occurrences_before_today():
+    ended = {"UID": "daily", "DTSTART": "20251001", "RRULE": "FREQ=DAILY;COUNT=5"}
+    assert fish_core.ics_vevent_to_event_data(ended, today=TODAY) is None
+    running = dict(ended, DTSTART="20261015")  # 10-15、10-16、10-17 已经过去
+    assert fish_core.ics_vevent_to_event_data(running, today=TODAY)["repeat"]["total"] == 2
+
+
+def test_future_dtstart_is_honoured_by_weekly_rules():
+    future = dict(SERIES, DTSTART="20261201")
+    event = fish_core.Event(fish_core.ics_vevent_to_event_data(future, today=TODAY))
+    assert event._calculate_next(TODAY) == date(2026, 12, 1)
+    assert next(fish_core.iter_occurrences_between(event, TODAY, date(2027, 1, 1))) == date(2026, 12, 1)
+    until = dict(future, RRULE="FREQ=WEEKLY;BYDAY=TU;UNTIL=20261215")
+    assert fish_core.ics_vevent_to_event_data(until, today=TODAY)["repeat"]["total"] == 3  # 12-1、12-8、12-15
+
+
+def test_daily_byday_becomes_a_weekly_rule():
+    workdays = dict(SERIES, RRULE="FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR")
+    data = fish_core.ics_vevent_to_event_data(workdays, today=TODAY)
+    assert data["trigger"] == {"type": "weekly", "value": ["0", "1", "2", "3", "4"]}
+    every_other = dict(SERIES, RRULE="FREQ=DAILY;INTERVAL=2;BYDAY=MO")
+    assert fish_core.ics_vevent_to_event_data(every_other, today=TODAY) is None
+
+
+def test_export_keeps_repeat_progress(tmp_path):
+    today = date.today()
+    event = make_event("interval", "1", start=(today - timedelta(days=30)).isoformat(),
+                       repeat={"total": 10, "triggered": 4})
+    fish_core.export_events([event], str(tmp_path / "events.ics"))
+    text = (tmp_path / "events.ics").read_text(encoding="utf-8")
+    assert f"DTSTART;VALUE=DATE:{today:%Y%m%d}" in text and "COUNT=6" in text
+    (imported,), _ = import_file(tmp_path / "events.ics")
+    assert imported.repeat_total - imported.times_triggered == 6
+
+
+def test_import_skips_rules_that_compile_to_nothing(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text("name,type,value,start_date,repeat_total\n"
+                    "每 0 天,interval,0,2026-01-01,-1\n"
+                    "不存在的日期,date,2026-02-30,2026-01-01,1\n"
+                    "周会,weekly,0|2,2026-01-01,-1\n", encoding="utf-8")
+    events, stats = import_file(path)
+    assert [e.name for e in events] == ["周会"]
+    assert stats == {"imported": 1, "skipped": 2}
+
+
+def test_ics_and_csv_round_trip(tmp_path):
+    events = [make_event("date", "2026-12-01", name="年会, 带逗号", repeat={"total": 1, "triggered": 0}),
+              make_event("interval", "14"),
+              make_event("weekly", ["0", "4"], repeat={"total": 10, "triggered": 0})]
+    events[1].enabled = False
+    for name in ("events.ics", "events.csv"):
+        fish_core.export_events(events, str(tmp_path / name))
+        imported, _ = import_file(tmp_path / name)
+        assert [(e.id, e.name, e.enabled, e.trigger_type, e._rule, e.repeat_total) for e in imported] == \
+               [(e.id, e.name, e.enabled, e.trigger_type, e._rule, e.repeat_total) for e in events]
+
+
+def test_export_skips_invalid_events(tmp_path):
+    events = [make_event("interval", "abc"), make_event("date", "2026-12-01")]
+    for name in ("events.ics", "events.csv"):
+        stats = {}
+        fish_core.export_events(events, str(tmp_path / name), stats=stats)
+        assert stats == {"exported": 1, "skipped": 1}
@@ -0,0 +1,31 @@
+import fish_core
+
+
+def test_second_instance_forwards_commands(tmp_path):
+    lock, info = str(tmp_path / "fish.lock"), str(tmp_path / "instance.json")
+    primary = fish_core.InstanceGuard(lock, info)
+    assert primary.acquire()
+    received = []
+
+    def handler(command, request):
+        if command == "boom": raise RuntimeError("主线程已退出")
+        received.append(command)
+        return {"ok": True}
+
+    primary.serve(handler)
+    try:
+        second = fish_core.InstanceGuard(lock, info)
+        assert not second.acquire()
+        assert fish_core.send_to_running_instance("manager", info_path=info) == {"ok": True}
+        # handler 抛出异常后监听线程仍然存活
+        assert fish_core.send_to_running_instance("boom", info_path=info)["ok"] is False
+        assert fish_core.send_to_running_instance("show", info_path=info) == {"ok": True}
+        assert received == ["manager", "show"]
+    finally:
+        primary.close()
+    assert fish_core.send_to_running_instance("show", wait=0, info_path=info) is None
+    assert fish_core.InstanceGuard(lock, info).acquire()
+
+
+def test_no_running_instance(tmp_path):
+    assert fish_core.send_to_running_instance("show", wait=0, info_path=str(tmp_path / "instance.json")) is None
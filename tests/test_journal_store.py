@@ -0,0 +1,85 @@
+import json
+import os
+import types
+
+import pytest
+
+import fish_core
+from conftest import make_event
+
+
+def default_data():
+    return fish_core.default_app_data()
+
+
+def test_journal_replay_restores_unmerged_changes(tmp_path):
+    path = str(tmp_path / "events.json")
+    store = fish_core.JournaledStore(path)
+    store.load(default_data())
+    store.close()
+    # 模拟退出前没来得及合并的日志：序号不大于快照 journal_seq 的记录已合并过，应被跳过
+    records = [{"seq": 1, "op": "put", "event": make_event("interval", "2", id="e1").to_dict()},
+               {"seq": 2, "op": "settings", "settings": {"payday_rule": "15"}}]
+    with open(path + ".journal", "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        f.write('{"seq": 3, "op": "delete"')  # 崩溃时写了一半的最后一行
+
+    loaded = fish_core.JournaledStore(path).peek(default_data())
+    assert "e1" in [e["id"] for e in loaded["events"]]
+    assert loaded["settings"] == {"payday_rule": "15"}
+
+    store = fish_core.JournaledStore(path)
+    store.load(default_data())  # 有重放的记录时启动即合并成新快照
+    store.close()
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["journal_seq"] == 2
+    assert os.path.getsize(path + ".journal") == 0
+
+
+def test_journal_compaction_writes_snapshot_and_truncates_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(fish_core.JournaledStore, "COMPACT_THRESHOLD", 5)
+    path = str(tmp_path / "events.json")
+    store = fish_core.JournaledStore(path)
+    store.load(default_data())
+    for i in range(5):
+        store.put_event(make_event("interval", "1", id=f"e{i}"))
+    store.close()
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert {f"e{i}" for i in range(5)} <= {e["id"] for e in snapshot["events"]}
+    assert snapshot["journal_seq"] == 5
+    assert os.path.getsize(path + ".journal") == 0
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_legacy_events_get_ids_on_first_load(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps({"events": [{"name": "旧事件", "trigger": {"type": "interval", "value": "7"}}],
+                                "settings": {}}, ensure_ascii=False), encoding="utf-8")
+    store = fish_core.JournaledStore(str(path))
+    event_id = store.load(default_data())["events"][0]["id"]
+    store.close()
+    assert json.loads(path.read_text(encoding="utf-8"))["events"][0]["id"] == event_id
+
+
+def test_peek_does_not_write(tmp_path):
+    path = str(tmp_path / "events.json")
+    data = fish_core.JournaledStore(path).peek(default_data())
+    assert len(data["events"]) == 1
+    assert not os.listdir(tmp_path)
+
+
+def test_closing_the_app_flushes_the_pending_settings_save():
+    pytest.importorskip("ttkbootstrap")
+    import fish_catcher
+    calls = []
+    app = types.SimpleNamespace(
+        _save_timer_id="after#1", lag_probe=types.SimpleNamespace(stop=lambda: None),
+        after_cancel=lambda timer_id: calls.append(("cancel", timer_id)),
+        save_data=lambda settings=False: calls.append(("save", settings)),
+        mottos=types.SimpleNamespace(close=lambda: calls.append("mottos")),
+        notifier=types.SimpleNamespace(close=lambda: calls.append("notifier")),
+        store=types.SimpleNamespace(close=lambda: calls.append("store")),
+        destroy=lambda: calls.append("destroy"))
+    fish_catcher.FishCatcherApp.on_closing(app)
+    assert calls == [("cancel", "after#1"), ("save", True), "mottos", "notifier", "store", "destroy"]
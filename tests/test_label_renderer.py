@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+pytest.importorskip("ttkbootstrap")
+
+import fish_catcher  # noqa: E402
+import fish_core  # noqa: E402
+from conftest import FakeLabel  # noqa: E402
+
+
+def test_unchanged_text_is_not_reconfigured():
+    renderer = fish_catcher.LabelRenderer()
+    label = FakeLabel(".clock")
+    assert renderer.render(label, "09:00:00")
+    assert not renderer.render(label, "09:00:00")
+    assert renderer.render(label, "09:00:01")
+    assert label.configs == [{"text": "09:00:00"}, {"text": "09:00:01"}]
+    assert renderer.stats() == {"applied": 2, "skipped": 1}
+
+
+def test_colour_change_alone_is_applied():
+    renderer = fish_catcher.LabelRenderer()
+    label = FakeLabel(".event0")
+    renderer.render(label, "距离 发薪 还有 3 天", "blue")
+    renderer.render(label, "距离 发薪 还有 3 天", "red")
+    assert label.configs[-1] == {"text": "距离 发薪 还有 3 天", "foreground": "red"}
+
+
+def test_forget_clears_the_record_of_a_destroyed_widget():
+    renderer = fish_catcher.LabelRenderer()
+    renderer.render(FakeLabel(".event0"), "A")
+    renderer.forget(FakeLabel(".event0"))
+    recreated = FakeLabel(".event0")  # 重建后 Tk 可能复用同一个路径名
+    assert renderer.render(recreated, "A")
+    assert recreated.configs == [{"text": "A"}]
+
+
+def test_counters_are_reported_through_tick_stats(tmp_path):
+    renderer = fish_catcher.LabelRenderer()
+    stats = fish_core.TickStats(enabled=True)
+    stats.add_counters("labels", renderer.stats)
+    renderer.render(FakeLabel(".date"), "2026年10月18日")
+    assert stats.counters() == {"labels": {"applied": 1, "skipped": 0}}
+    stats.dump(str(tmp_path / "stats.json"))
+    assert json.loads((tmp_path / "stats.json").read_text(encoding="utf-8"))["counters"]["labels"]["applied"] == 1
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+import fish_core
+
+MOTTOS = ["第一条", "第三条", "第二条"]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "mottos.txt"
+    path.write_text("# 注释\n第一条\n\n第二条\n第三条\n", encoding="utf-8")
+    return path
+
+
+def open_corpus(corpus):
+    return fish_core.MottoCorpus(str(corpus), str(corpus.with_suffix(".idx")), str(corpus.with_name("state.json")))
+
+
+def test_shuffled_index_is_a_permutation():
+    for count in (1, 2, 7, 63, 1000):
+        assert sorted(fish_core.shuffled_index(i, count, key=12345) for i in range(count)) == list(range(count))
+
+
+def test_motto_bag_does_not_repeat_within_a_round(corpus):
+    mottos = open_corpus(corpus)
+    assert len(mottos) == 3
+    assert sorted(mottos.next() for _ in range(3)) == MOTTOS
+
+
+def test_partial_bag_resumes_after_restart(corpus):
+    mottos = open_corpus(corpus)
+    first = mottos.next()
+    mottos.close()
+    resumed = open_corpus(corpus)
+    assert sorted([first, resumed.next(), resumed.next()]) == MOTTOS
+
+
+def test_state_is_saved_in_batches(corpus, monkeypatch):
+    monkeypatch.setattr(fish_core.MottoCorpus, "STATE_SAVE_EVERY", 2)
+    mottos = open_corpus(corpus)
+    state_path = corpus.with_name("state.json")
+    mottos.next()
+    assert not state_path.exists()
+    mottos.next()
+    assert state_path.exists()
+
+
+def test_unchanged_corpus_is_not_hashed(corpus, monkeypatch):
+    assert len(open_corpus(corpus)) == 3
+
+    def digest(self):
+        raise AssertionError("大小和修改时间都没变，不应读取语录文件")
+
+    monkeypatch.setattr(fish_core.MottoCorpus, "_file_digest", digest)
+    assert len(open_corpus(corpus)) == 3
+
+
+def test_touched_corpus_is_hashed_but_not_reindexed(corpus, monkeypatch):
+    assert len(open_corpus(corpus)) == 3
+    st = os.stat(corpus)
+    os.utime(corpus, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def build(self, stat, digest):
+        raise AssertionError("内容没变，不应重建索引")
+
+    monkeypatch.setattr(fish_core.MottoCorpus, "_build_index", build)
+    assert len(open_corpus(corpus)) == 3
+    monkeypatch.setattr(fish_core.MottoCorpus, "_file_digest", lambda self: None)
+    assert len(open_corpus(corpus)) == 3  # 索引头已经更新为新的修改时间
+
+
+def test_edited_corpus_is_reindexed(corpus):
+    mottos = open_corpus(corpus)
+    mottos.next()
+    with open(corpus, "a", encoding="utf-8") as f:
+        f.write("第四条\n")
+    assert len(mottos) == 4
+    assert sorted(mottos.next() for _ in range(4)) == sorted(MOTTOS + ["第四条"])
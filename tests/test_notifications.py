@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("ttkbootstrap")
+
+import fish_catcher  # noqa: E402
+from conftest import FakeWidget  # noqa: E402
+
+
+class FakeNotification:
+    """替代 plyer.notification：记录标题，可以用 gate 让后台线程停在第一条通知上."""
+
+    def __init__(self, gate=None):
+        self.titles = []
+        self.gate = gate
+        self.changed = threading.Condition()
+
+    def notify(self, title, message, app_name, timeout):
+        with self.changed:
+            self.titles.append(title)
+            self.changed.notify_all()
+        if self.gate is not None: self.gate.wait(5)
+
+    def wait_for(self, count):
+        with self.changed:
+            assert self.changed.wait_for(lambda: len(self.titles) >= count, timeout=5)
+        time.sleep(0.05)  # 多等一会儿，确认后面没有多余的通知
+        return list(self.titles)
+
+
+class SlowReleaseLock:
+    """释放锁之后让出一段时间，稳定复现释放锁与后续语句之间被后台线程抢先的情况."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+
+    def __exit__(self, *exc):
+        self._lock.release()
+        time.sleep(0.05)
+
+
+class QuickDispatcher(fish_catcher.NotificationDispatcher):
+    BURST_COUNT = 3
+    BURST_INTERVAL = 0.2
+
+
+@pytest.fixture
+def notification(monkeypatch):
+    fake = FakeNotification()
+    monkeypatch.setattr(fish_catcher, "_plyer_notification", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def dispatcher(notification):
+    dispatcher = QuickDispatcher(FakeWidget())
+    yield dispatcher
+    dispatcher.close()
+    dispatcher._thread.join(5)
+
+
+def test_queued_key_is_coalesced(dispatcher, notification):
+    notification.gate = threading.Event()
+    assert dispatcher.submit("first", "first", "")
+    notification.wait_for(1)  # 后台线程停在第一条通知上
+    assert dispatcher.submit("water", "water", "")
+    assert not dispatcher.submit("water", "water", "")
+    notification.gate.set()
+    assert notification.wait_for(2) == ["first", "water"]
+    assert dispatcher.submit("water", "water", "")  # 发出之后可以再次提交
+
+
+def test_full_queue_rejects_new_keys(dispatcher, notification):
+    notification.gate = threading.Event()
+    dispatcher.submit("busy", "busy", "")
+    notification.wait_for(1)
+    accepted = [dispatcher.submit(f"k{i}", "", "") for i in range(dispatcher.MAX_PENDING + 1)]
+    assert accepted == [True] * dispatcher.MAX_PENDING + [False]
+    notification.gate.set()
+
+
+def test_burst_sends_every_notification(dispatcher, notification):
+    dispatcher._lock = SlowReleaseLock()
+    assert dispatcher.submit("water", "喝水", "", burst=True)
+    assert notification.wait_for(3) == ["喝水 (1/3)", "喝水 (2/3)", "喝水 (3/3)"]
+
+
+def test_new_submission_interrupts_burst(dispatcher, notification):
+    dispatcher.BURST_INTERVAL = 5
+    dispatcher.submit("water", "喝水", "", burst=True)
+    notification.wait_for(1)
+    dispatcher.submit("rest", "休息", "")
+    assert notification.wait_for(2) == ["喝水 (1/3)", "休息"]
+
+
+def test_burst_cooldown_downgrades_to_single_notification(dispatcher, notification):
+    dispatcher.submit("water", "喝水", "", burst=True)
+    notification.wait_for(3)
+    dispatcher.submit("water", "喝水", "", burst=True)
+    assert notification.wait_for(4)[-1] == "喝水"
+
+
+def test_close_stops_the_worker(dispatcher):
+    dispatcher.close()
+    dispatcher._thread.join(5)
+    assert not dispatcher._thread.is_alive()
+    assert not dispatcher.submit("water", "喝水", "")
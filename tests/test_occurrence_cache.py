@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+import fish_core
+from conftest import make_event
+
+TODAY = date(2026, 10, 18)
+
+
+class CountingEvent(fish_core.Event):
+    """记录 _calculate_next 的调用日期."""
+
+    def _calculate_next(self, from_date):
+        self.calls.append(from_date)
+        return super()._calculate_next(from_date)
+
+
+def test_next_occurrence_is_computed_once_per_day():
+    cache = fish_core.OccurrenceCache()
+    event = CountingEvent(make_event("interval", "3").to_dict())
+    event.calls = []
+    assert cache.next_occurrence(event, TODAY) == cache.next_occurrence(event, TODAY) == date(2026, 10, 19)
+    assert event.calls == [TODAY]
+    cache.next_occurrence(event, TODAY + timedelta(days=1))  # 跨天后重新计算
+    assert event.calls == [TODAY, TODAY + timedelta(days=1)]
+
+
+def test_invalidate_only_drops_the_edited_event():
+    cache = fish_core.OccurrenceCache()
+    first, second = make_event("interval", "3"), make_event("interval", "7")  # 10-19、10-22
+    assert cache.upcoming([first, second], TODAY) == [first, second]
+    second.trigger_value = "1"
+    assert cache.upcoming([first, second], TODAY) == [first, second]  # 没有失效前仍是缓存的排序
+    version = cache.version
+    cache.invalidate(second)
+    assert cache.version == version + 1
+    assert cache.upcoming([first, second], TODAY) == [second, first]
+    assert set(cache._next_dates) == {first.id, second.id}
+
+
+def test_replaced_event_object_is_recomputed():
+    cache = fish_core.OccurrenceCache()
+    event = make_event("interval", "3", id="same")
+    assert cache.next_occurrence(event, TODAY) == date(2026, 10, 19)
+    replacement = make_event("interval", "1", id="same")
+    assert cache.next_occurrence(replacement, TODAY) == TODAY
+
+
+def test_upcoming_puts_disabled_and_ended_events_last():
+    cache = fish_core.OccurrenceCache()
+    ended = make_event("date", "2026-01-01", repeat={"total": 1, "triggered": 0})
+    disabled = make_event("interval", "1", enabled=False)
+    soon = make_event("weekly", ["0"])
+    assert cache.upcoming([ended, disabled, soon], TODAY) == [soon, ended]
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import pytest
+
+import fish_core
+from conftest import make_event
+
+TODAY = date.today()
+
+
+def months_ahead(count):
+    year, month = TODAY.year, TODAY.month
+    for _ in range(count):
+        yield year, month
+        year, month = (year, month + 1) if month < 12 else (year + 1, 1)
+
+
+def shown_days(index, events, event, months=3):
+    return sorted(day for year, month in months_ahead(months)
+                  for day, day_events in index.month(events, year, month).items() if event in day_events)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def expansion(request, monkeypatch):
+    """分别用 NumPy 向量化展开和纯 Python 展开构建月历."""
+    if request.param == "numpy": pytest.importorskip("numpy")
+    else: monkeypatch.setattr(fish_core, "_numpy", lambda: None)
+
+
+def test_month_view_caps_events_at_their_remaining_count(expansion):
+    index = fish_core.OccurrenceIndex(fish_core.OccurrenceCache())
+    daily = make_event("interval", "1", start=TODAY.isoformat(), repeat={"total": 5, "triggered": 2})
+    unlimited = make_event("interval", "1", start=TODAY.isoformat())
+    events = [daily, unlimited]
+    assert shown_days(index, events, daily) == [TODAY + timedelta(days=i) for i in range(3)]
+    assert len(shown_days(index, events, unlimited)) > 31
+
+
+def test_remaining_count_is_counted_from_today_not_from_the_month(expansion):
+    index = fish_core.OccurrenceIndex(fish_core.OccurrenceCache())
+    event = make_event("interval", "1", start=TODAY.isoformat(), repeat={"total": 40, "triggered": 0})
+    days = shown_days(index, [event], event, months=4)
+    assert days == [TODAY + timedelta(days=i) for i in range(40)]
+
+
+def test_index_is_rebuilt_after_the_cache_is_invalidated():
+    cache = fish_core.OccurrenceCache()
+    index = fish_core.OccurrenceIndex(cache)
+    event = make_event("interval", "1", start=TODAY.isoformat())
+    assert event in index.events_on([event], TODAY)
+    event.enabled = False
+    assert event in index.events_on([event], TODAY)  # 还没失效
+    cache.invalidate(event)
+    assert index.events_on([event], TODAY) == []
+
+
+def test_event_triggered_today_still_shows_today():
+    index = fish_core.OccurrenceIndex(fish_core.OccurrenceCache())
+    event = make_event("date", TODAY.isoformat(), start=TODAY.isoformat(), repeat={"total": 1, "triggered": 0})
+    event.trigger()
+    assert index.events_on([event], TODAY) == [event]
@@ -0,0 +1,31 @@
+from datetime import date
+
+import fish_core
+
+
+def test_payday_fixed_day_clamps_to_month_end():
+    schedule = fish_core.PaydaySchedule("31")
+    assert schedule.upcoming(date(2026, 2, 1))[:2] == [date(2026, 2, 28), date(2026, 3, 31)]
+
+
+def test_payday_rules_with_workday_shift(holidays):
+    schedule = fish_core.PaydaySchedule("1前, 末工作日")
+    payouts = schedule.upcoming(date(2026, 1, 20))
+    assert payouts[:3] == [date(2026, 1, 30), date(2026, 2, 28), date(2026, 3, 31)]  # 2-1 周日提前到 1-30
+    assert len(payouts) == fish_core.PaydaySchedule.PAYOUTS
+    assert schedule.days_until(date(2026, 1, 30)) == 0
+
+
+def test_invalid_payday_rule_keeps_default():
+    schedule = fish_core.PaydaySchedule("abc")
+    assert schedule.rule_text == "10"
+    assert schedule.next_payout(date(2026, 10, 18)) == date(2026, 11, 10)
+    settings = fish_core.AppSettings()
+    assert not settings.set_payday("32")
+    assert settings.payday_error
+
+
+def test_legacy_numeric_payday_setting_is_migrated():
+    settings = fish_core.AppSettings()
+    settings.load({"payday": 25})
+    assert settings.payday.rule_text == "25"
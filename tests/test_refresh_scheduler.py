@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import fish_core
+
+
+class RecordingWidget:
+    """记录 after() 的延迟，不真正计时."""
+
+    def __init__(self):
+        self.delays = []
+
+    def after(self, ms, callback, *args):
+        self.delays.append(ms)
+        return len(self.delays)
+
+    def after_cancel(self, timer_id):
+        pass
+
+
+def make_scheduler():
+    widget = RecordingWidget()
+    scheduler = fish_core.RefreshScheduler(widget)
+    calls = []
+    scheduler.add_panel("clock", lambda now: calls.append("clock"), lambda now: now + timedelta(seconds=30))
+    scheduler.add_panel("events", lambda now: calls.append("events"), fish_core.next_midnight)
+    scheduler.add_panel("water", lambda now: calls.append("water"), lambda now: None, ui=False)
+    return scheduler, widget, calls
+
+
+def test_panels_only_refresh_when_due():
+    scheduler, widget, calls = make_scheduler()
+    scheduler.run()
+    assert calls == ["clock", "events", "water"]
+    scheduler.run()  # 还没到任何截止时间
+    assert calls == ["clock", "events", "water"]
+    assert 29000 < widget.delays[-1] <= 30000 + scheduler.WAKEUP_SLACK_MS  # 只为最近的截止时间醒来
+
+
+def test_invalidate_refreshes_the_named_panel_immediately():
+    scheduler, widget, calls = make_scheduler()
+    scheduler.run()
+    scheduler.invalidate("events")
+    assert widget.delays[-1] == 0
+    scheduler.run()
+    assert calls[3:] == ["events"]
+
+
+def test_paused_ui_keeps_background_panels_running():
+    scheduler, widget, calls = make_scheduler()
+    scheduler.run()
+    scheduler._panels["water"]["next_deadline"] = lambda now: now + timedelta(minutes=10)
+    scheduler.invalidate("water")
+    scheduler.pause_ui()
+    scheduler.invalidate("clock")
+    scheduler.run()
+    assert calls[3:] == ["water"]
+    assert widget.delays[-1] == scheduler.MAX_SLEEP_MS  # 十分钟后的提醒也最多睡一分钟
+    scheduler.resume_ui()
+    scheduler.run()
+    assert calls[4:] == ["clock", "events"]
+
+
+def test_next_deadlines():
+    now = datetime(2026, 10, 18, 23, 59, 59, 500000)
+    assert fish_core.next_second(now) == datetime(2026, 10, 19)
+    assert fish_core.next_midnight(now) == datetime(2026, 10, 19)
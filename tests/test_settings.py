@@ -0,0 +1,67 @@
+import types
+from datetime import date, datetime, time
+
+import pytest
+
+import fish_core
+from conftest import FakeLabel
+
+
+def test_work_end_time_is_parsed_once_and_errors_are_kept():
+    settings = fish_core.AppSettings()
+    assert settings.set_work_end_time("17:30:00")
+    assert settings.work_end_deadline(date(2026, 10, 16)) == datetime(2026, 10, 16, 17, 30)
+    assert not settings.set_work_end_time("5点半")
+    assert settings.work_end_time_error == fish_core.AppSettings.WORK_END_TIME_ERROR
+    assert settings.work_end_deadline(date(2026, 10, 16)) is None
+    assert settings.set_work_end_time(" 9:05:00 ")  # 不是两位小时也能解析
+    assert settings.work_end_time == time(9, 5)
+
+
+def test_reminder_interval_validation():
+    settings = fish_core.AppSettings()
+    assert settings.set_reminder_interval(45)
+    assert settings.next_reminder_time(1000.0) == 1000.0 + 45 * 60
+    assert not settings.set_reminder_interval(None)
+    assert settings.reminder_interval_error == fish_core.AppSettings.INTERVAL_NOT_NUMBER_ERROR
+    assert settings.next_reminder_time(1000.0) is None
+    assert not settings.set_reminder_interval("0")
+    assert settings.reminder_interval_error == fish_core.AppSettings.INTERVAL_NOT_POSITIVE_ERROR
+    assert settings.set_reminder_interval("30") and settings.reminder_interval_error is None
+    settings.reminder_enabled = False
+    assert settings.next_reminder_time(1000.0) is None
+
+
+def test_load_applies_saved_settings():
+    settings = fish_core.AppSettings()
+    settings.load({"work_end_time": "19:00:00", "reminder_interval": 20, "reminder_enabled": False,
+                   "payday_rule": "末"})
+    assert settings.work_end_time == time(19)
+    assert settings.reminder_interval_seconds == 20 * 60
+    assert settings.reminder_enabled is False
+    assert settings.payday.rule_text == "末"
+
+
+class FakeVar:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        if isinstance(self.value, Exception): raise self.value
+        return self.value
+
+
+def test_invalid_interval_is_shown_when_edited():
+    pytest.importorskip("ttkbootstrap")
+    import tkinter as tk
+    import fish_catcher
+    app = types.SimpleNamespace(settings=fish_core.AppSettings(), renderer=fish_catcher.LabelRenderer(),
+                                water_error_label=FakeLabel(".water_error"), reminder_enabled=FakeVar(True),
+                                water_reminder_interval=FakeVar(tk.TclError("expected integer")),
+                                refresh_scheduler=types.SimpleNamespace(invalidate=lambda *names: None))
+    fish_catcher.FishCatcherApp.on_reminder_settings_changed(app)
+    assert app.water_error_label.configs == [{"text": fish_core.AppSettings.INTERVAL_NOT_NUMBER_ERROR}]
+    app.water_reminder_interval.value = 30
+    fish_catcher.FishCatcherApp.on_reminder_settings_changed(app)
+    assert app.water_error_label.configs[-1] == {"text": ""}
+    assert app.settings.next_reminder_time(0) == 30 * 60
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+import fish_core
+from conftest import make_event
+
+TODAY = date.today()
+
+
+def default_data(events=None):
+    data = fish_core.default_app_data()
+    if events is not None: data["events"] = events
+    return data
+
+
+def dated(offset, **extra):
+    return make_event("date", (TODAY + timedelta(days=offset)).isoformat(), start=TODAY.isoformat(),
+                      repeat={"total": 1, "triggered": 0}, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = fish_core.SQLiteStore(str(tmp_path / "events.db"))
+    store.load(default_data([]))
+    yield store
+    store.close()
+
+
+def test_sqlite_store_drains_large_batches_on_close(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = fish_core.SQLiteStore(path)
+    store.load(default_data())
+    for i in range(5000):
+        store.put_event(make_event("interval", "3", id=f"e{i}"))
+    store.close()
+    with sqlite3.connect(path) as conn:
+        count, positions = conn.execute("SELECT COUNT(*), COUNT(DISTINCT position) FROM events").fetchone()
+    assert count == positions == 5001
+
+
+def test_sqlite_store_keeps_positions_across_sessions(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = fish_core.SQLiteStore(path)
+    store.load(default_data())
+    store.put_event(make_event("interval", "1", id="first"))
+    store.close()
+    store = fish_core.SQLiteStore(path)
+    store.load(default_data())
+    store.put_event(make_event("interval", "1", id="second"))
+    store.put_event(make_event("interval", "7", id="first"))  # 更新不改变位置
+    store.close()
+    ids = [e["id"] for e in fish_core.SQLiteStore(path).peek(default_data())["events"]]
+    assert ids[1:] == ["first", "second"]
+
+
+def test_sqlite_store_migrates_json_data(tmp_path):
+    json_path = str(tmp_path / "events.json")
+    store = fish_core.JournaledStore(json_path)
+    store.load(default_data())
+    store.put_event(make_event("weekly", ["0"], id="weekly"))
+    store.close()
+    store = fish_core.SQLiteStore(str(tmp_path / "events.db"), migrate_from=json_path)
+    data = store.load(default_data())
+    assert "weekly" in [e["id"] for e in data["events"]]
+    assert store.upcoming_ids(TODAY)  # 迁移时留空的 next_date 在第一次查询时补算
+    store.close()
+
+
+def test_peek_does_not_create_the_database(tmp_path):
+    json_path = str(tmp_path / "events.json")
+    assert fish_core.SQLiteStore(str(tmp_path / "events.db"), migrate_from=json_path).peek(default_data())["events"]
+    assert not os.listdir(tmp_path)
+
+
+def test_upcoming_ids_match_the_in_memory_order(store):
+    events = [dated(5), make_event("interval", "3"), dated(-1), dated(0, enabled=False), dated(0),
+              make_event("weekly", ["0", "3"]), dated(5)]
+    for event in events: store.put_event(event)  # 查询前会等写线程提交这些修改
+    expected = [e.id for e in fish_core.OccurrenceCache().upcoming(events, TODAY)]
+    assert store.upcoming_ids(TODAY) == expected
+    assert store.count_enabled(TODAY) == len(expected)
+    assert store.upcoming_ids(TODAY, 2, 1) == expected[1:3]
+    assert store.ids_on(TODAY) == [events[4].id]
+
+
+def test_edits_and_deletes_update_the_index(store):
+    event = dated(3)
+    store.put_event(event)
+    assert store.ids_on(TODAY) == []
+    event.trigger_value = TODAY.isoformat()
+    store.put_event(event)
+    assert store.ids_on(TODAY) == [event.id]
+    event.enabled = False
+    store.put_event(event)
+    assert store.ids_on(TODAY) == [] and store.count_enabled(TODAY) == 0
+    store.delete_event(event)
+    assert store.upcoming_ids(TODAY) == []
+
+
+def test_past_next_dates_are_recomputed_on_a_new_day(store):
+    weekly = make_event("weekly", [str(TODAY.weekday())])
+    store.put_event(weekly)
+    assert store.ids_on(TODAY) == [weekly.id]
+    assert store.ids_on(TODAY + timedelta(days=1)) == []
+    assert store.ids_on(TODAY + timedelta(days=7)) == [weekly.id]
+
+
+def test_queries_use_the_next_date_index(store):
+    store.put_event(dated(1))
+    store.count_enabled(TODAY)
+    conn = store._reader
+    for sql in ("SELECT id FROM events WHERE enabled = 1 ORDER BY next_date, position LIMIT 5",
+                "SELECT id FROM events WHERE enabled = 1 AND next_date = '2026-10-18' ORDER BY position"):
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+        assert "events_upcoming" in plan and "TEMP B-TREE" not in plan
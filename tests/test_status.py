@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import fish_core
+from conftest import ROOT, make_event
+
+NOW = datetime(2026, 10, 16, 17, 0, 0)  # 周五 17:00
+
+
+def sample_events():
+    return [make_event("date", "2026-10-20", name="体检", start="2026-10-01", repeat={"total": 1, "triggered": 0}),
+            make_event("interval", "7", name="周会", start="2026-10-16"),
+            make_event("interval", "1", name="已关闭", enabled=False)]
+
+
+def test_app_status_summarises_countdowns(tmp_path):
+    workdays = fish_core.WorkdayCalendar().load(str(tmp_path / "missing.txt"))
+    status = fish_core.app_status(fish_core.AppSettings(), sample_events(), now=NOW, limit=2, workdays=workdays)
+    assert status["work"] == {"state": "working", "seconds": 3600, "text": "01:00:00"}
+    assert status["weekend"] == {"state": "workday", "days": 1}
+    assert status["payday"] == {"days": 25, "next": "2026-11-10"}
+    assert [(e["name"], e["days"]) for e in status["events"]] == [("周会", 0), ("体检", 4)]
+    assert fish_core.format_status(status) == "下班 01:00:00 | 周末 1 天 | 发薪 25 天 | 周会 今天 | 体检 4 天"
+
+
+def test_status_main_reads_the_data_file(holidays, capsys):
+    assert fish_core.status_main(["--local", "--json", "-n", "1"]) == 0
+    status = json.loads(capsys.readouterr().out)
+    assert status["source"] == "file"
+    assert [e["name"] for e in status["events"]] == ["元旦"]  # 没有数据文件时使用默认数据
+    assert fish_core.status_main(["--local"]) == 0
+    assert " | " in capsys.readouterr().out
+
+
+def test_status_main_rejects_unknown_arguments(capsys):
+    assert fish_core.status_main(["--local", "-n", "x"]) == 2
+    assert "用法" in capsys.readouterr().err
+
+
+# 在子进程中按命令行方式运行 status，最后一行输出已导入的界面/重量级模块
+CHECK_IMPORTS = """
+import runpy, sys
+sys.argv = {argv!r}
+try:
+    runpy.{runner}
+except SystemExit as e:
+    assert not e.code, e.code
+heavy = sorted(m for m in sys.modules if m.split(".")[0] in ("tkinter", "ttkbootstrap", "PIL", "plyer", "numpy"))
+print("HEAVY=" + ",".join(heavy))
+"""
+
+
+def run_status(argv, runner, tmp_path):
+    env = dict(os.environ, APPDATA=str(tmp_path))
+    code = CHECK_IMPORTS.format(argv=argv, runner=runner)
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.splitlines()
+
+
+def test_status_command_does_not_import_gui_modules(tmp_path):
+    for argv, runner in ((["fish_core", "status", "--local"], "run_module('fish_core', run_name='__main__')"),
+                         (["fish_catcher.py", "status", "--local"], "run_path('fish_catcher.py', run_name='__main__')")):
+        lines = run_status(argv, runner, tmp_path)
+        assert " | " in lines[0]
+        assert lines[-1] == "HEAVY="
@@ -0,0 +1,86 @@
+import json
+
+import fish_core
+
+
+class RecordingWidget:
+    """记录 after() 登记的回调，由测试手动触发."""
+
+    def __init__(self):
+        self.pending = {}
+
+    def after(self, ms, callback, *args):
+        timer_id = f"after#{len(self.pending)}"
+        self.pending[timer_id] = callback
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self.pending.pop(timer_id, None)
+
+
+def test_disabled_stats_return_the_function_unchanged():
+    stats = fish_core.TickStats()
+
+    def tick():
+        pass
+
+    assert stats.instrument("tick", tick) is tick
+    stats.record("tick", 0.5)
+    assert stats.summary() == {}
+
+
+def test_instrumented_calls_are_timed():
+    stats = fish_core.TickStats(enabled=True)
+    timed = stats.instrument("tick", lambda x: x * 2)
+    assert timed(21) == 42
+    assert stats.summary()["tick"]["count"] == 1
+
+
+def test_summary_percentiles_and_histogram():
+    stats = fish_core.TickStats(enabled=True)
+    for ms in range(1, 101): stats.record("panel", ms / 1000)
+    summary = stats.summary()["panel"]
+    assert summary["count"] == 100
+    assert round(summary["p50_ms"]) == 51 and round(summary["p99_ms"]) == 100 and round(summary["max_ms"]) == 100
+    # 各桶上界 1/5/16/50/100ms，最后一桶为超出上界的部分
+    assert summary["histogram"] == [1, 4, 11, 34, 50, 0]
+
+
+def test_window_keeps_only_recent_samples(monkeypatch):
+    monkeypatch.setattr(fish_core.TickStats, "WINDOW", 10)
+    stats = fish_core.TickStats(enabled=True)
+    for i in range(25): stats.record("tick", i / 1000)
+    summary = stats.summary()["tick"]
+    assert summary["count"] == 10 and round(summary["max_ms"]) == 24
+
+
+def test_dump_includes_stats_and_counters(tmp_path):
+    stats = fish_core.TickStats(enabled=True)
+    stats.record("tick", 0.002)
+    labels = {"updates": 0}
+    stats.add_counters("labels", lambda: dict(labels))
+    labels["updates"] = 7  # 计数在写出时才读取
+    path = tmp_path / "profile.json"
+    stats.dump(str(path))
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["buckets_ms"] == list(fish_core.TickStats.BUCKETS_MS)
+    assert data["stats"]["tick"]["count"] == 1
+    assert data["counters"] == {"labels": {"updates": 7}}
+
+
+def test_lag_probe_records_loop_lag_until_stopped():
+    widget, stats = RecordingWidget(), fish_core.TickStats(enabled=True)
+    probe = fish_core.LagProbe(widget, stats)
+    probe.start()
+    timer_id, callback = widget.pending.popitem()
+    callback()
+    assert stats.summary()["loop_lag"]["count"] == 1
+    assert len(widget.pending) == 1  # 触发后重新挂上下一次
+    probe.stop()
+    assert widget.pending == {}
+
+
+def test_lag_probe_does_nothing_when_stats_are_disabled():
+    widget = RecordingWidget()
+    fish_core.LagProbe(widget, fish_core.TickStats()).start()
+    assert widget.pending == {}
@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+import fish_core
+from conftest import FakeWidget, make_event
+
+TODAY = date.today()
+
+
+def dated(offset, **extra):
+    day = (TODAY + timedelta(days=offset)).isoformat()
+    return make_event("date", day, start=TODAY.isoformat(), repeat={"total": 1, "triggered": 0}, **extra)
+
+
+def test_trigger_scheduler_fires_due_events_once():
+    due, later = dated(0), dated(3)
+    scheduler = fish_core.TriggerScheduler(FakeWidget(), lambda: None)
+    scheduler.rebuild([due, later])
+    assert scheduler.trigger_due(TODAY) == [due]
+    assert due.times_triggered == 1 and due.last_triggered_date == TODAY
+    assert scheduler.trigger_due(TODAY) == []
+    assert scheduler.pop_due(TODAY + timedelta(days=3)) == [later]
+
+
+def test_disabled_removed_and_edited_events_are_dropped_lazily():
+    disabled, removed, edited = dated(0, enabled=False), dated(0), dated(0)
+    scheduler = fish_core.TriggerScheduler(FakeWidget(), lambda: None)
+    scheduler.rebuild([disabled, removed, edited])
+    scheduler.remove(removed)
+    edited.trigger_value = (TODAY + timedelta(days=2)).isoformat()
+    scheduler.reschedule(edited)
+    assert scheduler.trigger_due(TODAY) == []
+    assert scheduler.pop_due(TODAY + timedelta(days=2)) == [edited]
+
+
+def test_repeating_event_is_requeued_after_firing():
+    event = make_event("interval", "2", start=TODAY.isoformat())
+    scheduler = fish_core.TriggerScheduler(FakeWidget(), lambda: None)
+    scheduler.rebuild([event])
+    assert scheduler.trigger_due(TODAY) == [event]
+    assert scheduler.pop_due(TODAY + timedelta(days=1)) == []
+    assert scheduler.pop_due(TODAY + timedelta(days=2)) == [event]
+
+
+def test_source_mode_only_queues_todays_events():
+    today_event, later = dated(0), dated(2)
+    queried = []
+
+    def source(day):
+        queried.append(day)
+        return [today_event]
+
+    scheduler = fish_core.TriggerScheduler(FakeWidget(), lambda: None, source)
+    scheduler.rebuild()
+    assert queried == [TODAY]
+    scheduler.reschedule(later)  # 之后的日期留给零点的重新查询
+    assert [entry[2] for entry in scheduler._heap] == [today_event]
+    assert scheduler.trigger_due(TODAY) == [today_event]
+    assert scheduler._heap == []
@@ -0,0 +1,42 @@
+from datetime import date
+
+import fish_core
+from conftest import make_event
+
+
+def test_default_calendar_is_monday_to_friday(tmp_path):
+    calendar = fish_core.WorkdayCalendar().load(str(tmp_path / "missing.txt"))
+    assert calendar.is_workday(date(2026, 10, 16))  # 周五
+    assert not calendar.is_workday(date(2026, 10, 17))  # 周六
+    assert calendar.next_day(date(2026, 10, 13), workday=False) == date(2026, 10, 17)
+
+
+def test_holiday_file_overrides_and_ranges(tmp_path):
+    path = tmp_path / "holidays.txt"
+    path.write_text("# 注释\n2026-01-01~2026-01-03 休 元旦\n2026-01-04 班 调休\n坏行\n", encoding="utf-8")
+    calendar = fish_core.WorkdayCalendar().load(str(path))
+    assert not calendar.is_workday(date(2026, 1, 2))  # 周五放假
+    assert calendar.is_workday(date(2026, 1, 4))  # 周日调休上班
+    assert calendar.next_day(date(2025, 12, 31), workday=False) == date(2026, 1, 1)
+    assert calendar.next_day(date(2026, 1, 1), workday=True) == date(2026, 1, 4)
+
+
+def test_next_day_crosses_year_boundary(tmp_path):
+    calendar = fish_core.WorkdayCalendar().load(str(tmp_path / "missing.txt"))
+    assert calendar.next_day(date(2026, 12, 31), workday=False) == date(2027, 1, 2)
+
+
+def test_weekend_countdown_uses_make_up_days(holidays):
+    assert fish_core.weekend_countdown(date(2026, 2, 9)) == ("workday", 6)  # 2-14 周六调休，2-15 起放假
+    assert fish_core.weekend_countdown(date(2026, 2, 16)) == ("rest", 0)
+    assert fish_core.weekend_countdown(date(2026, 2, 23)) == ("last_rest", 0)
+
+
+def test_workdays_only_skips_holidays_and_keeps_make_up_days(holidays):
+    event = make_event("weekly", ["0", "1", "2", "3", "4", "5"])
+    event.workdays_only = True
+    days = list(fish_core.iter_occurrences_between(event, date(2026, 9, 28), date(2026, 10, 12)))
+    assert date(2026, 10, 1) not in days  # 国庆节
+    assert date(2026, 10, 10) in days  # 周六调休上班
+    assert date(2026, 10, 3) not in days  # 放假的周六
+    assert event.to_dict()["trigger"]["workdays_only"] is True